@@ -8,6 +8,11 @@ load_dotenv()
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 REDIS_DB = int(os.getenv('REDIS_DB', 0))
+REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', 50))  # 连接池最大连接数
+REDIS_SOCKET_TIMEOUT = float(os.getenv('REDIS_SOCKET_TIMEOUT', 5))  # 读写超时（秒）
+REDIS_SOCKET_CONNECT_TIMEOUT = float(os.getenv('REDIS_SOCKET_CONNECT_TIMEOUT', 2))  # 连接超时（秒）
+REDIS_HEALTH_CHECK_INTERVAL = int(os.getenv('REDIS_HEALTH_CHECK_INTERVAL', 30))  # 空闲连接健康检查间隔（秒）
+REDIS_SCAN_COUNT = int(os.getenv('REDIS_SCAN_COUNT', 500))  # SCAN每批返回的键数提示
 
 # 纷享销客API配置
 FXK_API_BASE_URL = 'https://open.fxiaoke.com/cgi'
@@ -25,4 +30,84 @@ FXK_OAUTH_OPEN_USER_ID_COOKIE_NAME = 'fxk_oauth_open_user_id'
 # Token缓存配置
 TOKEN_CACHE_KEY = 'fxk_corp_access_token'
 TOKEN_EXPIRE_TIME = 7200  # 2小时
-USER_ID_CACHE_KEY = 'fxk_user_id'  # 用户ID缓存键前缀 
\ No newline at end of file
+USER_ID_CACHE_KEY = 'fxk_user_id'  # 用户ID缓存键前缀 
+
+# HTTP连接池配置
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', 10))  # 每个会话缓存的连接池数量
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', 20))  # 单个主机的最大连接数
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 5))  # 连接超时（秒）
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 30))  # 读取超时（秒）
+
+# 异步HTTP配置
+ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', 200))  # 事件循环内的最大并发连接数
+ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST', 100))  # 单个主机的最大并发连接数
+
+# 数据获取配置
+FETCH_PAGE_CONCURRENCY = int(os.getenv('FETCH_PAGE_CONCURRENCY', 5))  # 流式获取时单个对象同时在途的最大页数
+FETCH_GLOBAL_CONCURRENCY = int(os.getenv('FETCH_GLOBAL_CONCURRENCY', 10))  # 全局调度器的工作线程数，所有对象的分页请求共享
+PARTITION_MAX_RECORDS = int(os.getenv('PARTITION_MAX_RECORDS', 2000))  # 按创建时间分区获取时单个区间的最大记录数
+
+# 纷享销客接口限流配置（按接口分别限速）
+FXK_RATE_LIMIT_QPS = float(os.getenv('FXK_RATE_LIMIT_QPS', 20))  # 每秒最大请求数
+FXK_RATE_LIMIT_BURST = int(os.getenv('FXK_RATE_LIMIT_BURST', 10))  # 令牌桶容量
+FXK_RATE_LIMIT_MIN_QPS = float(os.getenv('FXK_RATE_LIMIT_MIN_QPS', 1))  # 被限流后的最低速率
+FXK_MIN_CONCURRENCY = int(os.getenv('FXK_MIN_CONCURRENCY', 1))  # 最小并发数
+FXK_MAX_CONCURRENCY = int(os.getenv('FXK_MAX_CONCURRENCY', 20))  # 最大并发数
+FXK_INITIAL_CONCURRENCY = int(os.getenv('FXK_INITIAL_CONCURRENCY', 5))  # 初始并发数
+FXK_LATENCY_THRESHOLD = float(os.getenv('FXK_LATENCY_THRESHOLD', 2))  # 延迟阈值（秒），超过则降低并发
+FXK_THROTTLE_ERROR_CODES = [int(code) for code in os.getenv('FXK_THROTTLE_ERROR_CODES', '').split(',') if code.strip()]  # 视为限流的业务错误码
+
+# 重试策略配置
+RETRY_MAX_ATTEMPTS = int(os.getenv('RETRY_MAX_ATTEMPTS', 3))  # 单次调用最多尝试次数
+RETRY_BASE_DELAY = float(os.getenv('RETRY_BASE_DELAY', 0.5))  # 退避基础时间（秒）
+RETRY_MAX_DELAY = float(os.getenv('RETRY_MAX_DELAY', 8))  # 退避最长时间（秒）
+RETRY_BUDGET = int(os.getenv('RETRY_BUDGET', 50))  # 每份报告允许的重试总次数
+RETRY_BUDGET_WINDOW = float(os.getenv('RETRY_BUDGET_WINDOW', 60))  # 不属于某份报告的调用共用的重试预算按此时间窗口（秒）恢复
+
+# 查询结果缓存配置
+QUERY_CACHE_ENABLED = os.getenv('QUERY_CACHE_ENABLED', 'true').lower() == 'true'
+QUERY_CACHE_KEY = 'fxk_query_page'  # 查询分页缓存键前缀
+QUERY_CACHE_DEFAULT_TTL = int(os.getenv('QUERY_CACHE_DEFAULT_TTL', 600))  # 未单独配置的对象缓存10分钟
+QUERY_CACHE_TTLS = {  # 按对象配置缓存时间（秒），0表示不缓存
+    'object_xkBG2__c': 24 * 60 * 60,  # 业务模块与相关负责人，基本不变
+    'object_tL7xk__c': 60 * 60,  # 产品发布计划
+    'object_0yrBp__c': 60 * 60,  # 研发迭代
+    'object_notes__c': 30 * 60,  # 产品发布清单
+    'offline_bug__c': 5 * 60,  # 线下BUG，测试期间变化频繁
+    'object_y31e4__c': 5 * 60  # 系统BUG
+}
+
+# 令牌后台刷新配置
+TOKEN_REFRESH_MARGIN = int(os.getenv('TOKEN_REFRESH_MARGIN', 300))  # 在令牌过期前多少秒刷新
+TOKEN_REFRESH_RETRY_INTERVAL = int(os.getenv('TOKEN_REFRESH_RETRY_INTERVAL', 30))  # 刷新失败后的重试间隔（秒）
+
+# 凭证缓存配置
+CORP_ID_CACHE_KEY = 'fxk_corp_id'  # 企业ID缓存键
+CORP_ID_EXPIRE_TIME = 30 * 24 * 60 * 60  # 企业ID基本不变，缓存30天
+USER_ID_EXPIRE_TIME = 24 * 60 * 60  # 用户ID缓存24小时
+FEISHU_TOKEN_CACHE_KEY = 'feishu_app_access_token'  # 飞书应用访问令牌缓存键前缀
+CREDENTIAL_LOCAL_TTL = int(os.getenv('CREDENTIAL_LOCAL_TTL', 60))  # 进程内缓存时间（秒），到期后回源Redis
+CREDENTIAL_LOCAL_MAXSIZE = int(os.getenv('CREDENTIAL_LOCAL_MAXSIZE', 10000))  # 进程内最多缓存的凭证数
+
+# 缓存后端配置
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'tiered')  # redis / memory / sqlite / tiered（本地 + Redis）
+CACHE_LOCAL_BACKEND = os.getenv('CACHE_LOCAL_BACKEND', 'memory')  # tiered模式下的本地层：memory / sqlite
+CACHE_MEMORY_MAXSIZE = int(os.getenv('CACHE_MEMORY_MAXSIZE', 10000))  # 进程内LRU最大条目数
+CACHE_SQLITE_PATH = os.getenv('CACHE_SQLITE_PATH', 'output/cache.db')  # SQLite缓存文件路径
+CACHE_LOCAL_TTL = int(os.getenv('CACHE_LOCAL_TTL', 60))  # tiered模式下本地层的最长缓存时间（秒）
+CACHE_REMOTE_RETRY_INTERVAL = int(os.getenv('CACHE_REMOTE_RETRY_INTERVAL', 30))  # Redis出错后多久再重试（秒）
+
+# 飞书用户ID查询配置
+FEISHU_BATCH_GET_ID_MAX = 50  # batch_get_id单次最多查询的手机号数
+FEISHU_BATCH_WINDOW = float(os.getenv('FEISHU_BATCH_WINDOW', 0.01))  # 合并并发查询的等待窗口（秒）
+FEISHU_USER_ID_CACHE_MAXSIZE = int(os.getenv('FEISHU_USER_ID_CACHE_MAXSIZE', 10000))  # 用户ID缓存最大条目数
+
+# 员工通讯录同步配置
+FXK_ROOT_DEPARTMENT_ID = int(os.getenv('FXK_ROOT_DEPARTMENT_ID', 999999))  # 纷享销客根部门ID
+EMPLOYEE_DIRECTORY_PATH = os.getenv('EMPLOYEE_DIRECTORY_PATH', 'output/employee_directory.db')  # 本地通讯录文件路径
+EMPLOYEE_DIRECTORY_SYNC_INTERVAL = int(os.getenv('EMPLOYEE_DIRECTORY_SYNC_INTERVAL', 60 * 60))  # 后台同步间隔（秒）
+EMPLOYEE_DIRECTORY_RETRY_INTERVAL = int(os.getenv('EMPLOYEE_DIRECTORY_RETRY_INTERVAL', 5 * 60))  # 同步失败后的重试间隔（秒）
+
+# 增量同步配置
+SNAPSHOT_DB_PATH = os.getenv('SNAPSHOT_DB_PATH', 'output/snapshots.db')  # 本地数据快照文件路径（SQLite）
+INCREMENTAL_SYNC_OVERLAP = int(os.getenv('INCREMENTAL_SYNC_OVERLAP', 60 * 1000))  # 水位回退时间（毫秒），容忍服务端时钟偏差和同一时刻的并发写入
@@ -2,10 +2,9 @@ import os
 import sys
 import logging
 from dotenv import load_dotenv
-from typing import List, Dict, Any
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from utils.redis_client import RedisClient
 from config import TOKEN_CACHE_KEY, USER_ID_CACHE_KEY
-import json
 from datetime import datetime
 import shutil
 import re
@@ -19,6 +18,9 @@ from services.fxk_service import FxkService
 from services.custom_object_data_filter_service import CustomObjectDataFilterService
 from utils.fxk_api_client import FxkApiClient
 from services.report_generation_service import ReportGenerationService
+from services.snapshot_store import SnapshotStore, DATASET_RESULTS
+from services.data_analysis_service import OfflineBugAggregator
+from services.group_by_planner import GroupByPlanner
 
 # 配置日志
 logging.basicConfig(
@@ -54,12 +56,77 @@ def setup_logging():
     
     logger.info(f"日志文件已创建: {log_file}")
 
-def fetch_multiple_objects_data(mobile: str, version: str) -> Dict[str, Dict]:
+def parse_gray_release_window(release_plan: Dict[str, Any]) -> Optional[Tuple[int, int]]:
+    """从object_tL7xk__c的发布计划中解析灰度开始时间和全网发布时间
+    
+    Args:
+        release_plan: object_tL7xk__c对象数据
+        
+    Returns:
+        Optional[Tuple[int, int]]: (灰度开始, 全网发布) 毫秒时间戳，任一时间解析失败时返回None
+    """
+    gray_start_timestamp = None
+    full_release_timestamp = None
+    
+    if release_plan and "dataList" in release_plan and release_plan["dataList"]:
+        schedule_text = release_plan["dataList"][0].get("field_eX1fb__c", "")
+        if schedule_text:
+            # 将文本按行分割并清理每行的空白字符
+            lines = [line.strip() for line in schedule_text.split('\n')]
+            
+            # 解析灰度开始时间（第一次灰度发布时间）
+            for line in lines:
+                gray_start_match = re.search(r"(\d{4}\.\d{2}\.\d{2})日[夜晚]?\s*灰度", line)
+                if gray_start_match:
+                    gray_start_str = gray_start_match.group(1)
+                    gray_start = datetime.strptime(gray_start_str, "%Y.%m.%d")
+                    # 转换为毫秒时间戳
+                    gray_start_timestamp = int(gray_start.timestamp() * 1000)
+                    break
+            
+            # 解析全网发布时间
+            for line in lines:
+                full_release_match = re.search(r"(\d{4}\.\d{2}\.\d{2})日\s*(?:24:00)?\s*全网发布", line)
+                if full_release_match:
+                    full_release_str = full_release_match.group(1)
+                    full_release = datetime.strptime(full_release_str, "%Y.%m.%d")
+                    # 转换为毫秒时间戳
+                    full_release_timestamp = int(full_release.timestamp() * 1000)
+                    break
+    
+    if gray_start_timestamp is None or full_release_timestamp is None:
+        return None
+    return gray_start_timestamp, full_release_timestamp
+
+def resolve_gray_release_window(config: Dict[str, Any], dependencies: Dict[str, Dict]) -> Dict[str, Any]:
+    """object_y31e4__c的配置补全：加入从object_tL7xk__c解析出的灰度发布时间过滤条件"""
+    window = parse_gray_release_window(dependencies.get("object_tL7xk__c"))
+    if window is None:
+        logger.warning("未能解析灰度发布时间，object_y31e4__c不按创建时间过滤")
+        return config
+    
+    # 复制过滤条件，不修改原配置
+    return {
+        **config,
+        "filters": config["filters"] + [{
+            "field_name": "create_time",
+            "field_values": list(window),
+            "operator": "BETWEEN",
+            "filterGroup": "1"
+        }]
+    }
+
+def fetch_multiple_objects_data(mobile: str, version: str, incremental: bool = False,
+                                offline_bug_consumers: Optional[List[Callable]] = None,
+                                include_offline_bugs: bool = True) -> Dict[str, Dict]:
     """获取多个对象的数据
     
     Args:
         mobile: 手机号
         version: 版本号
+        incremental: 是否基于本地快照增量同步
+        offline_bug_consumers: 可选，offline_bug__c的页消费者，提供时该对象逐页流式处理，结果中不含记录
+        include_offline_bugs: 是否获取offline_bug__c，为False时结果中不含该对象
         
     Returns:
         Dict[str, Dict]: 对象数据字典
@@ -128,49 +195,14 @@ def fetch_multiple_objects_data(mobile: str, version: str) -> Dict[str, Dict]:
                     "is_asc": False
                 }
             ],
-            "limit": 100
+            "limit": 100,
+            # 记录最多的对象：增量同步需要全量获取时按创建时间分区并行获取，避免深分页；
+            # 逐页交给消费者流式处理时需要按页序读取，仍按偏移量分页
+            "pagination": "partition",
+            "consumers": offline_bug_consumers
         }
     ]
     
-    # 先获取object_tL7xk__c对象数据，用于解析灰度发布时间
-    tL7xk_config = object_configs[0]
-    tL7xk_data = data_service.fetch_object_data(
-        object_api_name=tL7xk_config["object_api_name"],
-        filters=tL7xk_config.get("filters", []),
-        orders=tL7xk_config.get("orders", []),
-        limit=tL7xk_config.get("limit", 100)
-    )
-    
-    # 解析灰度发布时间
-    gray_start_timestamp = None
-    full_release_timestamp = None
-    
-    if tL7xk_data and "dataList" in tL7xk_data and tL7xk_data["dataList"]:
-        schedule_text = tL7xk_data["dataList"][0].get("field_eX1fb__c", "")
-        if schedule_text:
-            # 将文本按行分割并清理每行的空白字符
-            lines = [line.strip() for line in schedule_text.split('\n')]
-            
-            # 解析灰度开始时间（第一次灰度发布时间）
-            for line in lines:
-                gray_start_match = re.search(r"(\d{4}\.\d{2}\.\d{2})日[夜晚]?\s*灰度", line)
-                if gray_start_match:
-                    gray_start_str = gray_start_match.group(1)
-                    gray_start = datetime.strptime(gray_start_str, "%Y.%m.%d")
-                    # 转换为毫秒时间戳
-                    gray_start_timestamp = int(gray_start.timestamp() * 1000)
-                    break
-            
-            # 解析全网发布时间
-            for line in lines:
-                full_release_match = re.search(r"(\d{4}\.\d{2}\.\d{2})日\s*(?:24:00)?\s*全网发布", line)
-                if full_release_match:
-                    full_release_str = full_release_match.group(1)
-                    full_release = datetime.strptime(full_release_str, "%Y.%m.%d")
-                    # 转换为毫秒时间戳
-                    full_release_timestamp = int(full_release.timestamp() * 1000)
-                    break
-    
     # 添加object_y31e4__c对象配置
     y31e4_config = {
         "object_api_name": "object_y31e4__c",
@@ -200,18 +232,14 @@ def fetch_multiple_objects_data(mobile: str, version: str) -> Dict[str, Dict]:
                 "is_asc": False
             }
         ],
-        "limit": 100
+        "limit": 100,
+        # 报告只需要灰度期间的bug数，不下载记录
+        "mode": "count",
+        # 灰度发布时间从object_tL7xk__c中解析，其余对象不必等待
+        "depends_on": ["object_tL7xk__c"],
+        "resolve": resolve_gray_release_window
     }
     
-    # 如果成功解析了灰度发布时间，添加到查询条件中
-    if gray_start_timestamp is not None and full_release_timestamp is not None:
-        y31e4_config["filters"].append({
-            "field_name": "create_time",
-            "field_values": [gray_start_timestamp, full_release_timestamp],
-            "operator": "BETWEEN",
-            "filterGroup": "1"
-        })
-    
     # 将object_y31e4__c配置添加到对象配置列表中
     object_configs.append(y31e4_config)
     
@@ -255,8 +283,11 @@ def fetch_multiple_objects_data(mobile: str, version: str) -> Dict[str, Dict]:
         }
     ])
     
+    if not include_offline_bugs:
+        object_configs = [config for config in object_configs if config["object_api_name"] != "offline_bug__c"]
+    
     # 获取所有对象的数据
-    return data_service.fetch_multiple_objects_data(object_configs)
+    return data_service.fetch_multiple_objects_data(object_configs, version=version, incremental=incremental)
 
 def filter_object_data(raw_results: Dict[str, Dict]) -> Dict[str, Dict]:
     """过滤对象数据，只保留指定字段
@@ -278,59 +309,112 @@ def filter_object_data(raw_results: Dict[str, Dict]) -> Dict[str, Dict]:
     return filtered_results
 
 def save_results_to_file(results: Dict[str, Dict], version: str) -> str:
-    """将查询结果保存到文件
+    """将查询结果保存到本地快照库
+    
+    每个对象按版本整体替换，同一版本重复运行只保留最新结果，不同版本共存；
+    之后可通过SnapshotStore按维度查询或用load_version重新读取整个版本。
     
     Args:
         results: 查询结果
         version: 版本号
         
     Returns:
-        str: 保存的文件路径
+        str: 快照库文件路径
     """
-    # 创建输出目录
-    output_dir = "output"
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    store = SnapshotStore(dataset=DATASET_RESULTS)
+    for object_api_name, data in results.items():
+        store.save(object_api_name, version, {"records": data.get("dataList", [])})
     
-    # 生成文件名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"object_data_{version}_{timestamp}.json"
-    filepath = os.path.join(output_dir, filename)
+    logger.info(f"数据已保存到快照库: {store.path}（版本 {version}，{len(results)} 个对象）")
+    return store.path
+
+def rerender_report_from_snapshot(version: str, report_service: ReportGenerationService) -> str:
+    """用快照库中已保存的过滤结果重新生成报告，不请求接口
     
-    # 保存数据到文件
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    offline_bug__c不整体读入内存，由OfflineBugAggregator.add_snapshot按索引列分组统计。
     
-    logger.info(f"数据已保存到文件: {filepath}")
-    return filepath
+    Args:
+        version: 版本号
+        report_service: 报告生成服务
+        
+    Returns:
+        str: 报告文件路径
+        
+    Raises:
+        ValueError: 快照库中没有该版本的结果
+    """
+    store = SnapshotStore(dataset=DATASET_RESULTS)
+    if version not in store.versions("offline_bug__c"):
+        raise ValueError(f"快照库中没有版本 {version} 的结果，已有版本: {store.versions()}")
+    
+    filtered_data = store.load_version(version, exclude=["offline_bug__c"])
+    bug_aggregator = OfflineBugAggregator()
+    bug_aggregator.add_snapshot(store, version)
+    return report_service.generate_and_save_report(filtered_data, version, bug_aggregator.result())
+
+def generate_severity_only_report(mobile: str, version: str, incremental: bool,
+                                  filter_service: CustomObjectDataFilterService,
+                                  report_service: ReportGenerationService) -> str:
+    """不下载offline_bug__c记录生成报告，Bug严重程度统计由GroupByPlanner按版本查询
+    
+    团队平台统计和开发质量统计需要逐条记录，报告中为空。
+    
+    Args:
+        mobile: 手机号
+        version: 版本号
+        incremental: 是否基于本地快照增量同步
+        filter_service: 数据过滤服务
+        report_service: 报告生成服务
+        
+    Returns:
+        str: 报告文件路径
+    """
+    logger.info("开始获取数据（不含offline_bug__c）...")
+    raw_data = fetch_multiple_objects_data(mobile, version, incremental, include_offline_bugs=False)
+    filtered_data = filter_service.filter_object_data(raw_data)
+    
+    fxk_service = FxkService()
+    custom_object_service = CustomObjectService(fxk_service=fxk_service, api_client=FxkApiClient())
+    custom_object_service.set_corp_access_token(fxk_service.get_corp_access_token())
+    planner = GroupByPlanner(custom_object_service, mobile)
+    
+    logger.info("开始生成分析报告...")
+    return report_service.generate_and_save_report(filtered_data, version, bug_planner=planner)
 
 def main():
     """主函数"""
     # 设置日志
     setup_logging()
     
-    # 清理并重新创建日志和输出目录
+    # 清理并重新创建日志目录，输出目录中保存着增量同步的快照，不再清理
     if os.path.exists("logs"):
         shutil.rmtree("logs")
-    if os.path.exists("output"):
-        shutil.rmtree("output")
     os.makedirs("logs")
-    os.makedirs("output")
-    logger.info("已清理并重新创建日志和输出目录")
+    os.makedirs("output", exist_ok=True)
+    logger.info("已清理并重新创建日志目录")
     
     try:
         # 检查是否提供了版本号参数
-        if len(sys.argv) < 2:
+        args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+        if not args:
             logger.error("未提供版本号参数")
             return
             
-        # 获取版本号
-        version = sys.argv[1]
-        logger.info(f"使用版本号: {version}")
+        # 获取版本号，--incremental 表示基于上次的快照增量同步
+        version = args[0]
+        incremental = "--incremental" in sys.argv[1:]
         
         # 加载环境变量
         load_dotenv()
         
+        # --from-snapshot 表示用快照库中已保存的结果重新生成报告，不获取数据
+        if "--from-snapshot" in sys.argv[1:]:
+            logger.info(f"使用版本号: {version}，从快照库重新生成报告")
+            report_file = rerender_report_from_snapshot(version, ReportGenerationService())
+            logger.info(f"分析报告已保存到：{report_file}")
+            return
+        logger.info(f"使用版本号: {version}，{'增量' if incremental else '全量'}同步")
+        
         # 获取测试手机号
         mobile = os.getenv("TEST_MOBILE")
         if not mobile:
@@ -342,9 +426,40 @@ def main():
         filter_service = CustomObjectDataFilterService(version=version)
         report_service = ReportGenerationService()
         
+        # --severity-only 表示只统计Bug严重程度，不下载offline_bug__c记录，
+        # 严重程度 × 状态的分组由GroupByPlanner选择分组计数或只下载分组字段
+        if "--severity-only" in sys.argv[1:]:
+            report_file = generate_severity_only_report(mobile, version, incremental, filter_service, report_service)
+            logger.info(f"分析报告已保存到：{report_file}")
+            return
+        
+        # offline_bug__c记录最多，逐页过滤后直接统计并写入快照库，不在内存中保留
+        bug_aggregator = OfflineBugAggregator()
+        results_store = SnapshotStore(dataset=DATASET_RESULTS)
+        
         # 获取数据
         logger.info("开始获取数据...")
-        raw_data = fetch_multiple_objects_data(mobile, version)
+        bug_writer = results_store.writer("offline_bug__c", version)
+        
+        def consume_bugs(records: List[Dict[str, Any]]):
+            filtered = filter_service.filter_records("offline_bug__c", records)
+            bug_aggregator.add(filtered)
+            bug_writer.write(filtered)
+        
+        try:
+            raw_data = fetch_multiple_objects_data(mobile, version, incremental, [consume_bugs])
+        except Exception:
+            bug_writer.abort()
+            raise
+        bug_data = raw_data.pop("offline_bug__c", {})
+        # 统计和快照都只基于完整的数据，不完整时不发布快照也不生成报告
+        if not CustomObjectDataService.is_complete(bug_data):
+            bug_writer.abort()
+            raise RuntimeError(
+                f"offline_bug__c 获取不完整（{bug_data.get('fetched', 0)}/{bug_data.get('total', 0)} 条，"
+                f"失败的页: {bug_data.get('failed_pages', [])}，错误: {bug_data.get('error')}），未生成报告"
+            )
+        bug_writer.close()
         
         # 过滤数据
         logger.info("开始过滤数据...")
@@ -357,7 +472,7 @@ def main():
         
         # 生成分析报告
         logger.info("开始生成分析报告...")
-        report_file = report_service.generate_and_save_report(filtered_data, version)
+        report_file = report_service.generate_and_save_report(filtered_data, version, bug_aggregator.result())
         logger.info(f"分析报告已保存到：{report_file}")
         
         logger.info("数据处理和分析完成")
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import weakref
+from typing import Dict, Any, List, Optional
+from utils.async_fxk_api_client import AsyncFxkApiClient
+from utils.credential_manager import AsyncCredentialManager
+from utils.query_cache import AsyncQueryPageCache
+from utils.retry_policy import RetryPolicy, TokenError, UserNotFoundError
+from services.employee_directory_service import EmployeeDirectoryService
+from config import TOKEN_EXPIRE_TIME
+
+logger = logging.getLogger(__name__)
+
+class AsyncFxkService:
+    """纷享销客服务的异步版本
+
+    令牌、企业ID、用户ID和查询分页的缓存均通过redis.asyncio访问，可在FastAPI等事件循环中直接调用，
+    与FxkService、CustomObjectService共用相同的缓存键。
+    """
+
+    def __init__(self, api_client: Optional[AsyncFxkApiClient] = None):
+        self.api_client = api_client or AsyncFxkApiClient()
+        self.credentials = AsyncCredentialManager()
+        self.query_cache = AsyncQueryPageCache()
+        self.directory = EmployeeDirectoryService()
+        self.retry_policy = RetryPolicy()
+        self._token_lock = None
+        # 锁只在有协程等待或持有时存在，请求结束后随之回收
+        self._user_id_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        self._lock_loop = None
+
+    def _ensure_locks(self):
+        """锁绑定在首次使用它的事件循环上，事件循环切换后重新创建令牌锁和用户ID锁"""
+        loop = asyncio.get_running_loop()
+        if self._token_lock is None or self._lock_loop is not loop:
+            self._token_lock = asyncio.Lock()
+            self._user_id_locks = weakref.WeakValueDictionary()
+            self._lock_loop = loop
+
+    async def get_corp_access_token(self, force_refresh: bool = False) -> str:
+        """获取企业访问令牌，优先从缓存中获取，并发协程只请求一次
+
+        Args:
+            force_refresh: 是否强制刷新令牌，不使用缓存
+
+        Returns:
+            str: 企业访问令牌
+
+        Raises:
+            Exception: 当获取令牌失败时抛出异常
+        """
+        if not force_refresh:
+            token = await self.credentials.get_corp_access_token()
+            if token:
+                return token
+
+        self._ensure_locks()
+        async with self._token_lock:
+            # 等待锁期间其他协程可能已经获取了新令牌
+            if not force_refresh:
+                token = await self.credentials.get_corp_access_token()
+                if token:
+                    return token
+
+            logger.info("正在获取新的企业访问令牌")
+            response = await self.api_client.get_corp_access_token()
+            token = response.get_data('corpAccessToken') if response.is_success() else None
+            if not token:
+                raise TokenError(f"获取企业访问令牌失败: {response.code} {response.message}")
+
+            expires_in = int(response.get_data('expiresIn') or TOKEN_EXPIRE_TIME)
+            await self.credentials.set_corp_access_token(token, expires_in)
+            corp_id = response.get_data('corpId')
+            if corp_id:
+                await self.credentials.set_corp_id(corp_id)
+            logger.info(f"已获取新的企业访问令牌并存入缓存，有效期 {expires_in} 秒")
+            return token
+
+    async def get_corp_id(self) -> str:
+        """获取企业ID，优先从缓存中获取"""
+        corp_id = await self.credentials.get_corp_id()
+        if corp_id:
+            return corp_id
+        corp_id = await self.api_client.get_corp_id()
+        await self.credentials.set_corp_id(corp_id)
+        return corp_id
+
+    async def get_user_id_by_mobile(self, mobile: str) -> str:
+        """根据手机号获取用户ID，优先从缓存中获取，相同手机号的并发协程只请求一次
+
+        Args:
+            mobile: 手机号
+
+        Returns:
+            str: 用户ID
+
+        Raises:
+            Exception: 当获取用户ID失败时抛出异常
+        """
+        # 本地通讯录为SQLite文件，在线程中查询以免阻塞事件循环
+        user_id = await asyncio.to_thread(self.directory.get_open_user_id, mobile)
+        if user_id:
+            return user_id
+
+        user_id = await self.credentials.get_user_id(mobile)
+        if user_id:
+            return user_id
+
+        self._ensure_locks()
+        lock = self._user_id_locks.get(mobile)
+        if lock is None:
+            lock = self._user_id_locks[mobile] = asyncio.Lock()
+        async with lock:
+            user_id = await self.credentials.get_user_id(mobile)
+            if user_id:
+                return user_id
+
+            token = await self.get_corp_access_token()
+            response = await self.api_client.get_user_id_by_mobile(token, mobile, await self.get_corp_id())
+            if not response.is_success():
+                raise Exception(f"获取用户ID失败: {response.message}")
+            emp_list = response.data.get('empList') or []
+            if not emp_list:
+                raise UserNotFoundError(f"未找到手机号为 {mobile} 的用户")
+            user_id = emp_list[0]['openUserId']
+            await self.credentials.set_user_id(mobile, user_id)
+            await asyncio.to_thread(self.directory.upsert, user_id, mobile)
+            logger.info(f"已获取手机号 {mobile} 的用户ID并存入缓存")
+            return user_id
+
+    async def query_custom_objects(self,
+                                   data_object_api_name: str,
+                                   mobile: str,
+                                   limit: int = 100,
+                                   offset: int = 0,
+                                   filters: Optional[List[Dict[str, Any]]] = None,
+                                   orders: Optional[List[Dict[str, Any]]] = None,
+                                   find_explicit_total_num: str = "true",
+                                   fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """查询自定义对象数据，参数和返回值与CustomObjectService.query_custom_objects一致
+
+        命中查询缓存时直接返回；重试由与同步服务共用预算的重试策略处理，令牌过期时清除失效令牌后立即重试，
+        请求经AsyncHttpClient受对应接口的限流器约束。
+        """
+        corp_id = await self.get_corp_id()
+        user_id = await self.get_user_id_by_mobile(mobile)
+        query = {
+            "limit": limit,
+            "offset": offset,
+            "filters": filters,
+            "orders": orders,
+            "find_explicit_total_num": find_explicit_total_num,
+            "fields": fields
+        }
+        cache_key = None
+        if self.query_cache.ttl_for(data_object_api_name) > 0:
+            cache_key = self.query_cache.make_key(corp_id, user_id, data_object_api_name, query)
+            cached_data = await self.query_cache.get(cache_key)
+            if cached_data is not None:
+                return cached_data
+
+        search_query_info = {"limit": limit, "offset": offset}
+        if filters:
+            search_query_info["filters"] = filters
+        if orders:
+            search_query_info["orders"] = orders
+
+        token_state = {"token": None}
+
+        async def refresh_token():
+            await self.credentials.invalidate_corp_access_token(token_state["token"])
+
+        async def send_query():
+            token_state["token"] = await self.get_corp_access_token()
+            return await self.api_client.query_custom_object(
+                corp_access_token=token_state["token"],
+                current_open_user_id=user_id,
+                data_object_api_name=data_object_api_name,
+                search_query_info=search_query_info,
+                find_explicit_total_num=find_explicit_total_num,
+                corp_id=corp_id,
+                fields=fields
+            )
+
+        response = await self.retry_policy.call_async(
+            send_query, name=f"查询对象 {data_object_api_name}", on_refresh_token=refresh_token
+        )
+        if not response.is_success():
+            logger.error(f"获取对象 {data_object_api_name} 数据失败: {response.code} {response.message}")
+            return {"dataList": [], "total": 0}
+        if cache_key:
+            await self.query_cache.set(cache_key, data_object_api_name, response.data)
+        return response.data
+
+    async def close(self):
+        """关闭底层HTTP会话"""
+        await self.api_client.close()
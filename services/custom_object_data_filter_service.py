@@ -77,6 +77,28 @@ class CustomObjectDataFilterService:
             
         return filtered_data
     
+    def filter_records(self, object_api_name: str, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """过滤单个对象的一页记录，字段规则与filter_object_data相同，用于逐页处理
+        
+        Args:
+            object_api_name: 对象API名称
+            records: 一页原始记录
+            
+        Returns:
+            List[Dict[str, Any]]: 过滤后的记录，没有过滤规则的对象原样返回
+        """
+        filters = {
+            "object_notes__c": self._filter_product_release_notes,
+            "object_tL7xk__c": self._filter_product_release_plan,
+            "offline_bug__c": self._filter_offline_bug,
+            "object_xkBG2__c": self._filter_business_module,
+            "object_0yrBp__c": self._filter_development_iteration
+        }
+        filter_func = filters.get(object_api_name)
+        if filter_func is None:
+            return records
+        return filter_func({"dataList": records})["dataList"]
+    
     def _filter_product_release_notes(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """过滤产品发布清单数据
         
@@ -1,18 +1,23 @@
 import os
 import json
+import sqlite3
 import logging
 import threading
 from logging.handlers import RotatingFileHandler
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Iterator, List, Optional
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from services.interfaces import ICustomObjectService
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from services.interfaces import ICustomObjectService, ALL_RECORDS_FILTER, COUNT_ORDERS
 from services.custom_object_service import CustomObjectService
 from services.fxk_service import FxkService
 from services.enterprise_auth_service import EnterpriseAuthService
 from utils.fxk_api_client import FxkApiClient
-from utils.redis_client import RedisClient
-from config import TOKEN_CACHE_KEY
+from utils.retry_policy import RetryBudget
+from utils.credential_manager import CredentialManager
+from utils.work_scheduler import get_work_scheduler
+from utils.query_cache import QueryPageCache
+from services.snapshot_store import SnapshotStore
+from config import FETCH_PAGE_CONCURRENCY, INCREMENTAL_SYNC_OVERLAP, PARTITION_MAX_RECORDS
 
 # 配置日志
 # 创建日志目录
@@ -50,6 +55,24 @@ logger.addHandler(console_handler)
 
 logger.info(f"日志文件已创建: {log_file}")
 
+# 分页方式
+PAGINATION_OFFSET = "offset"
+PAGINATION_KEYSET = "keyset"
+PAGINATION_PARTITION = "partition"
+
+# 对象的获取模式：记录或只取总数
+MODE_ROWS = "rows"
+MODE_COUNT = "count"
+
+# 游标分页使用的排序字段
+KEYSET_FIELD = "create_time"
+
+# 增量同步使用的水位字段
+WATERMARK_FIELD = "last_modified_time"
+
+# 第一页决定对象的总记录数，优先于所有其余页获取
+FIRST_PAGE_PRIORITY = float("inf")
+
 class CustomObjectDataService:
     """自定义对象数据服务"""
     
@@ -61,6 +84,7 @@ class CustomObjectDataService:
             custom_object_service: 自定义对象服务实例，可选
         """
         self.mobile = mobile
+        self.snapshot_store = SnapshotStore()
         
         # 创建或使用提供的自定义对象服务
         if custom_object_service is None:
@@ -69,113 +93,772 @@ class CustomObjectDataService:
             api_client = FxkApiClient()
             self.custom_object_service = CustomObjectService(fxk_service=fxk_service, api_client=api_client)
             
-            # 检查Redis中是否有企业访问令牌缓存
-            redis_client = RedisClient()
-            cached_token = redis_client.get(TOKEN_CACHE_KEY)
-            if cached_token:
-                logger.info("从Redis缓存中获取企业访问令牌")
-                self.custom_object_service.set_corp_access_token(cached_token)
-            else:
-                # 预先获取企业访问令牌
-                corp_access_token = fxk_service.get_corp_access_token()
-                logger.info("已预先获取企业访问令牌")
-                self.custom_object_service.set_corp_access_token(corp_access_token)
+            # 预先获取企业访问令牌，缓存中已有时直接使用
+            corp_access_token = fxk_service.get_corp_access_token()
+            logger.info("已预先获取企业访问令牌")
+            self.custom_object_service.set_corp_access_token(corp_access_token)
+            
+            # 在令牌过期前后台刷新，请求路径上不再同步获取令牌
+            fxk_service.start_token_refresher()
+            # 员工通讯录后台同步，用户ID直接从本地查询
+            fxk_service.start_directory_sync()
         else:
             self.custom_object_service = custom_object_service
             
+    def _fetch_page(self,
+                    service: ICustomObjectService,
+                    object_api_name: str,
+                    filters: Optional[List[Dict[str, Any]]],
+                    orders: Optional[List[Dict[str, Any]]],
+                    limit: int,
+                    offset: int,
+                    find_explicit_total_num: str,
+                    fields: Optional[List[str]] = None,
+                    use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """获取指定对象的一页数据
+        
+        Args:
+            service: 自定义对象服务实例
+            object_api_name: 对象API名称
+            filters: 过滤条件列表
+            orders: 排序条件列表
+            limit: 每页记录数
+            offset: 偏移量
+            find_explicit_total_num: 是否返回总数
+            fields: 需要保留的记录字段，可选
+            use_cache: 是否使用查询缓存
+            
+        Returns:
+            Optional[Dict[str, Any]]: 包含dataList和total的页数据，获取失败时返回None
+        """
+        # 重试（包括令牌过期后的刷新）统一由CustomObjectService的重试策略处理
+        try:
+            # 获取对象数据
+            logger.info(f"获取对象 {object_api_name} 的第 {offset//limit + 1} 页数据")
+            response_data = service.query_custom_objects(
+                data_object_api_name=object_api_name,
+                mobile=self.mobile,
+                limit=limit,
+                offset=offset,
+                filters=filters,
+                orders=orders,
+                find_explicit_total_num=find_explicit_total_num,
+                fields=fields,
+                use_cache=use_cache
+            )
+            
+            return self._parse_page(object_api_name, response_data)
+        except Exception as e:
+            logger.error(f"获取对象 {object_api_name} 数据时发生错误: {str(e)}")
+            return None
+    
+    def _schedule_page(self,
+                       service: ICustomObjectService,
+                       object_api_name: str,
+                       filters: Optional[List[Dict[str, Any]]],
+                       orders: Optional[List[Dict[str, Any]]],
+                       limit: int,
+                       offset: int,
+                       find_explicit_total_num: str,
+                       fields: Optional[List[str]],
+                       use_cache: bool,
+                       priority: float) -> Future:
+        """将一页的获取提交给全局调度器，参数同_fetch_page
+        
+        Args:
+            priority: 调度优先级，剩余各页使用对象的总记录数，记录多的对象先获取
+            
+        Returns:
+            Future: 结果同_fetch_page
+        """
+        return get_work_scheduler().submit(
+            self._fetch_page, service, object_api_name, filters, orders, limit, offset,
+            find_explicit_total_num, fields, use_cache, priority=priority
+        )
+    
+    @staticmethod
+    def _parse_page(object_api_name: str, response_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """从查询结果中取出dataList和total，格式不正确时返回None"""
+        # 确保返回正确的数据结构
+        if "data" in response_data:
+            data = response_data["data"]
+            return {
+                "dataList": data.get("dataList", []),
+                "total": data.get("total", 0)
+            }
+        
+        logger.warning(f"对象 {object_api_name} 返回的数据格式不正确: {response_data}")
+        return None
+    
     def fetch_object_data(self, 
                          object_api_name: str, 
                          filters: Optional[List[Dict[str, Any]]] = None,
                          orders: Optional[List[Dict[str, Any]]] = None,
                          limit: int = 100,
-                         custom_object_service: Optional[ICustomObjectService] = None) -> Dict[str, Any]:
+                         custom_object_service: Optional[ICustomObjectService] = None,
+                         fields: Optional[List[str]] = None,
+                         pagination: str = PAGINATION_OFFSET,
+                         use_cache: bool = True) -> Dict[str, Any]:
         """获取指定对象的数据
         
+        偏移量分页时先获取第一页以得到总记录数，再按偏移量并发获取剩余各页，最后按页序拼接；
+        游标分页时按创建时间顺序逐页获取，见_fetch_object_data_keyset；
+        分区分页时按创建时间切分为多个区间并行获取，见_fetch_object_data_partitioned。
+        
         Args:
             object_api_name: 对象API名称
             filters: 过滤条件列表
-            orders: 排序条件列表
+            orders: 排序条件列表，游标分页时忽略
             limit: 每页记录数
             custom_object_service: 自定义对象服务实例，可选
+            fields: 需要返回的记录字段，可选，提供时下推到服务端，每页只返回这些字段
+            pagination: 分页方式，PAGINATION_OFFSET（偏移量）、PAGINATION_KEYSET（游标）或PAGINATION_PARTITION（按时间分区）
+            use_cache: 是否使用查询缓存，需要读到最新数据时为False
             
         Returns:
-            Dict[str, Any]: 对象数据
+            Dict[str, Any]: 对象数据，包含dataList、total和failed_pages（获取失败的页的偏移量），
+                failed_pages非空时结果不完整
         """
         # 使用传入的服务实例或默认实例
         service = custom_object_service or self.custom_object_service
         
-        all_data = []
-        offset = 0
+        if pagination == PAGINATION_KEYSET:
+            return self._fetch_object_data_keyset(service, object_api_name, filters, limit, fields, use_cache)
+        if pagination == PAGINATION_PARTITION:
+            return self._fetch_object_data_partitioned(service, object_api_name, filters, orders, limit, fields, use_cache)
+        
+        # 只有第一页需要服务端返回总数
+        first_page = self._schedule_page(
+            service, object_api_name, filters, orders, limit, 0, "true", fields, use_cache, FIRST_PAGE_PRIORITY
+        ).result()
+        if first_page is None:
+            logger.error(f"对象 {object_api_name} 第一页获取失败，无法得到总记录数")
+            return {
+                "dataList": [],
+                "total": 0,
+                "failed_pages": [0]
+            }
+        
+        all_data = list(first_page["dataList"])
+        total = first_page["total"]
+        logger.info(f"对象 {object_api_name} 共有 {total} 条记录")
+        
+        # 第一页已获取全部数据或没有更多数据
+        if len(all_data) >= total or len(all_data) < limit:
+            logger.info(f"对象 {object_api_name} 当前已获取 {len(all_data)}/{total} 条记录")
+            return {
+                "dataList": all_data,
+                "total": total,
+                "failed_pages": []
+            }
+        
+        # 剩余各页先一次往返从缓存中批量读取，只请求未命中的分页
+        offsets = list(range(limit, total, limit))
+        cached_pages = service.get_cached_pages(
+            object_api_name, self.mobile, offsets, limit, filters, orders, "false", fields
+        ) if use_cache else {}
+        pages = {
+            page_offset: self._parse_page(object_api_name, cached)
+            for page_offset, cached in cached_pages.items()
+        }
+        missing_offsets = [page_offset for page_offset in offsets if pages.get(page_offset) is None]
+        if len(missing_offsets) < len(offsets):
+            logger.info(f"对象 {object_api_name} 剩余 {len(offsets)} 页中 {len(offsets) - len(missing_offsets)} 页命中缓存")
+        
+        # 未命中的各页交给全局调度器，按总记录数排优先级，与其他对象的页共享并发预算
+        if missing_offsets:
+            logger.info(f"对象 {object_api_name} 需请求 {len(missing_offsets)} 页")
+            futures = {
+                page_offset: self._schedule_page(
+                    service, object_api_name, filters, orders, limit, page_offset, "false", fields, use_cache, total
+                )
+                for page_offset in missing_offsets
+            }
+            pages.update((page_offset, future.result()) for page_offset, future in futures.items())
+        
+        failed_pages = []
+        for page_offset in offsets:
+            page = pages.get(page_offset)
+            if page is None:
+                failed_pages.append(page_offset)
+                continue
+            all_data.extend(page["dataList"])
+        if failed_pages:
+            logger.error(f"对象 {object_api_name} 有 {len(failed_pages)} 页获取失败，结果不完整，偏移量: {failed_pages}")
+        
+        logger.info(f"对象 {object_api_name} 当前已获取 {len(all_data)}/{total} 条记录")
+        return {
+            "dataList": all_data,
+            "total": total,
+            "failed_pages": failed_pages
+        }
+            
+    def count_object_data(self,
+                          object_api_name: str,
+                          filters: Optional[List[Dict[str, Any]]] = None,
+                          custom_object_service: Optional[ICustomObjectService] = None,
+                          use_cache: bool = True) -> Dict[str, Any]:
+        """只获取满足条件的记录总数
+        
+        Args:
+            object_api_name: 对象API名称
+            filters: 过滤条件列表
+            custom_object_service: 自定义对象服务实例，可选
+            use_cache: 是否使用查询缓存
+            
+        Returns:
+            Dict[str, Any]: {dataList: [], total, count_only: True}，查询失败时total为0并带有error，
+                is_complete返回False
+        """
+        service = custom_object_service or self.custom_object_service
+        try:
+            total = service.count_custom_objects(object_api_name, self.mobile, filters, use_cache)
+        except Exception as e:
+            logger.error(f"获取对象 {object_api_name} 的记录数时发生错误: {str(e)}")
+            total = None
+        if total is None:
+            logger.error(f"对象 {object_api_name} 的记录数获取失败")
+            return {
+                "dataList": [],
+                "total": 0,
+                "count_only": True,
+                "error": "记录数获取失败"
+            }
+        logger.info(f"对象 {object_api_name} 共有 {total} 条记录（只计数）")
+        return {
+            "dataList": [],
+            "total": total,
+            "count_only": True
+        }
+    
+    def iter_object_pages(self,
+                          object_api_name: str,
+                          filters: Optional[List[Dict[str, Any]]] = None,
+                          orders: Optional[List[Dict[str, Any]]] = None,
+                          limit: int = 100,
+                          custom_object_service: Optional[ICustomObjectService] = None,
+                          fields: Optional[List[str]] = None,
+                          use_cache: bool = True,
+                          failed_pages: Optional[List[int]] = None) -> Iterator[Dict[str, Any]]:
+        """按页序逐页产出对象数据，不在内存中累积全部记录
+        
+        先获取第一页得到总记录数，剩余各页按偏移量并发获取，但同时在途的页数不超过FETCH_PAGE_CONCURRENCY，
+        调用方处理完一页后才提交下一页，占用的内存与总记录数无关。各页由全局调度器执行，获取失败的页记录日志后跳过。
+        
+        Args:
+            object_api_name: 对象API名称
+            filters: 过滤条件列表
+            orders: 排序条件列表
+            limit: 每页记录数
+            custom_object_service: 自定义对象服务实例，可选
+            fields: 需要返回的记录字段，可选
+            use_cache: 是否使用查询缓存
+            failed_pages: 可选，获取失败的页的偏移量追加到此列表，第一页失败时为[0]
+            
+        Yields:
+            Dict[str, Any]: 页数据，包含dataList和total
+        """
+        service = custom_object_service or self.custom_object_service
+        
+        first_page = self._schedule_page(
+            service, object_api_name, filters, orders, limit, 0, "true", fields, use_cache, FIRST_PAGE_PRIORITY
+        ).result()
+        if first_page is None:
+            if failed_pages is not None:
+                failed_pages.append(0)
+            return
+        total = first_page["total"]
+        logger.info(f"对象 {object_api_name} 共有 {total} 条记录（流式获取）")
+        yield first_page
+        if len(first_page["dataList"]) >= total or len(first_page["dataList"]) < limit:
+            return
+        
+        offsets = iter(range(limit, total, limit))
+        
+        def submit(page_offset):
+            return page_offset, self._schedule_page(
+                service, object_api_name, filters, orders, limit, page_offset, "false", fields, use_cache, total
+            )
+        
+        in_flight = [submit(page_offset) for _, page_offset in zip(range(FETCH_PAGE_CONCURRENCY), offsets)]
+        while in_flight:
+            page_offset, future = in_flight.pop(0)
+            page = future.result()
+            next_offset = next(offsets, None)
+            if next_offset is not None:
+                in_flight.append(submit(next_offset))
+            if page is None:
+                logger.error(f"对象 {object_api_name} 偏移量 {page_offset} 的数据获取失败，已跳过")
+                if failed_pages is not None:
+                    failed_pages.append(page_offset)
+                continue
+            page["total"] = total
+            yield page
+    
+    def stream_object_data(self,
+                           object_api_name: str,
+                           consumers: List[Callable[[List[Dict[str, Any]]], None]],
+                           filters: Optional[List[Dict[str, Any]]] = None,
+                           orders: Optional[List[Dict[str, Any]]] = None,
+                           limit: int = 100,
+                           custom_object_service: Optional[ICustomObjectService] = None,
+                           fields: Optional[List[str]] = None,
+                           use_cache: bool = True) -> Dict[str, Any]:
+        """逐页获取对象数据并依次交给各消费者处理，不保留记录
+        
+        Args:
+            object_api_name: 对象API名称
+            consumers: 消费者列表，每个消费者接收一页记录，按顺序调用
+            其余参数同iter_object_pages
+            
+        Returns:
+            Dict[str, Any]: {dataList: [], total, fetched, failed_pages}，dataList始终为空，
+                fetched为实际处理的记录数，failed_pages为获取失败的页的偏移量
+        """
         total = 0
-        max_retries = 2  # 最大重试次数
-        retry_count = 0
+        fetched = 0
+        failed_pages = []
+        for page in self.iter_object_pages(object_api_name, filters, orders, limit,
+                                           custom_object_service, fields, use_cache, failed_pages):
+            total = page["total"]
+            fetched += len(page["dataList"])
+            for consumer in consumers:
+                consumer(page["dataList"])
+        logger.info(f"对象 {object_api_name} 流式处理完成，共 {fetched}/{total} 条记录")
+        return {
+            "dataList": [],
+            "total": total,
+            "fetched": fetched,
+            "failed_pages": failed_pages
+        }
+    
+    @staticmethod
+    def _consume_records(object_data: Dict[str, Any],
+                         consumers: List[Callable[[List[Dict[str, Any]]], None]],
+                         limit: int) -> Dict[str, Any]:
+        """将已获取的记录（如增量同步合并后的快照）按页交给消费者，返回结构同stream_object_data"""
+        records = object_data.get("dataList", [])
+        for start in range(0, len(records), limit):
+            for consumer in consumers:
+                consumer(records[start:start + limit])
+        return {
+            "dataList": [],
+            "total": object_data.get("total", 0),
+            "fetched": len(records),
+            "failed_pages": object_data.get("failed_pages", [])
+        }
+    
+    @staticmethod
+    def is_complete(object_data: Dict[str, Any]) -> bool:
+        """对象数据是否完整：获取未出错、没有失败的页，流式处理时处理的记录数等于总数"""
+        if object_data.get("error") or object_data.get("failed_pages"):
+            return False
+        return object_data.get("fetched", object_data.get("total")) == object_data.get("total")
+    
+    def fetch_object_data_incremental(self,
+                                      object_api_name: str,
+                                      version: str,
+                                      filters: Optional[List[Dict[str, Any]]] = None,
+                                      orders: Optional[List[Dict[str, Any]]] = None,
+                                      limit: int = 100,
+                                      custom_object_service: Optional[ICustomObjectService] = None,
+                                      fields: Optional[List[str]] = None,
+                                      pagination: str = PAGINATION_OFFSET) -> Dict[str, Any]:
+        """增量获取指定对象的数据
+        
+        以本地快照中最大的last_modified_time为水位，只获取此后变更的记录并按_id合并进快照；
+        合并后的记录数与服务端总数不一致（有记录被删除或不再满足条件）时改为全量获取。
+        没有快照、查询条件已变化或服务端总数获取失败时同样全量获取，不会把旧快照当作最新数据返回。
+        
+        Args:
+            object_api_name: 对象API名称
+            version: 版本号，与对象一起作为快照的键
+            filters: 过滤条件列表
+            orders: 排序条件列表，用于合并后的记录排序
+            limit: 每页记录数
+            custom_object_service: 自定义对象服务实例，可选
+            fields: 需要返回的记录字段，可选
+            pagination: 全量获取时的分页方式
+            
+        Returns:
+            Dict[str, Any]: 对象数据，结构与fetch_object_data相同
+        """
+        service = custom_object_service or self.custom_object_service
+        # 合并按_id进行，水位取自last_modified_time，指定字段时补上这两个字段
+        if fields:
+            fields = list(dict.fromkeys(list(fields) + ["_id", WATERMARK_FIELD]))
+        fingerprint = QueryPageCache.fingerprint({"filters": filters, "fields": fields})
+        snapshot = self.snapshot_store.load(object_api_name, version)
+        
+        if snapshot is None or snapshot.get("fingerprint") != fingerprint:
+            logger.info(f"对象 {object_api_name} 版本 {version} 没有可用的快照，全量获取")
+            return self._full_sync(service, object_api_name, version, filters, orders, limit, fields, pagination, fingerprint)
+        
+        # 服务端当前的总数，用于校验合并结果；查询接口要求过滤和排序条件都不为空
+        count_page = self._schedule_page(
+            service, object_api_name, list(filters or []) or [ALL_RECORDS_FILTER], COUNT_ORDERS,
+            1, 0, "true", ["_id"], False, FIRST_PAGE_PRIORITY
+        ).result()
+        if count_page is None:
+            # 无法确认快照是否仍是最新的，不返回旧数据；全量获取也失败时结果带有failed_pages
+            logger.warning(f"对象 {object_api_name} 获取总数失败，全量获取")
+            return self._full_sync(service, object_api_name, version, filters, orders, limit, fields, pagination, fingerprint)
+        total = count_page["total"]
+        
+        # 获取水位之后变更的记录，水位回退一段时间以免漏掉同一时刻写入的记录，重复的记录按_id合并
+        watermark = snapshot.get("watermark") or 0
+        changed = self._fetch_pages_sequential(
+            service, object_api_name,
+            self._with_filter(filters, WATERMARK_FIELD, "GTE", [max(watermark - INCREMENTAL_SYNC_OVERLAP, 0)]),
+            [{"field_name": WATERMARK_FIELD, "is_asc": True}],
+            limit, fields, total
+        )
+        if changed is None:
+            logger.warning(f"对象 {object_api_name} 获取变更记录失败，全量获取")
+            return self._full_sync(service, object_api_name, version, filters, orders, limit, fields, pagination, fingerprint)
+        
+        records = {record.get("_id"): record for record in snapshot["records"]}
+        records.update((record.get("_id"), record) for record in changed)
+        if len(records) != total:
+            logger.info(f"对象 {object_api_name} 合并后 {len(records)} 条与服务端 {total} 条不一致，全量获取")
+            return self._full_sync(service, object_api_name, version, filters, orders, limit, fields, pagination, fingerprint)
         
+        data_list = self._sort_records(list(records.values()), orders)
+        self._save_snapshot(object_api_name, version, fingerprint, data_list)
+        logger.info(f"对象 {object_api_name} 增量同步完成，变更 {len(changed)} 条，共 {total} 条记录")
+        return {
+            "dataList": data_list,
+            "total": total
+        }
+    
+    def _full_sync(self, service: ICustomObjectService, object_api_name: str, version: str,
+                   filters: Optional[List[Dict[str, Any]]], orders: Optional[List[Dict[str, Any]]],
+                   limit: int, fields: Optional[List[str]], pagination: str, fingerprint: str) -> Dict[str, Any]:
+        """全量获取对象数据并重建快照"""
+        data = self.fetch_object_data(
+            object_api_name=object_api_name,
+            filters=filters,
+            orders=orders,
+            limit=limit,
+            custom_object_service=service,
+            fields=fields,
+            pagination=pagination,
+            use_cache=False
+        )
+        # 获取失败或不完整时不保存快照，避免之后的增量同步以残缺数据为基础
+        if data["dataList"] and len(data["dataList"]) == data["total"]:
+            self._save_snapshot(object_api_name, version, fingerprint, data["dataList"])
+        return data
+    
+    def _save_snapshot(self, object_api_name: str, version: str, fingerprint: str, records: List[Dict[str, Any]]):
+        try:
+            self.snapshot_store.save(object_api_name, version, {
+                "fingerprint": fingerprint,
+                "watermark": max((r.get(WATERMARK_FIELD) or 0 for r in records), default=0),
+                "records": records
+            })
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"保存对象 {object_api_name} 的快照失败: {str(e)}")
+    
+    def _fetch_pages_sequential(self, service: ICustomObjectService, object_api_name: str,
+                                filters: Optional[List[Dict[str, Any]]], orders: List[Dict[str, Any]],
+                                limit: int, fields: Optional[List[str]], priority: float) -> Optional[List[Dict[str, Any]]]:
+        """不经过查询缓存逐页获取全部记录，各页以priority提交给全局调度器，任意一页失败时返回None"""
+        records = []
+        offset = 0
         while True:
-            try:
-                # 获取对象数据
-                logger.info(f"获取对象 {object_api_name} 的第 {offset//limit + 1} 页数据")
-                response_data = service.query_custom_objects(
-                    data_object_api_name=object_api_name,
-                    mobile=self.mobile,
-                    limit=limit,
-                    offset=offset,
-                    filters=filters,
-                    orders=orders
+            page = self._schedule_page(
+                service, object_api_name, filters, orders, limit, offset, "false", fields, False, priority
+            ).result()
+            if page is None:
+                return None
+            records.extend(page["dataList"])
+            if len(page["dataList"]) < limit:
+                return records
+            offset += limit
+    
+    @staticmethod
+    def _sort_records(records: List[Dict[str, Any]], orders: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """按排序条件对记录排序，缺少排序字段的记录排在最后"""
+        records = list(records)
+        for order in reversed(orders or []):
+            field_name = order.get("field_name") or order.get("fieldName")
+            is_asc = order.get("is_asc", order.get("isAsc", True))
+            present = [r for r in records if r.get(field_name) is not None]
+            missing = [r for r in records if r.get(field_name) is None]
+            present.sort(key=lambda r: r[field_name], reverse=not is_asc)
+            records = present + missing
+        return records
+    
+    @staticmethod
+    def _with_filter(filters: Optional[List[Dict[str, Any]]], field_name: str,
+                     operator: str, field_values: List[Any]) -> List[Dict[str, Any]]:
+        """在过滤条件列表末尾追加一个条件，沿用已有条件的filterGroup"""
+        new_filter = {
+            "field_name": field_name,
+            "field_values": field_values,
+            "operator": operator
+        }
+        filters = list(filters or [])
+        filter_group = next((f["filterGroup"] for f in filters if "filterGroup" in f), None)
+        if filter_group is not None:
+            new_filter["filterGroup"] = filter_group
+        filters.append(new_filter)
+        return filters
+    
+    def _fetch_object_data_keyset(self,
+                                  service: ICustomObjectService,
+                                  object_api_name: str,
+                                  filters: Optional[List[Dict[str, Any]]],
+                                  limit: int,
+                                  fields: Optional[List[str]],
+                                  use_cache: bool = True) -> Dict[str, Any]:
+        """按游标分页获取对象数据
+        
+        按create_time升序读取，每页都从偏移量0开始，通过 create_time >= 上一页最后一条的时间 继续，
+        并跳过边界时间点上已获取的记录，使每页耗时不随翻页深度增长，也不会因新增记录而错位。
+        同一时间点的记录超过一页时，改为对该时间点按偏移量分页。
+        任意一页获取失败时停止翻页，failed_pages中记录失败时已获取的记录数。
+        各页虽然依次获取，仍提交给全局调度器执行，与其他对象共用同一份并发预算。
+        
+        Args:
+            service: 自定义对象服务实例
+            object_api_name: 对象API名称
+            filters: 过滤条件列表
+            limit: 每页记录数
+            fields: 需要保留的记录字段，可选，游标需要的create_time和_id在指定时自动补上
+            use_cache: 是否使用查询缓存
+            
+        Returns:
+            Dict[str, Any]: 对象数据，结构同fetch_object_data
+        """
+        orders = [
+            {"field_name": KEYSET_FIELD, "is_asc": True},
+            {"field_name": "_id", "is_asc": True}
+        ]
+        # 游标取自每页最后一条的create_time，边界去重依赖_id，指定字段时补上这两个字段
+        if fields:
+            fields = list(dict.fromkeys(list(fields) + [KEYSET_FIELD, "_id"]))
+        
+        first_page = self._schedule_page(
+            service, object_api_name, filters, orders, limit, 0, "true", fields, use_cache, FIRST_PAGE_PRIORITY
+        ).result()
+        if first_page is None:
+            logger.error(f"对象 {object_api_name} 第一页获取失败，无法得到总记录数")
+            return {
+                "dataList": [],
+                "total": 0,
+                "failed_pages": [0]
+            }
+        total = first_page["total"]
+        logger.info(f"对象 {object_api_name} 共有 {total} 条记录（游标分页）")
+        
+        all_data = []
+        boundary_time = None
+        boundary_ids = set()
+        page = first_page
+        while True:
+            new_records = [r for r in page["dataList"] if r.get("_id") not in boundary_ids]
+            all_data.extend(new_records)
+            logger.info(f"对象 {object_api_name} 当前已获取 {len(all_data)}/{total} 条记录")
+            
+            if len(page["dataList"]) < limit:
+                break
+            
+            last_time = page["dataList"][-1].get(KEYSET_FIELD)
+            if last_time is None:
+                logger.warning(f"对象 {object_api_name} 的记录缺少 {KEYSET_FIELD}，无法继续游标分页")
+                break
+            
+            if not new_records and last_time == boundary_time:
+                # 整页都在同一时间点且已获取过，该时间点按偏移量分页后跳到下一个时间点
+                time_point_records = self._fetch_time_point(
+                    service, object_api_name, filters, orders, limit, fields, last_time, boundary_ids, use_cache, total
                 )
-                
-                # 检查是否是令牌过期错误
-                if "errorCode" in response_data and response_data["errorCode"] == "20016":
-                    if retry_count < max_retries:
-                        retry_count += 1
-                        logger.warning(f"令牌已过期，正在进行第 {retry_count} 次重试")
-                        # 清除Redis中的令牌缓存
-                        redis_client = RedisClient()
-                        redis_client.delete(TOKEN_CACHE_KEY)
-                        # 重新获取令牌并重试
-                        continue
-                    else:
-                        logger.error(f"令牌过期重试次数已达上限 ({max_retries})")
-                        break
-                
-                # 确保返回正确的数据结构
-                if "data" in response_data:
-                    data = response_data["data"]
-                    data_list = data.get("dataList", [])
-                    current_total = data.get("total", 0)
-                    
-                    # 如果是第一次查询，设置总记录数
-                    if offset == 0:
-                        total = current_total
-                        logger.info(f"对象 {object_api_name} 共有 {total} 条记录")
-                    
-                    # 添加当前页的数据
-                    all_data.extend(data_list)
-                    logger.info(f"对象 {object_api_name} 当前已获取 {len(all_data)}/{total} 条记录")
-                    
-                    # 如果已经获取了所有数据或没有更多数据，退出循环
-                    if len(all_data) >= total or len(data_list) == 0:
-                        break
-                        
-                    # 更新偏移量
-                    offset += limit
-                else:
-                    logger.warning(f"对象 {object_api_name} 返回的数据格式不正确: {response_data}")
-                    break
-            except Exception as e:
-                if str(e) == "TOKEN_EXPIRED" and retry_count < max_retries:
-                    retry_count += 1
-                    logger.warning(f"令牌已过期，正在进行第 {retry_count} 次重试")
-                    continue
-                else:
-                    logger.error(f"获取对象 {object_api_name} 数据时发生错误: {str(e)}")
+                if time_point_records is None:
+                    page = None
                     break
+                all_data.extend(time_point_records)
+                page = self._schedule_page(
+                    service, object_api_name, self._with_filter(filters, KEYSET_FIELD, "GT", [last_time]),
+                    orders, limit, 0, "false", fields, use_cache, total
+                ).result()
+                boundary_time = None
+                boundary_ids = set()
+            else:
+                if last_time != boundary_time:
+                    boundary_time = last_time
+                    boundary_ids = set()
+                boundary_ids.update(
+                    r.get("_id") for r in page["dataList"] if r.get(KEYSET_FIELD) == last_time
+                )
+                page = self._schedule_page(
+                    service, object_api_name, self._with_filter(filters, KEYSET_FIELD, "GTE", [last_time]),
+                    orders, limit, 0, "false", fields, use_cache, total
+                ).result()
+            
+            if page is None:
+                break
         
+        if page is None:
+            logger.error(f"对象 {object_api_name} 游标分页获取失败，结果不完整，已获取 {len(all_data)}/{total} 条记录")
         return {
             "dataList": all_data,
-            "total": total
+            "total": total,
+            "failed_pages": [len(all_data)] if page is None else []
         }
+    
+    def _fetch_object_data_partitioned(self,
+                                       service: ICustomObjectService,
+                                       object_api_name: str,
+                                       filters: Optional[List[Dict[str, Any]]],
+                                       orders: Optional[List[Dict[str, Any]]],
+                                       limit: int,
+                                       fields: Optional[List[str]],
+                                       use_cache: bool = True) -> Dict[str, Any]:
+        """按create_time区间分区并行获取对象数据
+        
+        先查询最早和最晚的创建时间，再将时间范围逐级二分，直到每个区间的记录数不超过PARTITION_MAX_RECORDS，
+        各级区间的计数查询并行发出；某个区间计数失败时不再细分，整个区间直接分页获取。
+        之后各区间以BETWEEN条件独立按偏移量分页，直到返回不足一页，不依赖计数结果，计数后新增的记录也能取到；
+        各区间的当前页一起提交给全局调度器，每个区间内的偏移量都较小，不会触及服务端的深分页限制。
+        结果按_id去重后按排序条件排序，记录数与总数不一致时记录警告。
+        
+        Args:
+            service: 自定义对象服务实例
+            object_api_name: 对象API名称
+            filters: 过滤条件列表
+            orders: 排序条件列表，用于合并后的记录排序
+            limit: 每页记录数
+            fields: 需要保留的记录字段，可选，去重需要的_id和合并后排序需要的字段在指定时自动补上
+            use_cache: 是否使用查询缓存
             
-    def fetch_multiple_objects_data(self, object_configs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        Returns:
+            Dict[str, Any]: 对象数据，failed_pages中为获取失败的页 {partition: [开始时间, 结束时间], offset}，
+                无法得到时间范围时为[0]
+        """
+        if fields:
+            order_fields = [order.get("field_name") or order.get("fieldName") for order in orders or []]
+            fields = list(dict.fromkeys(list(fields) + ["_id"] + [name for name in order_fields if name]))
+        
+        def count(partition_filters, order_asc=True):
+            return self._schedule_page(
+                service, object_api_name, partition_filters, [{"field_name": KEYSET_FIELD, "is_asc": order_asc}],
+                1, 0, "true", ["_id", KEYSET_FIELD], use_cache, FIRST_PAGE_PRIORITY
+            )
+        
+        # 最早和最晚的记录确定时间范围，同时得到总记录数
+        first, last = count(filters, True).result(), count(filters, False).result()
+        if first is None or last is None:
+            logger.error(f"对象 {object_api_name} 获取时间范围失败，无法分区")
+            return {
+                "dataList": [],
+                "total": 0,
+                "failed_pages": [0]
+            }
+        total = first["total"]
+        if not first["dataList"] or not last["dataList"]:
+            return {
+                "dataList": [],
+                "total": total,
+                "failed_pages": []
+            }
+        start_time = first["dataList"][0].get(KEYSET_FIELD)
+        end_time = last["dataList"][0].get(KEYSET_FIELD)
+        
+        # 逐级二分，每一级的计数查询并行发出；单个时间点无法再分或计数失败时保留该区间
+        partitions = []
+        pending = [(start_time, end_time, total)]
+        while pending:
+            splits = []
+            for low, high, partition_count in pending:
+                if partition_count is None or partition_count <= PARTITION_MAX_RECORDS or low >= high:
+                    if partition_count != 0:
+                        partitions.append((low, high))
+                    continue
+                middle = (low + high) // 2
+                for bounds in ((low, middle), (middle + 1, high)):
+                    splits.append((bounds, count(self._with_filter(filters, KEYSET_FIELD, "BETWEEN", list(bounds)))))
+            pending = []
+            for (low, high), future in splits:
+                page = future.result()
+                if page is None:
+                    logger.warning(f"对象 {object_api_name} 区间 [{low}, {high}] 计数失败，不再细分，直接分页获取")
+                pending.append((low, high, page["total"] if page is not None else None))
+        logger.info(f"对象 {object_api_name} 共有 {total} 条记录，按创建时间分为 {len(partitions)} 个区间")
+        
+        partition_orders = [
+            {"field_name": KEYSET_FIELD, "is_asc": True},
+            {"field_name": "_id", "is_asc": True}
+        ]
+        # 区间边界或获取期间新增的记录可能重复出现，按_id去重
+        records = {}
+        failed_pages = []
+        # 区间 -> 下一页的偏移量
+        active = {bounds: 0 for bounds in partitions}
+        while active:
+            futures = {
+                bounds: self._schedule_page(
+                    service, object_api_name, self._with_filter(filters, KEYSET_FIELD, "BETWEEN", list(bounds)),
+                    partition_orders, limit, page_offset, "false", fields, use_cache, total
+                )
+                for bounds, page_offset in active.items()
+            }
+            next_active = {}
+            for bounds, future in futures.items():
+                page = future.result()
+                if page is None:
+                    logger.error(f"对象 {object_api_name} 区间 {list(bounds)} 偏移量 {active[bounds]} 的数据获取失败")
+                    failed_pages.append({"partition": list(bounds), "offset": active[bounds]})
+                    continue
+                for record in page["dataList"]:
+                    records.setdefault(record.get("_id"), record)
+                if len(page["dataList"]) >= limit:
+                    next_active[bounds] = active[bounds] + limit
+            active = next_active
+        
+        data_list = self._sort_records(list(records.values()), orders)
+        logger.info(f"对象 {object_api_name} 当前已获取 {len(data_list)}/{total} 条记录（分区分页）")
+        if not failed_pages and len(data_list) != total:
+            logger.warning(
+                f"对象 {object_api_name} 分区获取的记录数 {len(data_list)} 与总数 {total} 不一致，获取期间可能有记录增删"
+            )
+        return {
+            "dataList": data_list,
+            "total": total,
+            "failed_pages": failed_pages
+        }
+    
+    def _fetch_time_point(self,
+                          service: ICustomObjectService,
+                          object_api_name: str,
+                          filters: Optional[List[Dict[str, Any]]],
+                          orders: List[Dict[str, Any]],
+                          limit: int,
+                          fields: Optional[List[str]],
+                          time_value: Any,
+                          seen_ids: set,
+                          use_cache: bool = True,
+                          priority: float = 0) -> Optional[List[Dict[str, Any]]]:
+        """按偏移量获取同一时间点上尚未获取的记录，各页以priority提交给全局调度器，任意一页失败时返回None"""
+        records = []
+        time_filters = self._with_filter(filters, KEYSET_FIELD, "EQ", [time_value])
+        offset = 0
+        while True:
+            page = self._schedule_page(
+                service, object_api_name, time_filters, orders, limit, offset, "false", fields, use_cache, priority
+            ).result()
+            if page is None:
+                return None
+            records.extend(r for r in page["dataList"] if r.get("_id") not in seen_ids)
+            if len(page["dataList"]) < limit:
+                break
+            offset += limit
+        return records
+    
+    def fetch_multiple_objects_data(self, object_configs: List[Dict[str, Any]],
+                                    version: Optional[str] = None,
+                                    incremental: bool = False) -> Dict[str, Any]:
         """获取多个对象的数据
         
         Args:
@@ -184,12 +867,35 @@ class CustomObjectDataService:
                 - filters: 过滤条件列表
                 - orders: 排序条件列表
                 - limit: 最大获取记录数
+                - fields: 需要保留的记录字段，可选
+                - pagination: 分页方式，可选，默认为偏移量分页
+                - incremental: 是否增量同步，可选，默认使用incremental参数
+                - consumers: 页消费者列表，可选，提供时该对象逐页交给消费者处理（见stream_object_data），
+                  结果中的dataList为空；增量同步时将合并后的记录按页交给消费者
+                - mode: 获取模式，可选，MODE_ROWS（默认，获取记录）或MODE_COUNT（只获取总数，见count_object_data）
+                - depends_on: 依赖的对象API名称列表，可选，依赖的对象全部获取完成后才开始获取
+                - resolve: 可选，resolve(config, dependencies) -> config，开始获取前以依赖对象的数据
+                  （对象API名称 -> 对象数据）补全配置，例如加入依赖对象中解析出的过滤条件
+            version: 版本号，增量同步时作为快照的键
+            incremental: 是否基于本地快照增量同步，需要同时提供version
                 
         Returns:
-            Dict[str, Any]: 包含所有对象数据的字典
+            Dict[str, Any]: 包含所有对象数据的字典，获取失败的对象包含error，可用is_complete判断对象数据是否完整
+            
+        Raises:
+            ValueError: 依赖的对象不在配置列表中或依赖存在环
         """
         result = {}
         total_records = 0
+        self._check_dependencies(object_configs)
+        
+        # 每次批量获取（即一份报告）使用自己的重试预算，传给该报告的各个服务实例，并发的报告互不影响
+        retry_budget = RetryBudget()
+        
+        # 各线程新建的服务共享凭证缓存，先一次往返将令牌、企业ID和用户ID预热到进程内
+        CredentialManager().preload([self.mobile])
+        # 缓存中没有用户ID时在各对象的页并发前解析一次，并通过管道写回缓存
+        FxkService().warm_user_ids([self.mobile])
         
         def fetch_single_object(config: Dict[str, Any]) -> tuple[str, Dict[str, Any]]:
             """获取单个对象的数据
@@ -201,65 +907,138 @@ class CustomObjectDataService:
                 tuple[str, Dict[str, Any]]: (对象API名称, 对象数据)
             """
             object_api_name = config["object_api_name"]
+            if config.get("resolve"):
+                try:
+                    dependencies = {name: result[name] for name in config.get("depends_on", [])}
+                    config = config["resolve"](config, dependencies)
+                except Exception as e:
+                    logger.error(f"根据依赖补全对象 {object_api_name} 的配置失败: {str(e)}")
+                    return object_api_name, {
+                        "dataList": [],
+                        "total": 0,
+                        "error": str(e)
+                    }
             filters = config.get("filters", [])
             orders = config.get("orders", [])
             limit = config.get("limit", 100)
+            fields = config.get("fields")
+            pagination = config.get("pagination", PAGINATION_OFFSET)
+            consumers = config.get("consumers")
+            use_incremental = config.get("incremental", incremental) and version is not None
             
             try:
                 logger.info(f"开始获取对象 {object_api_name} 的数据")
                 # 创建新的服务实例
                 fxk_service = FxkService()
                 api_client = FxkApiClient()
-                custom_object_service = CustomObjectService(fxk_service=fxk_service, api_client=api_client)
+                custom_object_service = CustomObjectService(
+                    fxk_service=fxk_service, api_client=api_client, retry_budget=retry_budget
+                )
                 
-                # 创建新的 Redis 客户端实例
-                redis_client = RedisClient()
-                cached_token = redis_client.get(TOKEN_CACHE_KEY)
-                if cached_token:
-                    logger.info("从Redis缓存中获取企业访问令牌")
-                    custom_object_service.set_corp_access_token(cached_token)
-                else:
-                    # 预先获取企业访问令牌
-                    corp_access_token = fxk_service.get_corp_access_token()
-                    logger.info("已预先获取企业访问令牌")
-                    custom_object_service.set_corp_access_token(corp_access_token)
-                    # 将新的令牌存入Redis
-                    redis_client.set(TOKEN_CACHE_KEY, corp_access_token)
+                # 令牌和企业ID由凭证缓存在各线程间共享，新实例不会重复请求
+                corp_access_token = fxk_service.get_corp_access_token()
+                custom_object_service.set_corp_access_token(corp_access_token)
                 
                 # 获取对象数据
-                object_data = self.fetch_object_data(
-                    object_api_name=object_api_name,
-                    filters=filters,
-                    orders=orders,
-                    limit=limit,
-                    custom_object_service=custom_object_service
-                )
+                if config.get("mode", MODE_ROWS) == MODE_COUNT:
+                    object_data = self.count_object_data(
+                        object_api_name=object_api_name,
+                        filters=filters,
+                        custom_object_service=custom_object_service
+                    )
+                elif use_incremental:
+                    object_data = self.fetch_object_data_incremental(
+                        object_api_name=object_api_name,
+                        version=version,
+                        filters=filters,
+                        orders=orders,
+                        limit=limit,
+                        custom_object_service=custom_object_service,
+                        fields=fields,
+                        pagination=pagination
+                    )
+                    if consumers:
+                        object_data = self._consume_records(object_data, consumers, limit)
+                elif consumers:
+                    object_data = self.stream_object_data(
+                        object_api_name=object_api_name,
+                        consumers=consumers,
+                        filters=filters,
+                        orders=orders,
+                        limit=limit,
+                        custom_object_service=custom_object_service,
+                        fields=fields
+                    )
+                else:
+                    object_data = self.fetch_object_data(
+                        object_api_name=object_api_name,
+                        filters=filters,
+                        orders=orders,
+                        limit=limit,
+                        custom_object_service=custom_object_service,
+                        fields=fields,
+                        pagination=pagination
+                    )
                 logger.info(f"成功获取对象 {object_api_name} 的数据，共 {object_data.get('total', 0)} 条记录")
                 return object_api_name, object_data
             except Exception as e:
                 logger.error(f"获取对象 {object_api_name} 数据失败: {str(e)}")
                 return object_api_name, {
                     "dataList": [],
-                    "total": 0
+                    "total": 0,
+                    "error": str(e)
                 }
         
         logger.info(f"开始并行获取 {len(object_configs)} 个对象的数据")
-        # 使用线程池并行获取数据
-        with ThreadPoolExecutor(max_workers=min(len(object_configs), 5)) as executor:
-            logger.info(f"创建线程池，最大工作线程数: {min(len(object_configs), 5)}")
-            # 提交所有任务
-            future_to_config = {
-                executor.submit(fetch_single_object, config): config 
-                for config in object_configs
-            }
-            logger.info(f"已提交所有 {len(future_to_config)} 个任务")
-            
-            # 获取结果
-            for future in as_completed(future_to_config):
-                object_api_name, object_data = future.result()
-                result[object_api_name] = object_data
-                total_records += object_data.get("total", 0)
-                logger.info(f"已完成对象 {object_api_name} 的数据处理")
+        # 没有依赖的对象立即开始，其余对象在依赖全部完成后提交，结果按完成顺序处理
+        waiting = list(object_configs)
+        # 对象线程只负责协调，各页的请求由全局调度器执行，并发受全局预算限制
+        with ThreadPoolExecutor(max_workers=len(object_configs)) as executor:
+            logger.info(f"创建线程池，对象协调线程数: {len(object_configs)}")
+            running = set()
+            while waiting or running:
+                ready = [
+                    config for config in waiting
+                    if all(name in result for name in config.get("depends_on", []))
+                ]
+                for config in ready:
+                    waiting.remove(config)
+                    running.add(executor.submit(fetch_single_object, config))
+                    if config.get("depends_on"):
+                        logger.info(f"对象 {config['object_api_name']} 的依赖已完成，开始获取")
+                
+                done, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    object_api_name, object_data = future.result()
+                    result[object_api_name] = object_data
+                    total_records += object_data.get("total", 0)
+                    logger.info(f"已完成对象 {object_api_name} 的数据处理")
                 
+        incomplete = [name for name, object_data in result.items() if not self.is_complete(object_data)]
+        if incomplete:
+            logger.warning(f"以下对象获取失败或有分页获取失败，数据不完整: {incomplete}")
         logger.info(f"所有对象数据处理完成，共处理 {total_records} 条记录")
-        return result 
\ No newline at end of file
+        return result
+    
+    @staticmethod
+    def _check_dependencies(object_configs: List[Dict[str, Any]]):
+        """检查对象配置的依赖都在配置列表中且不存在环"""
+        dependencies = {
+            config["object_api_name"]: list(config.get("depends_on", []))
+            for config in object_configs
+        }
+        for object_api_name, depends_on in dependencies.items():
+            for name in depends_on:
+                if name not in dependencies:
+                    raise ValueError(f"对象 {object_api_name} 依赖的对象 {name} 不在配置列表中")
+        
+        resolved = set()
+        while len(resolved) < len(dependencies):
+            ready = [
+                name for name, depends_on in dependencies.items()
+                if name not in resolved and all(dep in resolved for dep in depends_on)
+            ]
+            if not ready:
+                cycle = sorted(set(dependencies) - resolved)
+                raise ValueError(f"对象依赖存在环: {cycle}")
+            resolved.update(ready)
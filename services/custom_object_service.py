@@ -4,6 +4,9 @@ from services.fxk_service import FxkService
 from services.interfaces import ICustomObjectService
 import logging
 from utils.redis_client import RedisClient
+from utils.retry_policy import RetryPolicy, RetryBudget, TOKEN_EXPIRED_CODE
+from utils.query_cache import QueryPageCache
+from utils.single_flight import single_flight
 from config import USER_ID_CACHE_KEY
 
 # 配置日志
@@ -16,17 +19,21 @@ logger = logging.getLogger(__name__)
 class CustomObjectService(ICustomObjectService):
     """自定义对象服务类，用于查询和管理自定义对象"""
     
-    def __init__(self, fxk_service: FxkService, api_client: FxkApiClient):
+    def __init__(self, fxk_service: FxkService, api_client: FxkApiClient,
+                 retry_budget: Optional[RetryBudget] = None):
         """初始化自定义对象服务
         
         Args:
             fxk_service: FxkService实例
             api_client: FxkApiClient实例
+            retry_budget: 重试预算，可选，生成报告时传入该报告的预算，不提供时使用进程共享的预算
         """
         self.fxk_service = fxk_service
         self.api_client = api_client
         self.corp_access_token = None
         self.user_id_cache = {}  # 添加用户ID缓存
+        self.retry_policy = RetryPolicy(budget=retry_budget)
+        self.query_cache = QueryPageCache()
     
     def set_corp_access_token(self, token: str):
         """设置企业访问令牌
@@ -43,7 +50,10 @@ class CustomObjectService(ICustomObjectService):
                            limit: int = 100,
                            offset: int = 0,
                            filters: Optional[List[Dict[str, Any]]] = None,
-                           orders: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+                           orders: Optional[List[Dict[str, Any]]] = None,
+                           find_explicit_total_num: str = "true",
+                           fields: Optional[List[str]] = None,
+                           use_cache: bool = True) -> Dict[str, Any]:
         """查询自定义对象数据
         
         Args:
@@ -53,83 +63,173 @@ class CustomObjectService(ICustomObjectService):
             offset: 偏移量
             filters: 过滤条件列表
             orders: 排序条件列表
+            find_explicit_total_num: 是否返回总数(true:返回total总数,false:不返回total总数)
+            fields: 需要返回的记录字段，可选，提供时下推到服务端并只保留这些字段
+            use_cache: 是否使用查询缓存，为False时直接请求接口，结果也不写入缓存
             
         Returns:
             Dict[str, Any]: 查询结果
         """
-        # 最多重试3次
-        max_retries = 3
-        for attempt in range(max_retries):
+        query = self._build_cache_query(limit, offset, filters, orders, find_explicit_total_num, fields)
+        
+        # 查询缓存：相同企业、对象和查询条件的分页直接从缓存返回
+        cache_key = None
+        if use_cache and self.query_cache.ttl_for(data_object_api_name) > 0:
             try:
-                # 获取企业访问令牌，如果是重试则强制刷新
-                corp_access_token = self.fxk_service.get_corp_access_token(force_refresh=(attempt > 0))
-                
-                # 获取用户ID
-                user_id = self.fxk_service.get_user_id_by_mobile(mobile)
-                
-                # 获取企业ID
-                corp_id = self.api_client.get_corp_id()
-                
-                # 构建查询条件
-                search_query_info = {
-                    "limit": limit,
-                    "offset": offset
-                }
-                
-                # 添加过滤条件
-                if filters:
-                    search_query_info["filters"] = filters
-                    
-                # 添加排序条件
-                if orders:
-                    search_query_info["orders"] = orders
-                    
-                # 记录请求参数
-                logger.info(f"查询对象 {data_object_api_name} 的请求参数:")
-                logger.info(f"- 企业访问令牌: {corp_access_token[:10]}...")
-                logger.info(f"- 当前用户ID: {user_id}")
-                logger.info(f"- 企业ID: {corp_id}")
-                logger.info(f"- 查询条件: {search_query_info}")
-                
-                # 发送请求
-                response = self.api_client.query_custom_object(
-                    corp_access_token=corp_access_token,
-                    current_open_user_id=user_id,
-                    data_object_api_name=data_object_api_name,
-                    search_query_info=search_query_info,
-                    corp_id=corp_id
+                cache_key = self.query_cache.make_key(
+                    corp_id=self.api_client.get_corp_id(),
+                    user_id=self.fxk_service.get_user_id_by_mobile(mobile),
+                    object_api_name=data_object_api_name,
+                    query=query
                 )
+                cached_data = self.query_cache.get(cache_key)
+                if cached_data is not None:
+                    logger.info(f"从缓存中获取对象 {data_object_api_name} 偏移量 {offset} 的数据")
+                    return cached_data
+            except Exception as e:
+                logger.warning(f"查询缓存不可用，直接请求接口: {str(e)}")
+                cache_key = None
+        
+        # 令牌过期时由重试策略触发刷新：清除已失效的令牌，下一次尝试获取新令牌
+        token_state = {"token": None}
+        
+        def refresh_token():
+            self.fxk_service.invalidate_corp_access_token(token_state["token"])
+        
+        def send_query():
+            # 获取企业访问令牌
+            corp_access_token = self.fxk_service.get_corp_access_token()
+            token_state["token"] = corp_access_token
+            
+            # 获取用户ID
+            user_id = self.fxk_service.get_user_id_by_mobile(mobile)
+            
+            # 获取企业ID
+            corp_id = self.api_client.get_corp_id()
+            
+            # 构建查询条件
+            search_query_info = {
+                "limit": limit,
+                "offset": offset
+            }
+            
+            # 添加过滤条件
+            if filters:
+                search_query_info["filters"] = filters
                 
-                # 记录响应结果
-                logger.info(f"查询对象 {data_object_api_name} 的 API 响应:")
-                logger.info(f"- 响应状态: {'成功' if response.is_success() else '失败'}")
-                if not response.is_success():
-                    logger.info(f"- 响应码: {response.code}")
-                    logger.info(f"- 响应消息: {response.message}")
-                    logger.info(f"- 响应数据: {response.data}")
-                    
-                    # 如果是令牌过期错误，继续重试
-                    if response.code == 20016:
-                        if attempt < max_retries - 1:
-                            logger.warning(f"令牌已过期，正在进行第 {attempt + 1} 次重试")
-                            continue
-                        else:
-                            logger.error(f"获取对象 {data_object_api_name} 数据时发生错误: TOKEN_EXPIRED")
-                            return {"dataList": [], "total": 0}
-                            
-                return response.data
+            # 添加排序条件
+            if orders:
+                search_query_info["orders"] = orders
                 
-            except Exception as e:
-                logger.error(f"第{attempt + 1}次尝试：获取对象 {data_object_api_name} 数据时发生异常: {str(e)}")
-                if attempt < max_retries - 1:
-                    logger.info(f"将在3秒后进行第{attempt + 2}次尝试")
-                    import time
-                    time.sleep(3)
-                else:
-                    logger.error(f"获取对象 {data_object_api_name} 数据失败，已达到最大重试次数")
-                    return {"dataList": [], "total": 0}
+            # 记录请求参数
+            logger.info(f"查询对象 {data_object_api_name} 的请求参数:")
+            logger.info(f"- 企业访问令牌: {corp_access_token[:10]}...")
+            logger.info(f"- 当前用户ID: {user_id}")
+            logger.info(f"- 企业ID: {corp_id}")
+            logger.info(f"- 查询条件: {search_query_info}")
+            
+            # 发送请求
+            response = self.api_client.query_custom_object(
+                corp_access_token=corp_access_token,
+                current_open_user_id=user_id,
+                data_object_api_name=data_object_api_name,
+                search_query_info=search_query_info,
+                find_explicit_total_num=find_explicit_total_num,
+                corp_id=corp_id,
+                fields=fields
+            )
+            
+            # 记录响应结果
+            logger.info(f"查询对象 {data_object_api_name} 的 API 响应:")
+            logger.info(f"- 响应状态: {'成功' if response.is_success() else '失败'}")
+            if not response.is_success():
+                logger.info(f"- 响应码: {response.code}")
+                logger.info(f"- 响应消息: {response.message}")
+                logger.info(f"- 响应数据: {response.data}")
+            return response
+        
+        # 并发的相同查询只向接口发起一次请求，共享结果；服务端按当前用户的数据权限返回记录，
+        # 键中带上企业ID和手机号，不同企业或用户的相同查询不会合并
+        try:
+            flight_key = (
+                f"query:{self.api_client.get_corp_id()}:{mobile}:"
+                f"{data_object_api_name}:{QueryPageCache.fingerprint(query)}"
+            )
+            response = single_flight.do(flight_key, lambda: self.retry_policy.call(
+                send_query,
+                name=f"查询对象 {data_object_api_name}",
+                on_refresh_token=refresh_token
+            ))
+        except Exception as e:
+            logger.error(f"获取对象 {data_object_api_name} 数据失败: {str(e)}")
+            return {"dataList": [], "total": 0}
+        
+        if response.code == TOKEN_EXPIRED_CODE:
+            logger.error(f"获取对象 {data_object_api_name} 数据时发生错误: TOKEN_EXPIRED")
+            return {"dataList": [], "total": 0}
+        if response.is_success() and cache_key:
+            self.query_cache.set(cache_key, data_object_api_name, response.data)
+        return response.data
+    
+    def get_cached_pages(self,
+                         data_object_api_name: str,
+                         mobile: str,
+                         offsets: List[int],
+                         limit: int = 100,
+                         filters: Optional[List[Dict[str, Any]]] = None,
+                         orders: Optional[List[Dict[str, Any]]] = None,
+                         find_explicit_total_num: str = "false",
+                         fields: Optional[List[str]] = None) -> Dict[int, Dict[str, Any]]:
+        """一次往返从查询缓存中批量读取多个分页
         
-        return {"dataList": [], "total": 0}
+        Args:
+            data_object_api_name: 对象API名称
+            mobile: 用户手机号
+            offsets: 各页的偏移量
+            limit: 每页记录数
+            filters: 过滤条件列表
+            orders: 排序条件列表
+            find_explicit_total_num: 是否返回总数，需与query_custom_objects调用时一致
+            fields: 需要返回的记录字段，可选
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: 偏移量 -> 缓存的查询结果，只包含命中的分页
+        """
+        if not offsets or self.query_cache.ttl_for(data_object_api_name) <= 0:
+            return {}
+        try:
+            corp_id = self.api_client.get_corp_id()
+            user_id = self.fxk_service.get_user_id_by_mobile(mobile)
+            keys = [
+                self.query_cache.make_key(
+                    corp_id=corp_id,
+                    user_id=user_id,
+                    object_api_name=data_object_api_name,
+                    query=self._build_cache_query(limit, offset, filters, orders, find_explicit_total_num, fields)
+                )
+                for offset in offsets
+            ]
+        except Exception as e:
+            logger.warning(f"查询缓存不可用: {str(e)}")
+            return {}
+        pages = self.query_cache.get_many(keys)
+        return {offset: page for offset, page in zip(offsets, pages) if page is not None}
+    
+    @staticmethod
+    def _build_cache_query(limit: int, offset: int,
+                           filters: Optional[List[Dict[str, Any]]],
+                           orders: Optional[List[Dict[str, Any]]],
+                           find_explicit_total_num: str,
+                           fields: Optional[List[str]]) -> Dict[str, Any]:
+        """构建用于计算查询缓存键的查询条件"""
+        return {
+            "limit": limit,
+            "offset": offset,
+            "filters": filters,
+            "orders": orders,
+            "find_explicit_total_num": find_explicit_total_num,
+            "fields": fields
+        }
     
     def get_custom_object_by_id(self, 
                                data_object_api_name: str, 
@@ -1,11 +1,313 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterable
 from datetime import datetime, timedelta
 import re
 import os
 
+
+def _is_classified(team: Any, platform: Any) -> bool:
+    """所属团队和平台都不为空的bug才参与统计"""
+    return bool(team) and team != "null" and team != "未分类" and bool(platform)
+
+
+class SeverityStatusAggregator:
+    """按严重程度和状态增量统计offline_bug__c的bug数量，可逐页add"""
+    
+    # 严重程度映射
+    SEVERITY_MAP = {
+        "fatal": "致命",
+        "serious": "严重",
+        "normal": "一般",
+        "advice": "建议"
+    }
+    
+    # 统计的状态
+    STATUSES = ["新", "已解决", "已关闭"]
+    
+    def __init__(self):
+        self._result = {
+            "致命": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
+            "严重": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
+            "一般": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
+            "建议": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
+            "total": 0
+        }
+    
+    def add_counts(self, counts: Dict[tuple, int]):
+        """累加已分组的计数
+        
+        Args:
+            counts: (severity__c, status__c) -> bug数，例如分组计数查询的结果
+        """
+        result = self._result
+        for (severity, status), count in counts.items():
+            severity_cn = self.SEVERITY_MAP.get(severity, "")
+            if severity_cn in result and status in result[severity_cn]:
+                result[severity_cn][status] += count
+                result[severity_cn]["total"] += count
+                result["total"] += count
+    
+    def add(self, bugs: Iterable[Dict[str, Any]]):
+        result = self._result
+        for bug in bugs:
+            # 过滤掉所属团队或平台为空的数据
+            if not _is_classified(bug.get("dev_team__c__r", ""), bug.get("platform__c", "")):
+                continue
+                
+            severity = bug.get("severity__c", "")
+            status = bug.get("status__c", "")
+            
+            # 获取中文严重程度
+            severity_cn = self.SEVERITY_MAP.get(severity, "")
+            if not severity_cn:
+                continue
+                
+            if severity_cn in result and status in result[severity_cn]:
+                result[severity_cn][status] += 1
+                result[severity_cn]["total"] += 1
+                result["total"] += 1
+    
+    def result(self) -> Dict[str, Dict[str, int]]:
+        return self._result
+
+
+class TeamPlatformAggregator:
+    """按业务线和平台增量统计不同严重程度和状态的bug数量，可逐页add"""
+    
+    # 定义需要保留的业务线和团队
+    BUSINESS_LINE_TEAMS = {
+        "SFA业务线": ["售中团队", "售前团队"],
+        "PAAS平台": ["流程团队", "基础业务团队", "协同业务团队", "元数据权限组"],
+        "深研业务线": ["制造行业组", "订货业务组"],
+        "快消业务线": ["快消团队"],  # 快消团队作为独立业务线
+        "BI业务线":["BI团队"]
+    }
+    
+    def __init__(self):
+        self._counts = {business_line: {} for business_line in self.BUSINESS_LINE_TEAMS}
+        self._business_line_total = {business_line: 0 for business_line in self.BUSINESS_LINE_TEAMS}
+    
+    def add(self, bugs: Iterable[Dict[str, Any]]):
+        for bug in bugs:
+            self._add(bug.get("dev_team__c__r", ""), bug.get("platform__c", ""),
+                      bug.get("severity__c", ""), bug.get("status__c", ""), 1)
+    
+    def add_counts(self, counts: Dict[tuple, int]):
+        """累加已分组的计数
+        
+        Args:
+            counts: (团队, 平台, severity__c, status__c) -> bug数，例如快照库的分组统计结果
+        """
+        for (team, platform, severity, status), count in counts.items():
+            self._add(team, platform, severity, status, count)
+    
+    def _add(self, team: Any, platform: Any, severity: Any, status: Any, count: int):
+        # 过滤掉所属团队或平台为空的数据
+        if not _is_classified(team, platform):
+            return
+            
+        # 业务线统计
+        for business_line, teams in self.BUSINESS_LINE_TEAMS.items():
+            if team in teams:
+                platforms = self._counts[business_line]
+                if platform not in platforms:
+                    platforms[platform] = {
+                        "fatal": {"新": 0, "已解决": 0, "已关闭": 0},
+                        "serious": {"新": 0, "已解决": 0, "已关闭": 0},
+                        "normal": {"新": 0, "已解决": 0, "已关闭": 0},
+                        "advice": {"新": 0, "已解决": 0, "已关闭": 0}
+                    }
+                    
+                if severity in platforms[platform] and status in platforms[platform][severity]:
+                    platforms[platform][severity][status] += count
+                    self._business_line_total[business_line] += count
+    
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        # 为每个业务线添加平台bug小计和排序信息
+        for business_line, platforms in self._counts.items():
+            result[business_line] = {}
+            # 计算每个平台的bug总数
+            for platform, counts in platforms.items():
+                total = 0
+                for severity in ["fatal", "serious", "normal", "advice"]:
+                    for status in ["新", "已解决", "已关闭"]:
+                        total += counts[severity][status]
+                result[business_line][platform] = {
+                    **{severity: dict(statuses) for severity, statuses in counts.items()},
+                    "total": total
+                }
+            
+            # 对平台按bug数排序
+            sorted_platforms = sorted(
+                [(p, result[business_line][p]["total"]) for p in platforms],
+                key=lambda x: x[1],
+                reverse=True
+            )
+            
+            # 添加bug数最多的两个平台信息
+            if len(sorted_platforms) >= 2:
+                result[business_line]["top_platforms"] = {
+                    "first": {
+                        "platform": sorted_platforms[0][0],
+                        "count": sorted_platforms[0][1]
+                    },
+                    "second": {
+                        "platform": sorted_platforms[1][0],
+                        "count": sorted_platforms[1][1]
+                    }
+                }
+            elif len(sorted_platforms) == 1:
+                result[business_line]["top_platforms"] = {
+                    "first": {
+                        "platform": sorted_platforms[0][0],
+                        "count": sorted_platforms[0][1]
+                    }
+                }
+            
+            # 添加业务线总bug数
+            result[business_line]["total"] = self._business_line_total[business_line]
+        
+        return result
+
+
+class DevelopmentQualityAggregator:
+    """按业务线和平台增量统计缺陷数与修复人数（开发质量），可逐页add"""
+    
+    # 定义需要保留的业务线和团队
+    BUSINESS_LINE_TEAMS = {
+        "SFA业务线": ["售中团队", "售前团队"],
+        "PAAS平台": ["流程团队", "基础业务团队", "协同业务团队", "元数据权限组"],
+        "深研业务线": ["互联平台组", "制造行业组", "订货业务组"],
+        "快消团队": ["快消团队"],
+        "BI业务线":["BI团队"]
+    }
+    
+    def __init__(self):
+        # 统计每个业务线每个平台的开发人数和缺陷数
+        self._stats = {}
+    
+    def add(self, bugs: Iterable[Dict[str, Any]]):
+        for bug in bugs:
+            team = bug.get("dev_team__c__r", "")
+            platform = bug.get("platform__c", "")
+            # 过滤掉所属团队或平台为空的数据
+            if not _is_classified(team, platform):
+                continue
+                
+            fixer = bug.get("fixer__c", [])
+            
+            # 确定业务线
+            business_line = None
+            for bl, teams in self.BUSINESS_LINE_TEAMS.items():
+                if team in teams:
+                    business_line = bl
+                    break
+            
+            if not business_line:
+                continue
+                
+            platforms = self._stats.setdefault(business_line, {})
+            if platform not in platforms:
+                platforms[platform] = {
+                    "bug_count": 0,
+                    "dev_count": set()
+                }
+                
+            platforms[platform]["bug_count"] += 1
+            if fixer and isinstance(fixer, list):
+                platforms[platform]["dev_count"].update(fixer)
+    
+    def result(self) -> Dict[str, Dict[str, Any]]:
+        # 计算开发质量并格式化输出
+        dev_quality_stats = {}
+        for business_line, platforms in self._stats.items():
+            dev_quality_stats[business_line] = {}
+            max_quality = 0
+            max_quality_platform = None
+            
+            for platform, stats in platforms.items():
+                bug_count = stats["bug_count"]
+                dev_count = len(stats["dev_count"])
+                quality = round(bug_count / dev_count, 2) if dev_count > 0 else 0
+                
+                dev_quality_stats[business_line][platform] = {
+                    "bug_count": bug_count,
+                    "dev_count": dev_count,
+                    "quality": quality
+                }
+                
+                # 记录开发质量最高的平台
+                if quality > max_quality:
+                    max_quality = quality
+                    max_quality_platform = platform
+            
+            # 添加开发质量最高的平台信息
+            if max_quality_platform:
+                dev_quality_stats[business_line]["best_platform"] = {
+                    "platform": max_quality_platform,
+                    "quality": max_quality,
+                    "bug_count": dev_quality_stats[business_line][max_quality_platform]["bug_count"],
+                    "dev_count": dev_quality_stats[business_line][max_quality_platform]["dev_count"]
+                }
+        
+        return dev_quality_stats
+
+
+class OfflineBugAggregator:
+    """offline_bug__c的全部统计，逐页add后一次取出，用于流式处理时不保留bug记录"""
+    
+    def __init__(self):
+        self.severity_status = SeverityStatusAggregator()
+        self.team_platform = TeamPlatformAggregator()
+        self.development_quality = DevelopmentQualityAggregator()
+    
+    def add(self, bugs: List[Dict[str, Any]]):
+        self.severity_status.add(bugs)
+        self.team_platform.add(bugs)
+        self.development_quality.add(bugs)
+    
+    def add_snapshot(self, store: Any, version: str, object_api_name: str = "offline_bug__c"):
+        """从本地快照库统计，不把全部bug读入内存
+        
+        严重程度、状态、团队和平台由快照库的索引列分组计数，开发质量需要修复人，只读取相关团队的记录。
+        
+        Args:
+            store: SnapshotStore实例
+            version: 版本号
+            object_api_name: 对象API名称
+        """
+        counts = store.count_by(object_api_name, version, ["team", "platform", "severity", "status"])
+        severity_counts = {}
+        for (team, platform, severity, status), count in counts.items():
+            if _is_classified(team, platform):
+                severity_counts[(severity, status)] = severity_counts.get((severity, status), 0) + count
+        self.severity_status.add_counts(severity_counts)
+        self.team_platform.add_counts(counts)
+        teams = sorted({team for teams in DevelopmentQualityAggregator.BUSINESS_LINE_TEAMS.values() for team in teams})
+        self.development_quality.add(store.query(object_api_name, version, {"team": teams}))
+    
+    def result(self) -> Dict[str, Any]:
+        """
+        Returns:
+            Dict[str, Any]: {bugs_by_severity, bugs_by_team, dev_quality}，与对应analyze方法的结果相同
+        """
+        return {
+            "bugs_by_severity": self.severity_status.result(),
+            "bugs_by_team": self.team_platform.result(),
+            "dev_quality": self.development_quality.result()
+        }
+
+
 class DataAnalysisService:
     """数据分析服务类"""
     
+    # 所属团队和平台都不为空的线下BUG，服务端过滤条件，对应_is_classified
+    CLASSIFIED_BUG_FILTERS = [
+        {"field_name": "dev_team__c", "field_values": [], "operator": "ISN"},
+        {"field_name": "dev_team__c.name", "field_values": ["未分类"], "operator": "N"},
+        {"field_name": "platform__c", "field_values": [], "operator": "ISN"}
+    ]
+    
     @staticmethod
     def _extract_first_batch_date(schedule_text: str) -> datetime:
         """从发布计划文本中提取灰度真实企业第一批的日期
@@ -120,45 +422,36 @@ class DataAnalysisService:
         """
         if not data or "dataList" not in data:
             return {}
-            
-        # 严重程度映射
-        severity_map = {
-            "fatal": "致命",
-            "serious": "严重",
-            "normal": "一般",
-            "advice": "建议"
-        }
+        aggregator = SeverityStatusAggregator()
+        aggregator.add(data["dataList"])
+        return aggregator.result()
         
-        result = {
-            "致命": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
-            "严重": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
-            "一般": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
-            "建议": {"新": 0, "已解决": 0, "已关闭": 0, "total": 0},
-            "total": 0
-        }
+    @staticmethod
+    def analyze_bugs_by_severity_and_status_planned(planner: Any,
+                                                    filters: List[Dict[str, Any]] = None) -> Dict[str, Dict[str, int]]:
+        """根据严重程度和状态统计bug数量，不预先下载offline_bug__c记录
         
-        for bug in data["dataList"]:
-            team = bug.get("dev_team__c__r", "")
-            platform = bug.get("platform__c", "")
-            
-            # 过滤掉所属团队或平台为空的数据
-            if not team or team == "null" or team == "未分类" or not platform:
-                continue
-                
-            severity = bug.get("severity__c", "")
-            status = bug.get("status__c", "")
+        严重程度 × 状态 共4 × 3个分组，由GroupByPlanner按总数选择并行分组计数或下载记录，
+        团队和平台为空的bug由CLASSIFIED_BUG_FILTERS在服务端过滤。结果结构与analyze_bugs_by_severity_and_status相同。
+        
+        Args:
+            planner: GroupByPlanner实例
+            filters: offline_bug__c的查询条件，例如按版本过滤
             
-            # 获取中文严重程度
-            severity_cn = severity_map.get(severity, "")
-            if not severity_cn:
-                continue
-                
-            if severity_cn in result and status in result[severity_cn]:
-                result[severity_cn][status] += 1
-                result[severity_cn]["total"] += 1
-                result["total"] += 1
-                
-        return result
+        Returns:
+            Dict[str, Dict[str, int]]: 统计结果
+        """
+        counts = planner.count_by(
+            "offline_bug__c",
+            {
+                "severity__c": list(SeverityStatusAggregator.SEVERITY_MAP),
+                "status__c": SeverityStatusAggregator.STATUSES
+            },
+            list(filters or []) + DataAnalysisService.CLASSIFIED_BUG_FILTERS
+        )
+        aggregator = SeverityStatusAggregator()
+        aggregator.add_counts(counts)
+        return aggregator.result()
         
     @staticmethod
     def analyze_bugs_by_team_and_platform(data: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Dict[str, Dict[str, int]]]]]:
@@ -172,97 +465,9 @@ class DataAnalysisService:
         """
         if not data or "dataList" not in data:
             return {}
-            
-        result = {}
-        team_total = {}  # 用于统计每个团队的总bug数
-        business_line_total = {}  # 用于统计每个业务线的总bug数
-        platform_total = {}  # 用于统计每个业务线各平台的bug数
-        
-        # 定义需要保留的业务线和团队
-        business_line_teams = {
-            "SFA业务线": ["售中团队", "售前团队"],
-            "PAAS平台": ["流程团队", "基础业务团队", "协同业务团队", "元数据权限组"],
-            "深研业务线": ["制造行业组", "订货业务组"],
-            "快消业务线": ["快消团队"],  # 快消团队作为独立业务线
-            "BI业务线":["BI团队"]
-        }
-        
-        # 初始化业务线统计
-        for business_line in business_line_teams:
-            result[business_line] = {}
-            business_line_total[business_line] = 0
-            platform_total[business_line] = {}
-        
-        for bug in data["dataList"]:
-            team = bug.get("dev_team__c__r", "")
-            platform = bug.get("platform__c", "")
-            
-            # 过滤掉所属团队或平台为空的数据
-            if not team or team == "null" or team == "未分类" or not platform:
-                continue
-                
-            severity = bug.get("severity__c", "")
-            status = bug.get("status__c", "")
-            
-            # 业务线统计
-            for business_line, teams in business_line_teams.items():
-                if team in teams:
-                    if platform not in result[business_line]:
-                        result[business_line][platform] = {
-                            "fatal": {"新": 0, "已解决": 0, "已关闭": 0},
-                            "serious": {"新": 0, "已解决": 0, "已关闭": 0},
-                            "normal": {"新": 0, "已解决": 0, "已关闭": 0},
-                            "advice": {"新": 0, "已解决": 0, "已关闭": 0}
-                        }
-                        platform_total[business_line][platform] = 0
-                        
-                    if severity in result[business_line][platform] and status in result[business_line][platform][severity]:
-                        result[business_line][platform][severity][status] += 1
-                        business_line_total[business_line] += 1
-                        platform_total[business_line][platform] += 1
-        
-        # 为每个业务线添加平台bug小计和排序信息
-        for business_line in result:
-            # 计算每个平台的bug总数
-            for platform in result[business_line]:
-                if platform != "total":
-                    total = 0
-                    for severity in ["fatal", "serious", "normal", "advice"]:
-                        for status in ["新", "已解决", "已关闭"]:
-                            total += result[business_line][platform][severity][status]
-                    result[business_line][platform]["total"] = total
-            
-            # 对平台按bug数排序
-            sorted_platforms = sorted(
-                [(p, result[business_line][p]["total"]) for p in result[business_line] if p != "total"],
-                key=lambda x: x[1],
-                reverse=True
-            )
-            
-            # 添加bug数最多的两个平台信息
-            if len(sorted_platforms) >= 2:
-                result[business_line]["top_platforms"] = {
-                    "first": {
-                        "platform": sorted_platforms[0][0],
-                        "count": sorted_platforms[0][1]
-                    },
-                    "second": {
-                        "platform": sorted_platforms[1][0],
-                        "count": sorted_platforms[1][1]
-                    }
-                }
-            elif len(sorted_platforms) == 1:
-                result[business_line]["top_platforms"] = {
-                    "first": {
-                        "platform": sorted_platforms[0][0],
-                        "count": sorted_platforms[0][1]
-                    }
-                }
-            
-            # 添加业务线总bug数
-            result[business_line]["total"] = business_line_total[business_line]
-        
-        return result
+        aggregator = TeamPlatformAggregator()
+        aggregator.add(data["dataList"])
+        return aggregator.result()
         
     @staticmethod
     def calculate_development_quality(data: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
@@ -276,87 +481,9 @@ class DataAnalysisService:
         """
         if not data or "dataList" not in data:
             return {}
-            
-        # 定义需要保留的业务线和团队
-        business_line_teams = {
-            "SFA业务线": ["售中团队", "售前团队"],
-            "PAAS平台": ["流程团队", "基础业务团队", "协同业务团队", "元数据权限组"],
-            "深研业务线": ["互联平台组", "制造行业组", "订货业务组"],
-            "快消团队": ["快消团队"],
-            "BI业务线":["BI团队"]
-        }
-        
-        # 统计每个业务线每个平台的开发人数和缺陷数
-        business_line_stats = {}
-        
-        for bug in data["dataList"]:
-            team = bug.get("dev_team__c__r", "")
-            # 过滤掉所属团队为空的数据
-            if not team or team == "null" or team == "未分类":
-                continue
-                
-            platform = bug.get("platform__c", "")
-            # 过滤掉平台为空的数据
-            if not platform:
-                continue
-                
-            fixer = bug.get("fixer__c", [])
-            
-            # 确定业务线
-            business_line = None
-            for bl, teams in business_line_teams.items():
-                if team in teams:
-                    business_line = bl
-                    break
-            
-            if not business_line:
-                continue
-                
-            if business_line not in business_line_stats:
-                business_line_stats[business_line] = {}
-            if platform not in business_line_stats[business_line]:
-                business_line_stats[business_line][platform] = {
-                    "bug_count": 0,
-                    "dev_count": set()
-                }
-                
-            business_line_stats[business_line][platform]["bug_count"] += 1
-            if fixer and isinstance(fixer, list):
-                business_line_stats[business_line][platform]["dev_count"].update(fixer)
-                
-        # 计算开发质量并格式化输出
-        dev_quality_stats = {}
-        for business_line, platforms in business_line_stats.items():
-            dev_quality_stats[business_line] = {}
-            max_quality = 0
-            max_quality_platform = None
-            
-            for platform, stats in platforms.items():
-                bug_count = stats["bug_count"]
-                dev_count = len(stats["dev_count"])
-                quality = round(bug_count / dev_count, 2) if dev_count > 0 else 0
-                
-                dev_quality_stats[business_line][platform] = {
-                    "bug_count": bug_count,
-                    "dev_count": dev_count,
-                    "quality": quality
-                }
-                
-                # 记录开发质量最高的平台
-                if quality > max_quality:
-                    max_quality = quality
-                    max_quality_platform = platform
-            
-            # 添加开发质量最高的平台信息
-            if max_quality_platform:
-                dev_quality_stats[business_line]["best_platform"] = {
-                    "platform": max_quality_platform,
-                    "quality": max_quality,
-                    "bug_count": dev_quality_stats[business_line][max_quality_platform]["bug_count"],
-                    "dev_count": dev_quality_stats[business_line][max_quality_platform]["dev_count"]
-                }
-        
-        return dev_quality_stats
+        aggregator = DevelopmentQualityAggregator()
+        aggregator.add(data["dataList"])
+        return aggregator.result()
 
     @staticmethod
     def analyze_bugs_during_gray_release(data, release_plan):
@@ -439,7 +566,10 @@ class DataAnalysisService:
         
         # 统计在灰度期间创建的bug数量
         bug_count = 0
-        if "dataList" in data:
+        if data.get("count_only"):
+            # 只计数时查询条件已限定在灰度期间，总数即为灰度期间的bug数
+            bug_count = data.get("total", 0)
+        elif "dataList" in data:
             for bug in data["dataList"]:
                 create_time = bug.get("create_time")
                 if not create_time:
@@ -455,13 +585,13 @@ class DataAnalysisService:
                 if gray_start <= create_time <= full_release:
                     bug_count += 1
         
-        # return {
-        #     "gray_release_period": {
-        #         "start": gray_start.strftime("%Y-%m-%d"),
-        #         "end": full_release.strftime("%Y-%m-%d")
-        #     },
-        #     "bug_count": bug_count
-        # }
+        return {
+            "gray_release_period": {
+                "start": gray_start.strftime("%Y-%m-%d"),
+                "end": full_release.strftime("%Y-%m-%d")
+            },
+            "bug_count": bug_count
+        }
 
     def analyze_team_features(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """分析不同团队的功能特性
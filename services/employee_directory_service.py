@@ -0,0 +1,204 @@
+import os
+import re
+import time
+import sqlite3
+import threading
+import logging
+from typing import Dict, List, Optional
+from utils.single_flight import single_flight
+from config import (
+    EMPLOYEE_DIRECTORY_PATH, EMPLOYEE_DIRECTORY_SYNC_INTERVAL,
+    EMPLOYEE_DIRECTORY_RETRY_INTERVAL, FXK_ROOT_DEPARTMENT_ID
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_mobile(mobile: str) -> str:
+    """规范化手机号：去掉分隔符和+86/86前缀"""
+    digits = re.sub(r"\D", "", mobile or "")
+    if len(digits) == 13 and digits.startswith("86"):
+        digits = digits[2:]
+    return digits
+
+
+class EmployeeDirectoryService:
+    """本地员工通讯录
+
+    定期通过user/list批量拉取全公司员工，存入本地SQLite并按手机号建立索引，
+    手机号 -> openUserId、openUserId -> 姓名的查询直接读本地，不再请求接口。
+    纷享销客没有按更新时间增量拉取员工的接口，每次同步仍拉取全量列表，但只将新增、变更和删除的员工写入本地。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(EmployeeDirectoryService, cls).__new__(cls)
+                    instance._init_store(EMPLOYEE_DIRECTORY_PATH)
+                    instance._thread = None
+                    instance._stop_event = threading.Event()
+                    instance._fxk_service = None
+                    cls._instance = instance
+        return cls._instance
+
+    def _init_store(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS employees ("
+            "open_user_id TEXT PRIMARY KEY, name TEXT, mobile TEXT, is_stop INTEGER NOT NULL DEFAULT 0)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_employees_mobile ON employees (mobile)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def last_sync_time(self) -> float:
+        """上次成功同步的时间戳，从未同步时返回0"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'last_sync'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def is_stale(self) -> bool:
+        return time.time() - self.last_sync_time() >= EMPLOYEE_DIRECTORY_SYNC_INTERVAL
+
+    def size(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM employees").fetchone()[0]
+
+    def get_open_user_id(self, mobile: str) -> Optional[str]:
+        """根据手机号查询openUserId，在职员工优先
+
+        Returns:
+            Optional[str]: openUserId，通讯录中没有时返回None
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT open_user_id FROM employees WHERE mobile = ? ORDER BY is_stop LIMIT 1",
+                (normalize_mobile(mobile),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_open_user_ids(self, mobiles: List[str]) -> Dict[str, Optional[str]]:
+        """批量根据手机号查询openUserId，没有的手机号对应None"""
+        return {mobile: self.get_open_user_id(mobile) for mobile in mobiles}
+
+    def get_name(self, open_user_id: str) -> Optional[str]:
+        """根据openUserId查询员工姓名"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT name FROM employees WHERE open_user_id = ?", (open_user_id,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def upsert(self, open_user_id: str, mobile: str, name: Optional[str] = None, is_stop: bool = False):
+        """写入单个员工，用于接口单独查到、尚未同步到通讯录的员工"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO employees (open_user_id, name, mobile, is_stop) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(open_user_id) DO UPDATE SET mobile = excluded.mobile, "
+                "name = COALESCE(excluded.name, employees.name), is_stop = excluded.is_stop",
+                (open_user_id, name, normalize_mobile(mobile), int(is_stop))
+            )
+
+    def sync(self, fxk_service) -> Dict[str, int]:
+        """拉取全公司员工并将变化写入本地通讯录，并发调用只同步一次
+
+        Args:
+            fxk_service: FxkService实例，用于获取令牌和请求接口
+
+        Returns:
+            Dict[str, int]: {added, updated, removed, total}
+
+        Raises:
+            Exception: 拉取员工列表失败时抛出异常
+        """
+        return single_flight.do("employee_directory:sync", lambda: self._sync(fxk_service))
+
+    def _sync(self, fxk_service) -> Dict[str, int]:
+        token = fxk_service.get_corp_access_token()
+        response = fxk_service.api_client.get_user_list(token, FXK_ROOT_DEPARTMENT_ID, fetch_child=True)
+        if not response.is_success():
+            raise Exception(f"获取员工列表失败: {response.code} {response.message}")
+
+        remote = {}
+        for user in response.get_data('userList') or []:
+            open_user_id = user.get('openUserId')
+            if open_user_id:
+                remote[open_user_id] = (
+                    user.get('name'),
+                    normalize_mobile(user.get('mobile', '')),
+                    int(bool(user.get('isStop')))
+                )
+
+        with self._lock:
+            local = {
+                row[0]: tuple(row[1:])
+                for row in self._conn.execute("SELECT open_user_id, name, mobile, is_stop FROM employees")
+            }
+            changed = [(open_user_id,) + values for open_user_id, values in remote.items()
+                       if local.get(open_user_id) != values]
+            removed = [(open_user_id,) for open_user_id in local if open_user_id not in remote]
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO employees (open_user_id, name, mobile, is_stop) VALUES (?, ?, ?, ?)",
+                    changed
+                )
+                self._conn.executemany("DELETE FROM employees WHERE open_user_id = ?", removed)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_sync', ?)", (str(time.time()),)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        added = sum(1 for row in changed if row[0] not in local)
+        stats = {"added": added, "updated": len(changed) - added, "removed": len(removed), "total": len(remote)}
+        logger.info(f"员工通讯录同步完成: {stats}")
+        return stats
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, fxk_service):
+        """启动后台同步线程，已启动时不重复启动
+
+        Args:
+            fxk_service: FxkService实例
+        """
+        with self._instance_lock:
+            if self.is_running():
+                return
+            self._fxk_service = fxk_service
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="employee-directory-sync", daemon=True)
+            self._thread.start()
+        logger.info("员工通讯录后台同步线程已启动")
+
+    def stop(self):
+        """停止后台同步线程"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            wait_time = self.last_sync_time() + EMPLOYEE_DIRECTORY_SYNC_INTERVAL - time.time()
+            if wait_time > 0:
+                self._stop_event.wait(wait_time)
+                continue
+            try:
+                self.sync(self._fxk_service)
+            except Exception as e:
+                logger.error(f"后台同步员工通讯录失败: {str(e)}")
+                self._stop_event.wait(EMPLOYEE_DIRECTORY_RETRY_INTERVAL)
@@ -1,5 +1,12 @@
-import requests
-import time
+from typing import Dict, List, Optional
+from utils.http_session import HttpSessionPool
+from utils.credential_manager import CredentialManager
+from utils.micro_batcher import MicroBatcher
+from utils.ttl_cache import TTLCache
+from config import (
+    FEISHU_BATCH_GET_ID_MAX, FEISHU_BATCH_WINDOW,
+    FEISHU_USER_ID_CACHE_MAXSIZE, USER_ID_EXPIRE_TIME
+)
 
 class EnterpriseAuthService:
     """企业级认证服务"""
@@ -15,9 +22,14 @@ class EnterpriseAuthService:
         self.app_id = app_id
         self.app_secret = app_secret
         self.redirect_uri = redirect_uri
-        self._access_token_cache = None
-        self._access_token_expires_at = 0
-        self._user_id_cache = {}  # 添加用户ID缓存字典
+        self.credentials = CredentialManager()
+        # 用户ID缓存，线程安全且有容量上限
+        self._user_id_cache = TTLCache(maxsize=FEISHU_USER_ID_CACHE_MAXSIZE, default_ttl=USER_ID_EXPIRE_TIME)
+        self._user_id_batcher = MicroBatcher(
+            self._batch_get_user_ids,
+            max_batch_size=FEISHU_BATCH_GET_ID_MAX,
+            window=FEISHU_BATCH_WINDOW
+        )
         
     def get_corp_access_token(self) -> str:
         """获取企业级访问令牌
@@ -25,9 +37,10 @@ class EnterpriseAuthService:
         Returns:
             str: 企业级访问令牌
         """
-        # 检查缓存是否有效
-        if self._access_token_cache and time.time() < self._access_token_expires_at:
-            return self._access_token_cache
+        # 检查缓存是否有效，令牌在进程内和Redis中共享
+        cached_token = self.credentials.get_feishu_token(self.app_id)
+        if cached_token:
+            return cached_token
             
         # 获取新的访问令牌
         url = "https://open.feishu.cn/open-apis/auth/v3/app_access_token/internal"
@@ -39,21 +52,25 @@ class EnterpriseAuthService:
             "app_secret": self.app_secret
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        response = HttpSessionPool().post(url, headers=headers, json=data)
         response_data = response.json()
         
         if response_data.get("code") != 0:
             raise Exception(f"获取企业级访问令牌失败: {response_data.get('msg')}")
             
         # 更新缓存
-        self._access_token_cache = response_data["app_access_token"]
-        self._access_token_expires_at = time.time() + response_data["expire"] - 300  # 提前5分钟过期
+        access_token = response_data["app_access_token"]
+        self.credentials.set_feishu_token(
+            self.app_id, access_token, max(response_data["expire"] - 300, 1)  # 提前5分钟过期
+        )
         
-        return self._access_token_cache
+        return access_token
         
     def get_user_id_by_mobile(self, mobile: str) -> str:
         """通过手机号获取用户ID
         
+        并发调用在短时间窗口内合并为一次批量查询。
+        
         Args:
             mobile: 手机号
             
@@ -61,36 +78,61 @@ class EnterpriseAuthService:
             str: 用户ID
         """
         # 检查缓存是否有效
-        if mobile in self._user_id_cache:
-            cached_data = self._user_id_cache[mobile]
-            if time.time() < cached_data["expires_at"]:
-                return cached_data["user_id"]
-                
-        # 获取新的用户ID
+        user_id = self._user_id_cache.get(mobile)
+        if user_id:
+            return user_id
+        
+        user_id = self._user_id_batcher.submit(mobile)
+        if not user_id:
+            raise Exception(f"未找到手机号 {mobile} 对应的用户")
+        return user_id
+    
+    def get_user_ids_by_mobiles(self, mobiles: List[str]) -> Dict[str, Optional[str]]:
+        """批量通过手机号获取用户ID
+        
+        Args:
+            mobiles: 手机号列表
+            
+        Returns:
+            Dict[str, Optional[str]]: 手机号 -> 用户ID，未找到的手机号对应None
+        """
+        result = {mobile: self._user_id_cache.get(mobile) for mobile in mobiles}
+        missing = list(dict.fromkeys(mobile for mobile, user_id in result.items() if not user_id))
+        for start in range(0, len(missing), FEISHU_BATCH_GET_ID_MAX):
+            result.update(self._batch_get_user_ids(missing[start:start + FEISHU_BATCH_GET_ID_MAX]))
+        return result
+    
+    def _batch_get_user_ids(self, mobiles: List[str]) -> Dict[str, Optional[str]]:
+        """调用batch_get_id一次查询多个手机号，找到的用户ID写入缓存
+        
+        Args:
+            mobiles: 手机号列表，不超过FEISHU_BATCH_GET_ID_MAX个
+            
+        Returns:
+            Dict[str, Optional[str]]: 手机号 -> 用户ID，未找到的手机号对应None
+        """
         url = "https://open.feishu.cn/open-apis/contact/v3/users/batch_get_id"
         headers = {
             "Authorization": f"Bearer {self.get_corp_access_token()}",
             "Content-Type": "application/json; charset=utf-8"
         }
         data = {
-            "mobiles": [mobile]
+            "mobiles": mobiles
         }
         
-        response = requests.post(url, headers=headers, json=data)
+        response = HttpSessionPool().post(url, headers=headers, json=data)
         response_data = response.json()
         
         if response_data.get("code") != 0:
             raise Exception(f"获取用户ID失败: {response_data.get('msg')}")
-            
-        if not response_data["data"]["user_list"]:
-            raise Exception(f"未找到手机号 {mobile} 对应的用户")
-            
-        user_id = response_data["data"]["user_list"][0]["user_id"]
         
-        # 更新缓存，设置24小时过期
-        self._user_id_cache[mobile] = {
-            "user_id": user_id,
-            "expires_at": time.time() + 24 * 60 * 60
-        }
+        result = dict.fromkeys(mobiles)
+        for user in response_data.get("data", {}).get("user_list") or []:
+            mobile = user.get("mobile")
+            user_id = user.get("user_id")
+            if mobile in result and user_id:
+                result[mobile] = user_id
+                # 更新缓存，设置24小时过期
+                self._user_id_cache.set(mobile, user_id)
         
-        return user_id 
\ No newline at end of file
+        return result
@@ -1,13 +1,19 @@
-from typing import Optional
+from typing import Dict, List, Optional
 from utils.redis_client import RedisClient
 from utils.fxk_api_client import FxkApiClient
+from utils.credential_manager import CredentialManager
 from config import (
     FXK_API_BASE_URL, FXK_APP_ID, FXK_APP_SECRET,
-    FXK_PERMANENT_CODE, TOKEN_CACHE_KEY,
-    TOKEN_EXPIRE_TIME, USER_ID_CACHE_KEY
+    FXK_PERMANENT_CODE, TOKEN_EXPIRE_TIME
 )
+from utils.retry_policy import (
+    RetryPolicy, RetryExhaustedError, NonRetryableError, TokenError, UserNotFoundError, TransientError,
+    classify_response, RETRY, REFRESH_TOKEN
+)
+from utils.single_flight import single_flight
+from services.token_refresher import CorpAccessTokenRefresher
+from services.employee_directory_service import EmployeeDirectoryService
 import logging
-import time
 
 # 配置日志
 logging.basicConfig(
@@ -19,10 +25,14 @@ logger = logging.getLogger(__name__)
 class FxkService:
     def __init__(self):
         self.redis_client = RedisClient()
+        self.credentials = CredentialManager()
         self.api_client = FxkApiClient()
+        self.retry_policy = RetryPolicy()
+        self.token_refresher = CorpAccessTokenRefresher()
+        self.directory = EmployeeDirectoryService()
     
     def get_corp_access_token(self, force_refresh=False) -> str:
-        """获取企业访问令牌，优先从Redis缓存中获取
+        """获取企业访问令牌，优先从进程内缓存和Redis缓存中获取
         
         Args:
             force_refresh: 是否强制刷新令牌，不使用缓存
@@ -33,44 +43,96 @@ class FxkService:
         Raises:
             Exception: 当获取令牌失败时抛出异常
         """
+        # 后台刷新线程维护的令牌始终在过期前更新，直接使用
+        if not force_refresh:
+            token = self.token_refresher.current_token()
+            if token:
+                return token
+        
         # 如果强制刷新或者缓存中没有令牌，则获取新令牌
-        token = None if force_refresh else self.redis_client.get(TOKEN_CACHE_KEY)
+        token = None if force_refresh else self.credentials.get_corp_access_token()
         
         if token:
-            logger.info("从Redis缓存中获取企业访问令牌")
             return token
 
+        # 并发的令牌获取只向接口发起一次请求，强制刷新与普通获取分开合并
+        flight_key = "corp_access_token:refresh" if force_refresh else "corp_access_token"
+        return single_flight.do(flight_key, lambda: self._fetch_corp_access_token(force_refresh))
+    
+    def invalidate_corp_access_token(self, token: Optional[str] = None):
+        """接口返回令牌过期（20016）时清除两级缓存和后台刷新线程中的令牌
+        
+        Args:
+            token: 已失效的令牌，提供时只清除仍为该令牌的缓存，其他线程已换取的新令牌不受影响
+        """
+        self.token_refresher.invalidate(token)
+        self.credentials.invalidate_corp_access_token(token)
+    
+    def refresh_corp_access_token(self) -> str:
+        """在旧令牌过期前换取新令牌，换取期间旧令牌仍可继续使用
+        
+        Returns:
+            str: 新的企业访问令牌
+        """
+        return single_flight.do(
+            "corp_access_token:refresh",
+            lambda: self._fetch_corp_access_token(force_refresh=True, invalidate=False)
+        )
+    
+    def start_token_refresher(self):
+        """启动令牌后台刷新线程，缓存中已有令牌时以其剩余有效期作为初始状态"""
+        if self.token_refresher.is_running():
+            return
+        token = self.credentials.get_corp_access_token()
+        ttl = self.credentials.token_ttl() if token else -2
+        if token and ttl > 0:
+            self.token_refresher.publish(token, ttl)
+        self.token_refresher.start(self)
+    
+    def start_directory_sync(self):
+        """启动员工通讯录后台同步线程"""
+        self.directory.start(self)
+    
+    def _fetch_corp_access_token(self, force_refresh: bool, invalidate: bool = True) -> str:
+        """向接口请求新的企业访问令牌并存入两级缓存，响应中的企业ID一并缓存
+        
+        Args:
+            force_refresh: 是否忽略缓存中的令牌
+            invalidate: 请求前是否清除旧令牌，旧令牌已失效时为True
+        """
+        # 等待期间其他进程可能已经写入了新令牌
+        if not force_refresh:
+            token = self.credentials.get_corp_access_token()
+            if token:
+                return token
+        
         # 获取新令牌前，确保清除旧令牌
         logger.info("正在获取新的企业访问令牌")
-        self.redis_client.delete(TOKEN_CACHE_KEY)
+        if invalidate:
+            self.invalidate_corp_access_token()
         
-        # 最多重试3次
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = self.api_client.get_corp_access_token()
-                if response.is_success():
-                    token = response.get_data('corpAccessToken')
-                    if token:
-                        # 将token存入Redis，设置过期时间
-                        self.redis_client.set(TOKEN_CACHE_KEY, token, TOKEN_EXPIRE_TIME)
-                        logger.info(f"已获取新的企业访问令牌并存入Redis缓存（第{attempt + 1}次尝试）")
-                        return token
-                    
-                logger.warning(f"第{attempt + 1}次尝试：获取令牌失败，响应中没有corpAccessToken")
-                
-            except Exception as e:
-                logger.error(f"第{attempt + 1}次尝试：获取令牌时发生异常: {str(e)}")
-            
-            if attempt < max_retries - 1:
-                logger.info(f"将在3秒后进行第{attempt + 2}次尝试")
-                time.sleep(3)
+        response = self.retry_policy.call(self.api_client.get_corp_access_token, name="获取企业访问令牌")
+        token = response.get_data('corpAccessToken') if response.is_success() else None
+        if token:
+            # 以接口返回的有效期为准，将token存入缓存并替换后台刷新线程中的令牌
+            expires_in = int(response.get_data('expiresIn') or TOKEN_EXPIRE_TIME)
+            self.credentials.set_corp_access_token(token, expires_in)
+            self.token_refresher.publish(token, expires_in)
+            # 令牌响应中带有企业ID，缓存后各客户端无需再单独请求
+            corp_id = response.get_data('corpId')
+            if corp_id:
+                self.credentials.set_corp_id(corp_id)
+            logger.info(f"已获取新的企业访问令牌并存入缓存，有效期 {expires_in} 秒")
+            return token
         
-        # 如果所有重试都失败了
-        raise Exception("无法获取有效的企业访问令牌，请检查配置或网络连接")
+        logger.error(f"获取令牌失败: {response.code} {response.message}")
+        # 网络错误或限流时重试已用尽；其他错误码是接口拒绝发放令牌，重试也不会成功
+        if classify_response(response) == RETRY:
+            raise RetryExhaustedError("无法获取有效的企业访问令牌，请检查网络连接")
+        raise TokenError(f"获取企业访问令牌失败，请检查应用配置: {response.code} {response.message}")
     
     def get_user_id_by_mobile(self, mobile: str) -> str:
-        """根据手机号获取用户ID，优先从Redis缓存中获取
+        """根据手机号获取用户ID，优先从本地员工通讯录、进程内缓存和Redis缓存中获取
         
         Args:
             mobile: 手机号
@@ -81,25 +143,74 @@ class FxkService:
         Raises:
             Exception: 当获取用户ID失败时抛出异常
         """
-        # 构建用户ID缓存键
-        user_id_cache_key = f"{USER_ID_CACHE_KEY}:{mobile}"
+        # 本地通讯录由后台定期同步，命中时不请求接口
+        user_id = self.directory.get_open_user_id(mobile)
+        if user_id:
+            return user_id
         
-        # 检查Redis中是否存在有效的用户ID
-        cached_user_id = self.redis_client.get(user_id_cache_key)
+        # 检查缓存中是否存在有效的用户ID
+        cached_user_id = self.credentials.get_user_id(mobile)
         if cached_user_id:
-            logger.info(f"从Redis缓存中获取手机号 {mobile} 的用户ID")
             return cached_user_id
         
-        # 如果缓存中没有用户ID，则请求新的用户ID
+        # 如果缓存中没有用户ID，则请求新的用户ID，并发的相同手机号只请求一次；
+        # 全量同步通讯录只由后台线程进行，不在请求路径上
+        return single_flight.do(f"user_id:{mobile}", lambda: self._fetch_user_id_by_mobile(mobile))
+    
+    def warm_user_ids(self, mobiles: List[str]) -> Dict[str, str]:
+        """批量预热手机号对应的用户ID
+        
+        先查本地通讯录，其余手机号的缓存通过一次MGET读取，仍未命中的逐个请求接口后通过一次管道写回缓存。
+        
+        Args:
+            mobiles: 手机号列表
+            
+        Returns:
+            Dict[str, str]: 手机号 -> 用户ID，获取失败的手机号不包含在内
+        """
+        user_ids = {mobile: user_id for mobile, user_id in self.directory.get_open_user_ids(mobiles).items() if user_id}
+        remaining = [mobile for mobile in mobiles if mobile not in user_ids]
+        user_ids.update(
+            {mobile: user_id for mobile, user_id in self.credentials.get_user_ids(remaining).items() if user_id}
+        )
+        fetched = {}
+        for mobile in mobiles:
+            if mobile in user_ids or mobile in fetched:
+                continue
+            try:
+                fetched[mobile] = self._request_user_id_by_mobile(mobile)
+            except Exception as e:
+                logger.warning(f"预热手机号 {mobile} 的用户ID失败: {str(e)}")
+        self.credentials.set_user_ids(fetched)
+        for mobile, user_id in fetched.items():
+            self.directory.upsert(user_id, mobile)
+        logger.info(f"已预热 {len(user_ids) + len(fetched)}/{len(mobiles)} 个用户ID，其中 {len(fetched)} 个来自接口")
+        user_ids.update(fetched)
+        return user_ids
+    
+    def _fetch_user_id_by_mobile(self, mobile: str) -> str:
+        """向接口请求手机号对应的用户ID并存入两级缓存"""
+        user_id = self._request_user_id_by_mobile(mobile)
+        # 将用户ID存入缓存，设置24小时过期，并补充到本地通讯录
+        self.credentials.set_user_id(mobile, user_id)
+        self.directory.upsert(user_id, mobile)
+        logger.info(f"已获取手机号 {mobile} 的用户ID并存入缓存")
+        return user_id
+    
+    def _request_user_id_by_mobile(self, mobile: str) -> str:
+        """向接口请求手机号对应的用户ID，不写缓存"""
         token = self.get_corp_access_token()
         response = self.api_client.get_user_id_by_mobile(token, mobile)
         if response.is_success():
             if 'empList' in response.data and len(response.data['empList']) > 0:
-                user_id = response.data['empList'][0]['openUserId']
-                # 将用户ID存入Redis，设置24小时过期
-                self.redis_client.set(user_id_cache_key, user_id, 24 * 60 * 60)
-                logger.info(f"已获取手机号 {mobile} 的用户ID并存入Redis缓存")
-                return user_id
+                return response.data['empList'][0]['openUserId']
             else:
-                raise Exception(f"未找到手机号为 {mobile} 的用户")
-        raise Exception(f"获取用户ID失败: {response.message}") 
\ No newline at end of file
+                raise UserNotFoundError(f"未找到手机号为 {mobile} 的用户")
+        
+        # 网络错误、限流和令牌过期可以重试，令牌过期时先清除失效的令牌
+        decision = classify_response(response)
+        if decision == REFRESH_TOKEN:
+            self.invalidate_corp_access_token(token)
+        if decision in (RETRY, REFRESH_TOKEN):
+            raise TransientError(f"获取用户ID失败: {response.code} {response.message}")
+        raise NonRetryableError(f"获取用户ID失败: {response.code} {response.message}") 
\ No newline at end of file
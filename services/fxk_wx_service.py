@@ -1,3 +1,10 @@
+import logging
+from utils.redis_client import RedisClient
+from services.employee_directory_service import EmployeeDirectoryService
+from config import USER_ID_CACHE_KEY, USER_ID_EXPIRE_TIME
+
+logger = logging.getLogger(__name__)
+
 def get_user_id_by_mobile(self, mobile: str) -> str:
         """根据手机号获取用户ID
         
@@ -7,6 +14,11 @@ def get_user_id_by_mobile(self, mobile: str) -> str:
         Returns:
             str: 用户ID
         """
+        # 优先从本地员工通讯录查询
+        user_id = EmployeeDirectoryService().get_open_user_id(mobile)
+        if user_id:
+            return user_id
+        
         # 检查Redis中是否有用户ID缓存
         redis_client = RedisClient()
         user_id_cache_key = f"{USER_ID_CACHE_KEY}:{mobile}"
@@ -31,8 +43,9 @@ def get_user_id_by_mobile(self, mobile: str) -> str:
         
         if response.is_success() and response.data and 'empList' in response.data:
             user_id = response.data['empList'][0]['openUserId']
-            # 缓存用户ID
-            redis_client.set(user_id_cache_key, user_id)
+            # 缓存用户ID，设置24小时过期
+            redis_client.set(user_id_cache_key, user_id, USER_ID_EXPIRE_TIME)
+            EmployeeDirectoryService().upsert(user_id, mobile)
             return user_id
         else:
             raise ValueError(f"获取用户ID失败: {response.message}") 
\ No newline at end of file
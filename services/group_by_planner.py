@@ -0,0 +1,158 @@
+import math
+import logging
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+from services.interfaces import ICustomObjectService, ALL_RECORDS_FILTER
+from utils.work_scheduler import get_work_scheduler
+
+logger = logging.getLogger(__name__)
+
+# 执行方式：每个分组一次计数查询，或下载记录后在本地分组
+PLAN_COUNTS = "counts"
+PLAN_ROWS = "rows"
+
+# 估算传输量用的单次响应大小（字节）：计数查询的响应，和只含分组字段的一条记录
+COUNT_RESPONSE_BYTES = 300
+ROW_BYTES = 200
+
+# 下载记录时的排序：按偏移量并行获取各页，需要唯一且稳定的顺序，避免同一时刻创建的记录在页间重复或遗漏
+ROW_ORDERS = [{"field_name": "create_time", "is_asc": True}, {"field_name": "_id", "is_asc": True}]
+
+
+class GroupByPlanner:
+    """低基数分组统计的执行计划选择
+
+    对 维度取值的笛卡尔积 中的每个分组，可以各发一次计数查询（limit=1，只取total），
+    也可以分页下载满足条件的全部记录后在本地分组。先用一次limit=1的计数查询得到总记录数，
+    比较两种方式的请求次数（都包括这次计数查询），分组数不超过页数时并行发出各分组的计数查询，
+    否则并行下载各页；请求次数相同时选传输量小的方式。
+    """
+
+    def __init__(self, custom_object_service: ICustomObjectService, mobile: str, page_size: int = 100):
+        """初始化
+
+        Args:
+            custom_object_service: 自定义对象服务实例
+            mobile: 当前用户的手机号
+            page_size: 下载记录时的每页记录数
+        """
+        self.custom_object_service = custom_object_service
+        self.mobile = mobile
+        self.page_size = page_size
+
+    def estimate(self, total: int, dimensions: Dict[str, List[Any]]) -> Dict[str, Dict[str, int]]:
+        """估算两种方式的请求次数和传输量，都包括先取总数的一次计数查询
+
+        Args:
+            total: 满足条件的总记录数
+            dimensions: 分组字段 -> 取值列表
+
+        Returns:
+            Dict[str, Dict[str, int]]: 执行方式 -> {requests, bytes}
+        """
+        cells = math.prod(len(values) for values in dimensions.values())
+        pages = max(math.ceil(total / self.page_size), 1)
+        return {
+            PLAN_COUNTS: {"requests": 1 + cells, "bytes": (1 + cells) * COUNT_RESPONSE_BYTES},
+            PLAN_ROWS: {"requests": 1 + pages, "bytes": (1 + pages) * COUNT_RESPONSE_BYTES + total * ROW_BYTES}
+        }
+
+    def choose(self, total: int, dimensions: Dict[str, List[Any]]) -> str:
+        """选择请求次数更少的方式，请求次数相同时选传输量更小的方式"""
+        costs = self.estimate(total, dimensions)
+        return min(
+            (PLAN_COUNTS, PLAN_ROWS),
+            key=lambda plan: (costs[plan]["requests"], costs[plan]["bytes"])
+        )
+
+    def count_by(self, object_api_name: str, dimensions: Dict[str, List[Any]],
+                 filters: Optional[List[Dict[str, Any]]] = None) -> Dict[Tuple, int]:
+        """按分组字段统计记录数
+
+        Args:
+            object_api_name: 对象API名称
+            dimensions: 分组字段 -> 取值列表，只统计取值在列表中的记录，例如
+                {"severity__c": ["fatal", "serious"], "status__c": ["新", "已解决"]}
+            filters: 所有分组共同的过滤条件
+
+        Returns:
+            Dict[Tuple, int]: 取值元组（按dimensions的字段顺序）-> 记录数，包含所有分组，没有记录的分组为0
+
+        Raises:
+            Exception: 总数查询失败，或任一页记录获取失败，或任一分组的计数查询失败
+        """
+        filters = list(filters or [])
+        total = self.custom_object_service.count_custom_objects(object_api_name, self.mobile, filters)
+        if total is None:
+            raise Exception(f"获取对象 {object_api_name} 的记录数失败")
+
+        plan = self.choose(total, dimensions)
+        costs = self.estimate(total, dimensions)
+        logger.info(
+            f"对象 {object_api_name} 共 {total} 条记录，分组统计使用 {plan} 方式: "
+            f"分组计数 {costs[PLAN_COUNTS]['requests']} 次请求，下载记录 {costs[PLAN_ROWS]['requests']} 次请求"
+        )
+        if plan == PLAN_COUNTS:
+            return self._count_cells(object_api_name, dimensions, filters)
+        return self._count_rows(object_api_name, dimensions, filters, total)
+
+    def _fetch_rows(self, object_api_name: str, filters: List[Dict[str, Any]], fields: List[str],
+                    offset: int) -> Dict[str, Any]:
+        """获取一页只含分组字段的记录，查询接口要求过滤和排序条件都不为空
+
+        Raises:
+            Exception: 返回数据格式不正确
+        """
+        data = self.custom_object_service.query_custom_objects(
+            data_object_api_name=object_api_name,
+            mobile=self.mobile,
+            limit=self.page_size,
+            offset=offset,
+            filters=filters or [ALL_RECORDS_FILTER],
+            orders=ROW_ORDERS,
+            find_explicit_total_num="false",
+            fields=fields
+        ).get("data")
+        if not isinstance(data, dict):
+            raise Exception(f"对象 {object_api_name} 偏移量 {offset} 的数据获取失败")
+        return data
+
+    def _count_cells(self, object_api_name: str, dimensions: Dict[str, List[Any]],
+                     filters: List[Dict[str, Any]]) -> Dict[Tuple, int]:
+        """每个分组一次计数查询，全部提交给全局调度器并行执行"""
+        fields = list(dimensions)
+        futures = {}
+        for cell in product(*dimensions.values()):
+            cell_filters = filters + [
+                {"field_name": field, "field_values": [value], "operator": "EQ"}
+                for field, value in zip(fields, cell)
+            ]
+            futures[cell] = get_work_scheduler().submit(
+                self.custom_object_service.count_custom_objects, object_api_name, self.mobile, cell_filters
+            )
+
+        counts = {}
+        for cell, future in futures.items():
+            count = future.result()
+            if count is None:
+                raise Exception(f"对象 {object_api_name} 分组 {cell} 的计数失败")
+            counts[cell] = count
+        return counts
+
+    def _count_rows(self, object_api_name: str, dimensions: Dict[str, List[Any]],
+                    filters: List[Dict[str, Any]], total: int) -> Dict[Tuple, int]:
+        """分页下载只含分组字段的记录，各页提交给全局调度器并行获取，在本地分组"""
+        fields = list(dimensions)
+        counts = {cell: 0 for cell in product(*dimensions.values())}
+        futures = [
+            get_work_scheduler().submit(
+                self._fetch_rows, object_api_name, filters, fields, offset, priority=total
+            )
+            for offset in range(0, total, self.page_size)
+        ]
+        for page in (future.result() for future in futures):
+            for record in page.get("dataList", []):
+                cell = tuple(record.get(field) for field in fields)
+                if cell in counts:
+                    counts[cell] += 1
+        return counts
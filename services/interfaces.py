@@ -1,6 +1,11 @@
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List, Optional
 
+# 查询接口要求search_query_info中filters和orders都不为空，只取总数时使用的默认条件：
+# 创建时间不早于0即全部记录，按创建时间倒序
+ALL_RECORDS_FILTER = {"field_name": "create_time", "field_values": [0], "operator": "GTE"}
+COUNT_ORDERS = [{"field_name": "create_time", "is_asc": False}]
+
 class ICustomObjectService(ABC):
     """自定义对象服务接口"""
     
@@ -21,7 +26,9 @@ class ICustomObjectService(ABC):
                             offset: int = 0,
                             filters: Optional[List[Dict[str, Any]]] = None,
                             orders: Optional[List[Dict[str, Any]]] = None,
-                            find_explicit_total_num: str = "true") -> Dict[str, Any]:
+                            find_explicit_total_num: str = "true",
+                            fields: Optional[List[str]] = None,
+                            use_cache: bool = True) -> Dict[str, Any]:
         """查询自定义对象列表
         
         Args:
@@ -32,12 +39,75 @@ class ICustomObjectService(ABC):
             filters: 过滤条件列表，可选，默认为空列表
             orders: 排序条件列表，可选，默认为按创建时间降序
             find_explicit_total_num: 是否返回总数(true:返回total总数,false:不返回total总数)
+            fields: 需要保留的记录字段，可选，默认保留全部字段
+            use_cache: 是否使用查询缓存，需要读到最新数据时为False
             
         Returns:
             Dict[str, Any]: 包含自定义对象列表的响应
         """
         pass
     
+    def get_cached_pages(self,
+                         data_object_api_name: str,
+                         mobile: str,
+                         offsets: List[int],
+                         limit: int = 100,
+                         filters: Optional[List[Dict[str, Any]]] = None,
+                         orders: Optional[List[Dict[str, Any]]] = None,
+                         find_explicit_total_num: str = "false",
+                         fields: Optional[List[str]] = None) -> Dict[int, Dict[str, Any]]:
+        """批量读取已缓存的分页，默认不使用缓存
+        
+        Args:
+            data_object_api_name: 对象的api_name
+            mobile: 当前用户的手机号，缓存按用户区分
+            offsets: 各页的偏移量
+            limit: 分页条数
+            filters: 过滤条件列表
+            orders: 排序条件列表
+            find_explicit_total_num: 是否返回总数
+            fields: 需要保留的记录字段
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: 偏移量 -> 与query_custom_objects相同结构的查询结果，只包含命中的分页
+        """
+        return {}
+    
+    def count_custom_objects(self,
+                             data_object_api_name: str,
+                             mobile: str,
+                             filters: Optional[List[Dict[str, Any]]] = None,
+                             use_cache: bool = True) -> Optional[int]:
+        """只查询满足条件的记录总数，不下载记录
+        
+        以limit=1、find_explicit_total_num=true发起一次查询，只取返回的total。
+        查询接口要求过滤和排序条件都不为空，没有过滤条件时使用ALL_RECORDS_FILTER，排序使用COUNT_ORDERS。
+        
+        Args:
+            data_object_api_name: 对象的api_name
+            mobile: 当前用户的手机号，用于获取用户ID
+            filters: 过滤条件列表，可选
+            use_cache: 是否使用查询缓存
+            
+        Returns:
+            Optional[int]: 记录总数，查询失败时返回None
+        """
+        response_data = self.query_custom_objects(
+            data_object_api_name=data_object_api_name,
+            mobile=mobile,
+            limit=1,
+            offset=0,
+            filters=list(filters or []) or [ALL_RECORDS_FILTER],
+            orders=COUNT_ORDERS,
+            find_explicit_total_num="true",
+            fields=["_id"],
+            use_cache=use_cache
+        )
+        data = response_data.get("data")
+        if not isinstance(data, dict):
+            return None
+        return data.get("total", 0)
+    
     @abstractmethod
     def get_custom_object_by_id(self, 
                                data_object_api_name: str, 
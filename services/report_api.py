@@ -13,6 +13,9 @@ import json
 import uuid
 from datetime import datetime
 
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +34,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.on_event("startup")
+async def start_token_refresher():
+    """启动企业访问令牌后台刷新，使报告生成子进程从Redis读取到的令牌始终有效
+
+    通过异步Redis客户端读取缓存中的令牌及其剩余有效期作为刷新线程的初始状态，不阻塞事件循环。
+    """
+    from services.fxk_service import FxkService
+    from services.async_fxk_service import AsyncFxkService
+    from services.token_refresher import CorpAccessTokenRefresher
+    try:
+        async_service = AsyncFxkService()
+        mobile = os.getenv("TEST_MOBILE")
+        # 一次往返将缓存中的令牌、企业ID和报告用户的用户ID读入进程内缓存
+        await async_service.credentials.preload([mobile] if mobile else [])
+        token = await async_service.get_corp_access_token()
+        ttl = await async_service.credentials.token_ttl()
+        # 预先缓存报告用户的用户ID，报告生成子进程直接从Redis读取
+        if mobile:
+            await async_service.get_user_id_by_mobile(mobile)
+        await async_service.close()
+        refresher = CorpAccessTokenRefresher()
+        if ttl > 0:
+            refresher.publish(token, ttl)
+        fxk_service = FxkService()
+        refresher.start(fxk_service)
+        fxk_service.start_directory_sync()
+    except Exception as e:
+        logger.warning(f"启动企业访问令牌后台刷新失败: {str(e)}")
+
+@app.on_event("shutdown")
+async def stop_token_refresher():
+    """停止企业访问令牌后台刷新、员工通讯录同步并关闭异步Redis连接"""
+    from services.token_refresher import CorpAccessTokenRefresher
+    from services.employee_directory_service import EmployeeDirectoryService
+    from utils.async_redis_client import AsyncRedisClient
+    CorpAccessTokenRefresher().stop()
+    EmployeeDirectoryService().stop()
+    await AsyncRedisClient().close()
+
 # 存储报告生成状态
 report_status = {}
 
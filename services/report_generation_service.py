@@ -1,4 +1,4 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .data_analysis_service import DataAnalysisService
 import json
 import os
@@ -10,12 +10,18 @@ class ReportGenerationService:
     def __init__(self):
         self.data_analysis_service = DataAnalysisService()
         
-    def generate_report(self, data: Dict[str, Any], version: str) -> Dict[str, Any]:
+    def generate_report(self, data: Dict[str, Any], version: str,
+                        offline_bug_stats: Optional[Dict[str, Any]] = None,
+                        bug_planner: Optional[Any] = None) -> Dict[str, Any]:
         """生成分析报告
         
         Args:
             data: 原始数据
             version: 版本号
+            offline_bug_stats: 可选，流式处理时由OfflineBugAggregator预先统计的offline_bug__c结果，
+                提供时不再从data中的offline_bug__c记录统计
+            bug_planner: 可选，GroupByPlanner实例，data中没有offline_bug__c记录时用它按版本直接查询
+                Bug严重程度统计，团队平台统计和开发质量统计为空
             
         Returns:
             Dict[str, Any]: 分析报告
@@ -44,20 +50,31 @@ class ReportGenerationService:
         # 获取团队功能特性统计
         team_features = analysis_service.analyze_team_features(data)
         
-        # 获取按严重程度和状态统计的bug数量
-        bugs_by_severity = analysis_service.analyze_bugs_by_severity_and_status(
-            data.get("offline_bug__c", {})
-        )
-        
-        # 获取按团队和平台统计的bug数量
-        bugs_by_team = analysis_service.analyze_bugs_by_team_and_platform(
-            data.get("offline_bug__c", {})
-        )
-        
-        # 获取开发质量统计
-        dev_quality = analysis_service.calculate_development_quality(
-            data.get("offline_bug__c", {})
-        )
+        if offline_bug_stats is not None:
+            bugs_by_severity = offline_bug_stats["bugs_by_severity"]
+            bugs_by_team = offline_bug_stats["bugs_by_team"]
+            dev_quality = offline_bug_stats["dev_quality"]
+        else:
+            # 获取按严重程度和状态统计的bug数量，没有记录时按分组计数或下载分组字段统计
+            if "offline_bug__c" not in data and bug_planner is not None:
+                bugs_by_severity = analysis_service.analyze_bugs_by_severity_and_status_planned(
+                    bug_planner,
+                    [{"field_name": "version__c", "field_values": [version], "operator": "EQ"}]
+                )
+            else:
+                bugs_by_severity = analysis_service.analyze_bugs_by_severity_and_status(
+                    data.get("offline_bug__c", {})
+                )
+            
+            # 获取按团队和平台统计的bug数量
+            bugs_by_team = analysis_service.analyze_bugs_by_team_and_platform(
+                data.get("offline_bug__c", {})
+            )
+            
+            # 获取开发质量统计
+            dev_quality = analysis_service.calculate_development_quality(
+                data.get("offline_bug__c", {})
+            )
         
         # 分析需求数量
         stories_count = analysis_service.analyze_stories_count(data, tapd_client)
@@ -131,15 +148,19 @@ class ReportGenerationService:
             
         return filepath
         
-    def generate_and_save_report(self, data: Dict[str, Any], version: str) -> str:
+    def generate_and_save_report(self, data: Dict[str, Any], version: str,
+                                 offline_bug_stats: Optional[Dict[str, Any]] = None,
+                                 bug_planner: Optional[Any] = None) -> str:
         """生成并保存报告
         
         Args:
             data: 原始数据
             version: 版本号
+            offline_bug_stats: 可选，预先统计的offline_bug__c结果，见generate_report
+            bug_planner: 可选，GroupByPlanner实例，见generate_report
             
         Returns:
             str: 保存的文件路径
         """
-        report = self.generate_report(data, version)
+        report = self.generate_report(data, version, offline_bug_stats, bug_planner)
         return self.save_report_to_file(report, version) 
\ No newline at end of file
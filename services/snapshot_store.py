@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import SNAPSHOT_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+# 快照数据集：增量同步的原始记录、过滤后的结果
+DATASET_SYNC = "sync"
+DATASET_RESULTS = "results"
+
+# 逐页写入时记录先写到 版本号+后缀 的暂存版本下，close时在一个事务内替换正式版本；
+# 暂存版本没有快照元数据，load、versions和load_version都看不到
+STAGING_SUFFIX = "\0staging"
+
+# 建立索引的维度列 -> 记录字段，分析按这些维度分组统计
+DIMENSION_FIELDS = {
+    "team": "dev_team__c__r",
+    "platform": "platform__c",
+    "severity": "severity__c",
+    "status": "status__c",
+    "create_time": "create_time",
+}
+
+
+class SnapshotStore:
+    """按对象、版本和记录ID保存的本地数据快照（SQLite）
+
+    records表保存每条记录的JSON，并把团队、平台、严重程度、状态和创建时间单独存为带索引的列，
+    分析和重新生成报告时可以直接按维度查询或统计，多个版本共存也不需要整表扫描。
+    snapshots表保存每个对象和版本的元数据：
+    - fingerprint: 生成快照时的查询条件指纹，条件变化后快照作废
+    - watermark: 快照中记录的最大last_modified_time（毫秒）
+    - total: 快照的记录数
+    同一个数据库中按数据集区分增量同步的原始记录和过滤后的结果，互不覆盖。
+    """
+
+    def __init__(self, path: str = SNAPSHOT_DB_PATH, dataset: str = DATASET_SYNC):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.dataset = dataset
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshots ("
+            "dataset TEXT NOT NULL, object_api_name TEXT NOT NULL, version TEXT NOT NULL, "
+            "fingerprint TEXT, watermark INTEGER, total INTEGER NOT NULL, updated_at REAL NOT NULL, "
+            "PRIMARY KEY (dataset, object_api_name, version))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "dataset TEXT NOT NULL, object_api_name TEXT NOT NULL, version TEXT NOT NULL, record_id TEXT NOT NULL, "
+            "team TEXT, platform TEXT, severity TEXT, status TEXT, create_time INTEGER, data TEXT NOT NULL, "
+            "PRIMARY KEY (dataset, object_api_name, version, record_id))"
+        )
+        for column in DIMENSION_FIELDS:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_records_{column} "
+                f"ON records (dataset, object_api_name, version, {column})"
+            )
+
+    @staticmethod
+    def _dimension(record: Dict[str, Any], column: str) -> Any:
+        value = record.get(DIMENSION_FIELDS[column])
+        if value is None or column == "create_time":
+            return value
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+    def _rows(self, object_api_name: str, version: str, records: List[Dict[str, Any]],
+              start: int = 0) -> Iterator[Tuple]:
+        for index, record in enumerate(records, start):
+            # 过滤后的结果可能不含_id，按位置生成记录ID
+            record_id = record.get("_id") or f"#{index}"
+            yield (
+                self.dataset, object_api_name, version, str(record_id),
+                *(self._dimension(record, column) for column in DIMENSION_FIELDS),
+                json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+            )
+
+    def load(self, object_api_name: str, version: str) -> Optional[Dict[str, Any]]:
+        """读取快照，不存在时返回None
+
+        Returns:
+            Optional[Dict[str, Any]]: {fingerprint, watermark, total, records}
+        """
+        with self._lock:
+            meta = self._conn.execute(
+                "SELECT fingerprint, watermark, total FROM snapshots "
+                "WHERE dataset = ? AND object_api_name = ? AND version = ?",
+                (self.dataset, object_api_name, version)
+            ).fetchone()
+            if meta is None:
+                return None
+            rows = self._conn.execute(
+                "SELECT data FROM records WHERE dataset = ? AND object_api_name = ? AND version = ? ORDER BY rowid",
+                (self.dataset, object_api_name, version)
+            ).fetchall()
+        return {
+            "fingerprint": meta[0],
+            "watermark": meta[1],
+            "total": meta[2],
+            "records": [json.loads(row[0]) for row in rows]
+        }
+
+    def save(self, object_api_name: str, version: str, snapshot: Dict[str, Any]):
+        """在一个事务内替换对象和版本的全部记录，中途失败不会留下不完整的快照
+
+        Args:
+            object_api_name: 对象API名称
+            version: 版本号
+            snapshot: {records, fingerprint（可选）, watermark（可选）}
+        """
+        records = snapshot["records"]
+        key = (self.dataset, object_api_name, version)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM records WHERE dataset = ? AND object_api_name = ? AND version = ?", key
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO records (dataset, object_api_name, version, record_id, "
+                    "team, platform, severity, status, create_time, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._rows(object_api_name, version, records)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO snapshots (dataset, object_api_name, version, fingerprint, "
+                    "watermark, total, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    key + (snapshot.get("fingerprint"), snapshot.get("watermark"), len(records), time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def writer(self, object_api_name: str, version: str) -> "SnapshotWriter":
+        """逐页写入快照，用于流式处理时不在内存中保留全部记录
+
+        记录写入暂存版本，原有快照在close之前保持不变并可正常读取。写入是否完整由调用方判断：
+        完整时调用close，在一个事务内用暂存的记录替换原有快照；不完整时调用abort丢弃暂存的记录，
+        原有快照保留。进程中途退出留下的暂存记录在下次开始写入时清除。
+
+        Returns:
+            SnapshotWriter: 写入器
+        """
+        self._delete_records(object_api_name, version + STAGING_SUFFIX)
+        return SnapshotWriter(self, object_api_name, version)
+
+    def _delete_records(self, object_api_name: str, version: str):
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM records WHERE dataset = ? AND object_api_name = ? AND version = ?",
+                (self.dataset, object_api_name, version)
+            )
+
+    def _append(self, object_api_name: str, version: str, records: List[Dict[str, Any]], start: int):
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO records (dataset, object_api_name, version, record_id, "
+                    "team, platform, severity, status, create_time, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    self._rows(object_api_name, version, records, start)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _publish(self, object_api_name: str, version: str, total: int,
+                 fingerprint: Optional[str], watermark: Optional[int]):
+        """在一个事务内用暂存版本的记录替换正式版本，并写入快照元数据"""
+        key = (self.dataset, object_api_name, version)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM records WHERE dataset = ? AND object_api_name = ? AND version = ?", key
+                )
+                self._conn.execute(
+                    "UPDATE records SET version = ? WHERE dataset = ? AND object_api_name = ? AND version = ?",
+                    (version, self.dataset, object_api_name, version + STAGING_SUFFIX)
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO snapshots (dataset, object_api_name, version, fingerprint, "
+                    "watermark, total, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    key + (fingerprint, watermark, total, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, object_api_name: str, version: str):
+        """删除快照，下次同步时全量获取"""
+        key = (self.dataset, object_api_name, version)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(
+                    "DELETE FROM records WHERE dataset = ? AND object_api_name = ? AND version = ?", key
+                )
+                self._conn.execute(
+                    "DELETE FROM snapshots WHERE dataset = ? AND object_api_name = ? AND version = ?", key
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def versions(self, object_api_name: Optional[str] = None) -> List[str]:
+        """已保存快照的版本号"""
+        sql = "SELECT DISTINCT version FROM snapshots WHERE dataset = ?"
+        params = [self.dataset]
+        if object_api_name:
+            sql += " AND object_api_name = ?"
+            params.append(object_api_name)
+        with self._lock:
+            return [row[0] for row in self._conn.execute(sql + " ORDER BY version", params)]
+
+    def load_version(self, version: str, exclude: Iterable[str] = ()) -> Dict[str, Dict[str, Any]]:
+        """读取一个版本下全部对象的快照，结构与fetch_multiple_objects_data的结果相同
+
+        Args:
+            version: 版本号
+            exclude: 不读取的对象，例如改用count_by和query统计的大对象
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 对象API名称 -> {dataList, total}
+        """
+        with self._lock:
+            objects = [row[0] for row in self._conn.execute(
+                "SELECT object_api_name FROM snapshots WHERE dataset = ? AND version = ?",
+                (self.dataset, version)
+            )]
+        result = {}
+        for object_api_name in objects:
+            if object_api_name in exclude:
+                continue
+            snapshot = self.load(object_api_name, version)
+            if snapshot is not None:
+                result[object_api_name] = {"dataList": snapshot["records"], "total": snapshot["total"]}
+        return result
+
+    @staticmethod
+    def _where(where: Optional[Dict[str, Any]]) -> Tuple[str, List[Any]]:
+        """按维度列生成过滤条件，值为列表或元组时使用IN"""
+        clauses, params = [], []
+        for column, value in (where or {}).items():
+            if column not in DIMENSION_FIELDS:
+                raise ValueError(f"不支持按 {column} 过滤")
+            if isinstance(value, (list, tuple)):
+                clauses.append(f"{column} IN ({', '.join('?' * len(value))})")
+                params.extend(value)
+            else:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        return "".join(f" AND {clause}" for clause in clauses), params
+
+    def query(self, object_api_name: str, version: str,
+              where: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """按维度过滤并逐条返回记录
+
+        Args:
+            object_api_name: 对象API名称
+            version: 版本号
+            where: 维度列 -> 值（或值列表），例如 {"severity": "fatal", "status": ["新", "已解决"]}
+
+        Yields:
+            Dict[str, Any]: 记录
+        """
+        clause, params = self._where(where)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM records WHERE dataset = ? AND object_api_name = ? AND version = ?"
+                + clause + " ORDER BY rowid",
+                [self.dataset, object_api_name, version] + params
+            ).fetchall()
+        for row in rows:
+            yield json.loads(row[0])
+
+    def count_by(self, object_api_name: str, version: str, dimensions: List[str],
+                 where: Optional[Dict[str, Any]] = None) -> Dict[Tuple, int]:
+        """按维度分组统计记录数
+
+        Args:
+            object_api_name: 对象API名称
+            version: 版本号
+            dimensions: 分组的维度列，例如 ["severity", "status"]
+            where: 维度过滤条件，同query
+
+        Returns:
+            Dict[Tuple, int]: 维度取值元组 -> 记录数
+
+        Raises:
+            ValueError: 未指定维度或维度不在DIMENSION_FIELDS中
+        """
+        if not dimensions:
+            raise ValueError("至少需要一个分组维度")
+        for column in dimensions:
+            if column not in DIMENSION_FIELDS:
+                raise ValueError(f"不支持按 {column} 分组")
+        clause, params = self._where(where)
+        columns = ", ".join(dimensions)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {columns}, COUNT(*) FROM records "
+                "WHERE dataset = ? AND object_api_name = ? AND version = ?"
+                + clause + f" GROUP BY {columns}",
+                [self.dataset, object_api_name, version] + params
+            ).fetchall()
+        return {tuple(row[:-1]): row[-1] for row in rows}
+
+
+class SnapshotWriter:
+    """SnapshotStore的逐页写入器，每页一个事务，记录写入暂存版本，close时替换原有快照"""
+
+    def __init__(self, store: SnapshotStore, object_api_name: str, version: str):
+        self.store = store
+        self.object_api_name = object_api_name
+        self.version = version
+        self.count = 0
+        self.watermark = None
+
+    def write(self, records: List[Dict[str, Any]]):
+        """写入一页记录"""
+        if not records:
+            return
+        self.store._append(self.object_api_name, self.version + STAGING_SUFFIX, records, self.count)
+        self.count += len(records)
+        page_watermark = max((r.get("last_modified_time") or 0 for r in records), default=0)
+        self.watermark = max(self.watermark or 0, page_watermark) or None
+
+    def close(self, fingerprint: Optional[str] = None):
+        """用已写入的记录替换原有快照，之后load读到的是新快照"""
+        self.store._publish(self.object_api_name, self.version, self.count, fingerprint, self.watermark)
+
+    def abort(self):
+        """丢弃已写入的记录，数据不完整时调用，不发布残缺的快照，原有快照保留"""
+        self.store._delete_records(self.object_api_name, self.version + STAGING_SUFFIX)
@@ -0,0 +1,108 @@
+import time
+import threading
+import logging
+from typing import Optional
+from config import TOKEN_REFRESH_MARGIN, TOKEN_REFRESH_RETRY_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class CorpAccessTokenRefresher:
+    """企业访问令牌后台刷新器
+
+    在内存中保存当前令牌及其真实过期时间，后台线程在过期前TOKEN_REFRESH_MARGIN秒换取新令牌并原子替换，
+    请求路径上的调用直接读取内存中的令牌，不会因为令牌过期而同步等待刷新。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CorpAccessTokenRefresher, cls).__new__(cls)
+                    instance._lock = threading.Lock()
+                    instance._current = (None, 0.0)
+                    instance._thread = None
+                    instance._stop_event = threading.Event()
+                    instance._fxk_service = None
+                    cls._instance = instance
+        return cls._instance
+
+    def current_token(self) -> Optional[str]:
+        """获取内存中未过期的令牌
+
+        Returns:
+            Optional[str]: 令牌，不存在或已过期时返回None
+        """
+        token, expires_at = self._current
+        if token and time.time() < expires_at:
+            return token
+        return None
+
+    def publish(self, token: str, expires_in: int):
+        """替换当前令牌
+
+        Args:
+            token: 新令牌
+            expires_in: 令牌有效期（秒），以接口返回为准
+        """
+        with self._lock:
+            self._current = (token, time.time() + expires_in)
+
+    def invalidate(self, token: Optional[str] = None):
+        """令牌被接口判定失效时清除，指定token时只有当前令牌与之相同才清除"""
+        with self._lock:
+            if token is None or self._current[0] == token:
+                self._current = (None, 0.0)
+
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, fxk_service):
+        """启动后台刷新线程，已启动时不重复启动
+
+        Args:
+            fxk_service: FxkService实例，用于换取新令牌
+        """
+        with self._lock:
+            if self.is_running():
+                return
+            self._fxk_service = fxk_service
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="corp-token-refresher", daemon=True)
+            self._thread.start()
+        logger.info("企业访问令牌后台刷新线程已启动")
+
+    def stop(self):
+        """停止后台刷新线程"""
+        self._stop_event.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=5)
+        self._thread = None
+
+    def _seconds_until_refresh(self) -> float:
+        token, expires_at = self._current
+        if not token:
+            return 0
+        return max(expires_at - TOKEN_REFRESH_MARGIN - time.time(), 0)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            wait_time = self._seconds_until_refresh()
+            if wait_time > 0:
+                self._stop_event.wait(wait_time)
+                continue
+            expires_at = self._current[1]
+            try:
+                self._fxk_service.refresh_corp_access_token()
+            except Exception as e:
+                logger.error(f"后台刷新企业访问令牌失败: {str(e)}")
+                self._stop_event.wait(TOKEN_REFRESH_RETRY_INTERVAL)
+                continue
+            if self._current[1] <= expires_at:
+                logger.warning(f"后台刷新未能延长企业访问令牌的有效期，{TOKEN_REFRESH_RETRY_INTERVAL} 秒后重试")
+            else:
+                logger.info("已在后台刷新企业访问令牌")
+            # 刷新没有进展，或接口返回的有效期不超过TOKEN_REFRESH_MARGIN时，至少间隔TOKEN_REFRESH_RETRY_INTERVAL，避免空转
+            self._stop_event.wait(max(self._seconds_until_refresh(), TOKEN_REFRESH_RETRY_INTERVAL))
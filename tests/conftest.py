@@ -0,0 +1,122 @@
+import os
+import sys
+import asyncio
+import json
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+# 测试从仓库根目录导入 utils、services 和 config
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# 服务模块会在当前目录下创建logs/和output/，测试在临时目录中运行
+os.chdir(tempfile.mkdtemp(prefix="testtool-"))
+
+from utils.cache_backends import MemoryCacheBackend
+from utils.credential_manager import CredentialManager
+from utils.redis_client import RedisClient
+from services.token_refresher import CorpAccessTokenRefresher
+
+# test_generate_report.py 是调用线上接口生成报告的手动脚本，不作为单元测试收集
+collect_ignore = ["test_generate_report.py"]
+
+
+class StubServer:
+    """本地HTTP桩服务，所有请求都以status返回body，并记录收到的JSON请求体"""
+
+    def __init__(self):
+        self.status = 200
+        self.body = b'{"errorCode": 0, "errorMessage": "success"}'
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _reply(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    server.requests.append(json.loads(self.rfile.read(length)))
+                self.send_response(server.status)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def http_server():
+    server = StubServer()
+    yield server
+    server.shutdown()
+
+
+@pytest.fixture
+def background_loop():
+    """在后台线程中运行的事件循环，用于模拟事件循环切换"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+@pytest.fixture
+def memory_cache():
+    """将共享缓存客户端切换为进程内缓存，并清空凭证的进程内缓存和内存中的令牌，测试结束后恢复"""
+    client = RedisClient()
+    original = client.backend
+    backend = MemoryCacheBackend()
+    client.use_backend(backend)
+    CredentialManager().local.clear()
+    CorpAccessTokenRefresher().invalidate()
+    yield backend
+    client.use_backend(original)
+    CredentialManager().local.clear()
+    CorpAccessTokenRefresher().invalidate()
+
+
+@pytest.fixture
+def data_service(tmp_path):
+    """使用内存中自定义对象服务的CustomObjectDataService，快照保存在临时目录"""
+    from fake_services import FakeCustomObjectService
+    from services.custom_object_data_service import CustomObjectDataService
+    from services.snapshot_store import SnapshotStore
+
+    service = CustomObjectDataService("13800000000", custom_object_service=FakeCustomObjectService())
+    service.snapshot_store = SnapshotStore(str(tmp_path / "snapshots.db"))
+    return service
+
+
+@pytest.fixture
+def multi_fetch(data_service, memory_cache, monkeypatch):
+    """fetch_multiple_objects_data为各对象新建的服务替换为data_service使用的内存服务"""
+    import services.custom_object_data_service as data_module
+
+    class StubFxkService:
+        def get_corp_access_token(self):
+            return "token"
+
+        def warm_user_ids(self, mobiles):
+            return {}
+
+    fake = data_service.custom_object_service
+    monkeypatch.setattr(data_module, "FxkService", StubFxkService)
+    monkeypatch.setattr(data_module, "FxkApiClient", lambda: None)
+    monkeypatch.setattr(data_module, "CustomObjectService", lambda fxk_service, api_client, retry_budget=None: fake)
+    return data_service
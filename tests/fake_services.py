@@ -0,0 +1,68 @@
+import threading
+from typing import Any, Dict, List, Optional
+from services.interfaces import ICustomObjectService
+
+
+def _matches(record: Dict[str, Any], condition: Dict[str, Any]) -> bool:
+    value = record.get(condition["field_name"])
+    values = condition.get("field_values", [])
+    operator = condition["operator"]
+    if operator == "EQ":
+        return value == values[0]
+    if operator == "N":
+        return value != values[0]
+    if operator == "GT":
+        return value is not None and value > values[0]
+    if operator == "GTE":
+        return value is not None and value >= values[0]
+    if operator == "BETWEEN":
+        return value is not None and values[0] <= value <= values[1]
+    if operator == "ISN":
+        return value is not None
+    raise ValueError(f"不支持的操作符: {operator}")
+
+
+class FakeCustomObjectService(ICustomObjectService):
+    """内存中的自定义对象服务，支持过滤、排序、字段投影和按偏移量分页
+
+    fail_offsets中的偏移量（或fail为True时的全部请求）返回格式不正确的结果，模拟分页获取失败。
+    """
+
+    def __init__(self, objects: Optional[Dict[str, List[Dict[str, Any]]]] = None):
+        self.objects = objects or {}
+        self.fail_offsets = set()
+        self.fail = False
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def set_corp_access_token(self, token: str) -> None:
+        pass
+
+    def get_custom_object_by_id(self, object_api_name: str, object_id: str, mobile: str) -> Dict[str, Any]:
+        return next((r for r in self.objects.get(object_api_name, []) if r["_id"] == object_id), {})
+
+    def query_custom_objects(self, data_object_api_name: str, mobile: str,
+                             filters: Optional[List[Dict[str, Any]]] = None,
+                             orders: Optional[List[Dict[str, Any]]] = None,
+                             limit: int = 100, offset: int = 0,
+                             find_explicit_total_num: str = "false",
+                             fields: Optional[List[str]] = None,
+                             use_cache: bool = True) -> Dict[str, Any]:
+        with self._lock:
+            self.calls.append({
+                "object_api_name": data_object_api_name, "filters": filters, "orders": orders,
+                "limit": limit, "offset": offset, "fields": fields
+            })
+        if self.fail or offset in self.fail_offsets:
+            return {"errorCode": -1}
+
+        records = [
+            r for r in self.objects.get(data_object_api_name, [])
+            if all(_matches(r, condition) for condition in filters or [])
+        ]
+        for order in reversed(orders or []):
+            records.sort(key=lambda r: r.get(order["field_name"]), reverse=not order["is_asc"])
+        page = records[offset:offset + limit]
+        if fields:
+            page = [{field: r.get(field) for field in fields} for r in page]
+        return {"data": {"dataList": page, "total": len(records)}}
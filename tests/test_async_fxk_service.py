@@ -0,0 +1,106 @@
+import asyncio
+import gc
+import fakeredis
+import pytest
+from services.async_fxk_service import AsyncFxkService
+from utils.api_response import ApiResponse
+from utils.async_redis_client import AsyncRedisClient
+from utils.retry_policy import RetryPolicy, RetryBudget, TOKEN_EXPIRED_CODE
+
+
+class _FakeAsyncApiClient:
+    def __init__(self, query_responses):
+        self.query_responses = list(query_responses)
+        self.tokens = []
+
+    async def get_corp_access_token(self):
+        token = f"token-{len(self.tokens)}"
+        self.tokens.append(token)
+        return ApiResponse(0, "", {"corpAccessToken": token, "expiresIn": 7200, "corpId": "corp"})
+
+    async def get_corp_id(self):
+        return "corp"
+
+    async def get_user_id_by_mobile(self, corp_access_token, mobile, corp_id=None):
+        return ApiResponse(0, "", {"empList": [{"openUserId": f"FSUID_{mobile}"}]})
+
+    async def query_custom_object(self, corp_access_token, **kwargs):
+        return self.query_responses.pop(0)
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def async_service(memory_cache, monkeypatch):
+    def make(query_responses):
+        service = AsyncFxkService(api_client=_FakeAsyncApiClient(query_responses))
+        service.retry_policy = RetryPolicy(base_delay=0, max_delay=0, budget=RetryBudget(100))
+        monkeypatch.setattr(service.directory, "get_open_user_id", lambda mobile: None)
+        monkeypatch.setattr(service.directory, "upsert", lambda user_id, mobile: None)
+        return service
+
+    yield make
+    client = AsyncRedisClient()
+    client._client = None
+    client._loop = None
+
+
+def test_query_retries_through_policy(async_service):
+    page = {"dataList": [{"_id": "1"}], "total": 1}
+    service = async_service([ApiResponse(TOKEN_EXPIRED_CODE, "expired"), ApiResponse(-1, "reset"), ApiResponse(0, "", page)])
+
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        return await service.query_custom_objects("offline_bug__c", "13800000000")
+
+    assert asyncio.run(run()) == page
+    # 令牌过期后清除了失效令牌，第二次尝试重新获取
+    assert service.api_client.tokens == ["token-0", "token-1"]
+
+
+def test_query_failure_returns_empty_page(async_service):
+    service = async_service([ApiResponse(10005, "no permission")])
+
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        return await service.query_custom_objects("offline_bug__c", "13800000000")
+
+    assert asyncio.run(run()) == {"dataList": [], "total": 0}
+    assert service.api_client.query_responses == []
+
+
+def test_user_id_locks_are_released(async_service):
+    service = async_service([])
+
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        return await asyncio.gather(*(service.get_user_id_by_mobile(f"1380000000{i}") for i in range(5)))
+
+    assert asyncio.run(run()) == [f"FSUID_1380000000{i}" for i in range(5)]
+    gc.collect()
+    assert len(service._user_id_locks) == 0
+
+
+def test_locks_are_recreated_for_new_event_loop(async_service):
+    service = async_service([])
+
+    async def contend():
+        # 有协程等待时锁才绑定到当前事件循环
+        service._ensure_locks()
+        async with service._token_lock:
+            waiter = asyncio.ensure_future(service._token_lock.acquire())
+            await asyncio.sleep(0)
+        await waiter
+        service._token_lock.release()
+        return service._token_lock
+
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        token = await service.get_corp_access_token(force_refresh=True)
+        return token, service._token_lock
+
+    old_lock = asyncio.run(contend())
+    token, new_lock = asyncio.run(run())
+    assert token == "token-0"
+    assert new_lock is not old_lock
@@ -0,0 +1,91 @@
+import asyncio
+from utils.async_http_client import AsyncHttpClient
+
+
+def test_post_parses_response(http_server):
+    client = AsyncHttpClient()
+
+    async def run():
+        try:
+            return await client.post(f"{http_server.url}/cgi/test", {"a": 1})
+        finally:
+            await client.close()
+
+    response = asyncio.run(run())
+    assert response.is_success()
+    assert http_server.requests == [{"a": 1}]
+
+
+def test_post_keeps_raw_response_on_decode_failure(http_server):
+    http_server.body = b"<html>bad gateway</html>"
+    client = AsyncHttpClient()
+
+    async def run():
+        try:
+            return await client.post(http_server.url, {})
+        finally:
+            await client.close()
+
+    response = asyncio.run(run())
+    assert response.code == -1
+    assert response.data["raw_response"] == "<html>bad gateway</html>"
+
+
+def test_session_of_previous_loop_is_closed(http_server, background_loop):
+    client = AsyncHttpClient()
+    asyncio.run_coroutine_threadsafe(client.post(http_server.url, {}), background_loop).result(5)
+    old_session = client._session
+
+    async def run():
+        try:
+            await client.post(http_server.url, {})
+            return client._session
+        finally:
+            await client.close()
+
+    new_session = asyncio.run(run())
+    assert new_session is not old_session
+    # 旧会话在它所属的事件循环上关闭
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), background_loop).result(5)
+    assert old_session.closed
+
+
+def test_session_of_closed_loop_is_replaced(http_server, caplog):
+    client = AsyncHttpClient()
+    asyncio.run(client.post(http_server.url, {}))
+    old_session = client._session
+
+    async def run():
+        try:
+            return (await client.post(http_server.url, {})), client._session
+        finally:
+            await client.close()
+
+    response, new_session = asyncio.run(run())
+    assert response.is_success()
+    assert new_session is not old_session
+    assert "事件循环已关闭" in caplog.text
+
+
+def test_session_of_idle_loop_is_closed_without_running_it(http_server):
+    client = AsyncHttpClient()
+    idle_loop = asyncio.new_event_loop()
+    try:
+        idle_loop.run_until_complete(client.post(http_server.url, {}))
+        old_session = client._session
+        connector = old_session.connector
+
+        async def run():
+            try:
+                await client.post(http_server.url, {})
+                return client._session
+            finally:
+                await client.close()
+
+        new_session = asyncio.run(run())
+        assert new_session is not old_session
+        # 旧循环没有运行，连接器被直接关闭而不是等待旧循环执行关闭协程
+        assert old_session.closed
+        assert connector.closed
+    finally:
+        idle_loop.close()
@@ -0,0 +1,78 @@
+import asyncio
+import fakeredis
+import pytest
+from utils.async_redis_client import AsyncRedisClient
+from utils.redis_client import RedisClient
+
+
+class _ClosableClient:
+    def __init__(self):
+        self.closed = False
+
+    async def aclose(self):
+        self.closed = True
+
+
+@pytest.fixture
+def async_redis():
+    client = AsyncRedisClient()
+    backend = client.backend
+    client.use_backend(None)
+    yield client
+    client.use_backend(backend)
+    client._client = None
+    client._loop = None
+
+
+def test_basic_commands(async_redis):
+    async def run():
+        async_redis.client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        await async_redis.set("k1", "v1", 60)
+        await async_redis.mset({"k2": "v2", "k3": "v3"}, expire_time=60)
+        values = await async_redis.mget(["k1", "k2", "missing"])
+        keys = sorted(await async_redis.keys("k*"))
+        deleted = await async_redis.delete_many(["k1", "k2"])
+        return values, keys, deleted, await async_redis.ttl("k3")
+
+    values, keys, deleted, ttl = asyncio.run(run())
+    assert values == ["v1", "v2", None]
+    assert keys == ["k1", "k2", "k3"]
+    assert deleted == 2
+    assert 0 < ttl <= 60
+
+
+def test_client_of_previous_loop_is_closed(async_redis, background_loop):
+    old_client = _ClosableClient()
+
+    async def install():
+        async_redis.client = old_client
+
+    asyncio.run_coroutine_threadsafe(install(), background_loop).result(5)
+
+    async def run():
+        async_redis.client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        await async_redis.set("k", "v")
+        return await async_redis.get("k")
+
+    assert asyncio.run(run()) == "v"
+    asyncio.run_coroutine_threadsafe(asyncio.sleep(0), background_loop).result(5)
+    assert old_client.closed
+
+
+def test_local_backend_is_shared_with_sync_client(async_redis, memory_cache):
+    async_redis.use_backend(memory_cache)
+    RedisClient().set("k1", "v1", 60)
+
+    async def run():
+        await async_redis.mset({"k2": "v2"}, expire_time=30)
+        value, ttl = await async_redis.pipeline().get("k1").ttl("k1").execute()
+        keys = sorted([key async for key in async_redis.scan_iter("k*")])
+        return value, ttl, keys
+
+    value, ttl, keys = asyncio.run(run())
+    assert value == "v1"
+    assert 0 < ttl <= 60
+    assert keys == ["k1", "k2"]
+    assert RedisClient().get("k2") == "v2"
+    # 使用本地后端时不会创建Redis连接
+    assert async_redis._client is None
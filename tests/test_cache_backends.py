@@ -0,0 +1,91 @@
+import fakeredis
+import redis
+from config import TOKEN_CACHE_KEY
+from utils.cache_backends import MemoryCacheBackend, RedisCacheBackend, TieredCacheBackend
+from utils.credential_manager import CredentialManager
+from utils.redis_client import RedisClient
+
+
+def _tiered(local_ttl=300):
+    remote = RedisCacheBackend(fakeredis.FakeRedis(decode_responses=True))
+    return TieredCacheBackend(MemoryCacheBackend(), remote, local_ttl=local_ttl, retry_interval=60), remote
+
+
+def test_backfill_is_capped_at_remote_ttl():
+    tiered, remote = _tiered()
+    remote.set("short", "1", 5)
+    remote.set("persistent", "2")
+
+    assert tiered.get("short") == "1"
+    assert tiered.mget(["persistent", "missing"]) == ["2", None]
+    assert 0 < tiered.local.ttl("short") <= 5
+    assert 5 < tiered.local.ttl("persistent") <= 300
+
+
+def test_remote_failure_degrades_to_local():
+    tiered, remote = _tiered()
+    tiered.set("k", "v", 60)
+
+    def unavailable(*args, **kwargs):
+        raise redis.exceptions.ConnectionError("down")
+
+    remote.client.get = unavailable
+    remote.client.pipeline = unavailable
+    assert tiered.get("k") == "v"
+    assert tiered.get("missing") is None
+    assert not tiered.remote_available()
+
+
+def test_pipeline_is_one_remote_round_trip_and_backfills_local():
+    tiered, remote = _tiered()
+    remote.set("a", "1", 5)
+    remote.set("b", "2")
+    executed = []
+    original = remote.client.pipeline
+
+    def pipeline(*args, **kwargs):
+        pipe = original(*args, **kwargs)
+        execute = pipe.execute
+        pipe.execute = lambda: executed.append(1) or execute()
+        return pipe
+
+    remote.client.pipeline = pipeline
+    direct_get = remote.client.get
+    remote.client.get = lambda key: executed.append(key) or direct_get(key)
+
+    replies = tiered.pipeline().get("a").ttl("a").get("b").get("missing").set("c", "3", 30).execute()
+
+    assert executed == [1]
+    assert replies[0] == "1" and replies[2:4] == ["2", None]
+    assert 0 < tiered.local.ttl("a") <= 5
+    assert 5 < tiered.local.ttl("b") <= 300
+    assert tiered.local.get("missing") is None
+    assert tiered.local.get("c") == "3" and remote.get("c") == "3"
+
+
+def test_pipeline_runs_locally_when_remote_is_down():
+    tiered, remote = _tiered()
+    tiered.set("k", "v", 60)
+
+    def unavailable(*args, **kwargs):
+        raise redis.exceptions.ConnectionError("down")
+
+    remote.client.pipeline = unavailable
+    assert tiered.pipeline().get("k").get("missing").execute() == ["v", None]
+    assert not tiered.remote_available()
+
+
+def test_credentials_skip_the_tiered_local_layer(memory_cache):
+    tiered, remote = _tiered()
+    client = RedisClient()
+    client.use_backend(tiered)
+    remote.set(TOKEN_CACHE_KEY, "token", 30)
+    credentials = CredentialManager()
+
+    assert credentials.get_corp_access_token() == "token"
+    assert tiered.local.get(TOKEN_CACHE_KEY) is None
+
+    # 失效后进程内和Redis中都不再可见，不会从本地层继续返回
+    credentials.invalidate_corp_access_token("token")
+    assert remote.get(TOKEN_CACHE_KEY) is None
+    assert credentials.get_corp_access_token() is None
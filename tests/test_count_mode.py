@@ -0,0 +1,78 @@
+import json
+import pytest
+from services.custom_object_data_service import MODE_COUNT
+from services.custom_object_service import CustomObjectService
+from utils.fxk_api_client import FxkApiClient
+
+
+class StubFxkService:
+    def get_corp_access_token(self):
+        return "token"
+
+    def get_user_id_by_mobile(self, mobile):
+        return "FSUID_1"
+
+    def invalidate_corp_access_token(self, token=None):
+        pass
+
+
+@pytest.fixture
+def fake(data_service):
+    fake = data_service.custom_object_service
+    fake.objects["object_y31e4__c"] = [{"_id": f"gray{i}", "create_time": 1000 + i * 100} for i in range(300)]
+    return fake
+
+
+def test_count_object_data_fetches_no_records(data_service, fake):
+    filters = [{"field_name": "create_time", "field_values": [1500], "operator": "GTE"}]
+
+    data = data_service.count_object_data("object_y31e4__c", filters=filters, use_cache=False)
+
+    assert data == {"dataList": [], "total": 295, "count_only": True}
+    assert len(fake.calls) == 1
+    assert fake.calls[0]["limit"] == 1
+    assert fake.calls[0]["filters"] == filters
+
+
+def test_count_object_data_reports_zero_on_failure(data_service, fake):
+    fake.fail = True
+
+    data = data_service.count_object_data("object_y31e4__c", use_cache=False)
+
+    assert data["total"] == 0
+    assert data["error"]
+    assert not data_service.is_complete(data)
+
+
+def test_count_mode_in_multiple_objects(multi_fetch, fake):
+    fake.objects["offline_bug__c"] = [{"_id": f"bug{i}"} for i in range(150)]
+
+    result = multi_fetch.fetch_multiple_objects_data([
+        {"object_api_name": "object_y31e4__c", "mode": MODE_COUNT},
+        {"object_api_name": "offline_bug__c"}
+    ])
+
+    assert result["object_y31e4__c"] == {"dataList": [], "total": 300, "count_only": True}
+    assert len(result["offline_bug__c"]["dataList"]) == 150
+    gray_calls = [call for call in fake.calls if call["object_api_name"] == "object_y31e4__c"]
+    assert [call["limit"] for call in gray_calls] == [1]
+
+
+@pytest.mark.parametrize("filters", [None, [{"field_name": "version__c", "field_values": ["9.5.0"], "operator": "EQ"}]])
+def test_count_query_passes_api_client_validation(http_server, memory_cache, filters):
+    http_server.body = json.dumps({"errorCode": 0, "data": {"total": 42, "dataList": [{"_id": "1"}]}}).encode()
+    client = FxkApiClient()
+    client.base_url = f"{http_server.url}/cgi"
+    client._corp_id = "corp"
+    service = CustomObjectService(fxk_service=StubFxkService(), api_client=client)
+
+    total = service.count_custom_objects("object_y31e4__c", "13800000000", filters, use_cache=False)
+
+    assert total == 42
+    assert len(http_server.requests) == 1
+    search_query_info = http_server.requests[0]["data"]["search_query_info"]
+    assert search_query_info["limit"] == 1
+    assert search_query_info["filters"]
+    assert search_query_info["orders"]
+    if filters:
+        assert search_query_info["filters"] == filters
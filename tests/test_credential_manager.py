@@ -0,0 +1,73 @@
+import asyncio
+import fakeredis
+import pytest
+from config import CREDENTIAL_LOCAL_TTL, USER_ID_CACHE_KEY
+from utils.async_redis_client import AsyncRedisClient
+from utils.credential_manager import CredentialManager, AsyncCredentialManager
+from utils.redis_client import RedisClient
+
+
+def test_set_writes_both_tiers(memory_cache):
+    credentials = CredentialManager()
+    credentials.set_corp_id("corp")
+
+    assert credentials.local.get("fxk_corp_id") == "corp"
+    assert RedisClient().get("fxk_corp_id") == "corp"
+    assert credentials.local.ttl("fxk_corp_id") <= CREDENTIAL_LOCAL_TTL
+
+
+def test_backfill_does_not_outlive_redis_ttl(memory_cache):
+    RedisClient().set("fxk_corp_access_token", "token", 5)
+    credentials = CredentialManager()
+
+    assert credentials.get_corp_access_token() == "token"
+    assert 0 <= credentials.local.ttl("fxk_corp_access_token") <= 5
+
+
+def test_backfill_without_redis_expiry_uses_local_ttl(memory_cache):
+    RedisClient().set("fxk_corp_id", "corp")
+    credentials = CredentialManager()
+
+    assert credentials.get_corp_id() == "corp"
+    assert 5 < credentials.local.ttl("fxk_corp_id") <= CREDENTIAL_LOCAL_TTL
+
+
+def test_get_many_backfills_with_redis_ttl(memory_cache):
+    RedisClient().set(f"{USER_ID_CACHE_KEY}:13800000001", "FSUID_1", 3)
+    RedisClient().set(f"{USER_ID_CACHE_KEY}:13800000002", "FSUID_2")
+    credentials = CredentialManager()
+
+    user_ids = credentials.get_user_ids(["13800000001", "13800000002", "13800000003"])
+
+    assert user_ids == {"13800000001": "FSUID_1", "13800000002": "FSUID_2", "13800000003": None}
+    assert credentials.local.ttl(f"{USER_ID_CACHE_KEY}:13800000001") <= 3
+    assert credentials.local.ttl(f"{USER_ID_CACHE_KEY}:13800000002") > 3
+
+
+def test_invalidate_token_only_when_unchanged(memory_cache):
+    credentials = CredentialManager()
+    credentials.set_corp_access_token("new", 7200)
+
+    credentials.invalidate_corp_access_token("old")
+    assert credentials.get_corp_access_token() == "new"
+
+    credentials.invalidate_corp_access_token("new")
+    assert credentials.get_corp_access_token() is None
+
+
+@pytest.fixture
+def async_credentials(memory_cache):
+    yield AsyncCredentialManager()
+    client = AsyncRedisClient()
+    client._client = None
+    client._loop = None
+
+
+def test_async_backfill_does_not_outlive_redis_ttl(async_credentials):
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        await AsyncRedisClient().set("fxk_corp_access_token", "token", 4)
+        return await async_credentials.get_corp_access_token()
+
+    assert asyncio.run(run()) == "token"
+    assert 0 <= async_credentials.local.ttl("fxk_corp_access_token") <= 4
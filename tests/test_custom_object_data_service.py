@@ -0,0 +1,154 @@
+import pytest
+
+
+def _bugs(count):
+    return [{"_id": f"bug{i:05d}", "create_time": 1000 + i, "severity__c": "normal"} for i in range(count)]
+
+
+@pytest.fixture
+def fake(data_service):
+    fake = data_service.custom_object_service
+    fake.objects["offline_bug__c"] = _bugs(450)
+    return fake
+
+
+def test_offset_pages_are_joined_in_order(data_service, fake):
+    data = data_service.fetch_object_data(
+        "offline_bug__c", orders=[{"field_name": "create_time", "is_asc": True}], limit=100, use_cache=False
+    )
+
+    assert data["total"] == 450
+    assert [r["_id"] for r in data["dataList"]] == [r["_id"] for r in fake.objects["offline_bug__c"]]
+    assert data["failed_pages"] == []
+    assert sorted(call["offset"] for call in fake.calls) == [0, 100, 200, 300, 400]
+
+
+def test_failed_pages_are_reported(data_service, fake):
+    fake.fail_offsets = {200, 400}
+
+    data = data_service.fetch_object_data(
+        "offline_bug__c", orders=[{"field_name": "create_time", "is_asc": True}], limit=100, use_cache=False
+    )
+
+    assert data["total"] == 450
+    assert len(data["dataList"]) == 300
+    assert data["failed_pages"] == [200, 400]
+
+
+def test_failed_first_page_is_reported(data_service, fake):
+    fake.fail_offsets = {0}
+
+    data = data_service.fetch_object_data("offline_bug__c", limit=100, use_cache=False)
+
+    assert data == {"dataList": [], "total": 0, "failed_pages": [0]}
+
+
+def test_fields_are_pushed_down(data_service, fake):
+    data = data_service.fetch_object_data("offline_bug__c", limit=100, fields=["_id"], use_cache=False)
+
+    assert all(call["fields"] == ["_id"] for call in fake.calls)
+    assert data["dataList"][0] == {"_id": "bug00000"}
+
+
+def test_keyset_pagination_handles_hot_timestamps(data_service, fake):
+    # 250条记录的创建时间相同，超过两页
+    records = _bugs(100) + [{"_id": f"hot{i:03d}", "create_time": 5000} for i in range(250)] + [
+        {"_id": f"late{i:03d}", "create_time": 6000 + i} for i in range(30)
+    ]
+    fake.objects["offline_bug__c"] = records
+
+    data = data_service.fetch_object_data("offline_bug__c", limit=100, pagination="keyset", use_cache=False)
+
+    ids = [r["_id"] for r in data["dataList"]]
+    assert data["total"] == 380
+    assert data["failed_pages"] == []
+    assert len(ids) == len(set(ids)) == 380
+    assert ids == [r["_id"] for r in sorted(records, key=lambda r: (r["create_time"], r["_id"]))]
+    assert all(call["offset"] == 0 or call["filters"][-1]["operator"] == "EQ" for call in fake.calls)
+
+
+def test_keyset_pagination_reports_failure(data_service, fake, monkeypatch):
+    original = fake.query_custom_objects
+
+    def query(*args, **kwargs):
+        if kwargs.get("filters"):
+            return {"errorCode": -1}
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(fake, "query_custom_objects", query)
+
+    data = data_service.fetch_object_data("offline_bug__c", limit=100, pagination="keyset", use_cache=False)
+
+    assert len(data["dataList"]) == 100
+    assert data["failed_pages"] == [100]
+
+
+def _partition_records():
+    # 创建时间分布在较宽的范围内，超过单个区间的记录数上限
+    return [{"_id": f"bug{i:05d}", "create_time": 1000 + i * 10, "severity__c": "normal"} for i in range(450)]
+
+
+@pytest.fixture
+def partition_fake(fake, monkeypatch):
+    import services.custom_object_data_service as data_module
+    monkeypatch.setattr(data_module, "PARTITION_MAX_RECORDS", 100)
+    fake.objects["offline_bug__c"] = _partition_records()
+    return fake
+
+
+def _fetch_partitioned(data_service):
+    return data_service.fetch_object_data(
+        "offline_bug__c", orders=[{"field_name": "create_time", "is_asc": True}], limit=40,
+        fields=["severity__c"], pagination="partition", use_cache=False
+    )
+
+
+def test_partitions_are_paged_until_short_page(data_service, partition_fake):
+    data = _fetch_partitioned(data_service)
+
+    assert data["total"] == 450
+    assert data["failed_pages"] == []
+    assert [r["_id"] for r in data["dataList"]] == [r["_id"] for r in partition_fake.objects["offline_bug__c"]]
+    page_calls = [call for call in partition_fake.calls if call["limit"] == 40]
+    assert all(call["offset"] < 100 + 40 for call in page_calls)
+    assert all("_id" in call["fields"] for call in page_calls)
+
+
+def test_failed_partition_count_does_not_drop_records(data_service, partition_fake, monkeypatch):
+    original = partition_fake.query_custom_objects
+    failed = []
+
+    def query(*args, **kwargs):
+        filters = kwargs.get("filters") or []
+        if kwargs["limit"] == 1 and filters and not failed:
+            failed.append(filters[-1]["field_values"])
+            return {"errorCode": -1}
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(partition_fake, "query_custom_objects", query)
+
+    data = _fetch_partitioned(data_service)
+
+    assert failed
+    assert len(data["dataList"]) == 450
+    assert data["failed_pages"] == []
+
+
+def test_failed_partition_page_is_reported(data_service, partition_fake):
+    partition_fake.fail_offsets = {40}
+
+    data = _fetch_partitioned(data_service)
+
+    assert data["failed_pages"]
+    assert all(page["offset"] == 40 for page in data["failed_pages"])
+    assert len(data["dataList"]) < 450
+
+
+def test_keyset_pagination_with_field_projection(data_service, fake):
+    data = data_service.fetch_object_data(
+        "offline_bug__c", limit=100, fields=["severity__c"], pagination="keyset", use_cache=False
+    )
+
+    assert len(data["dataList"]) == 450
+    assert data["failed_pages"] == []
+    assert all(set(call["fields"]) == {"severity__c", "create_time", "_id"} for call in fake.calls)
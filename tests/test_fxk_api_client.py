@@ -0,0 +1,38 @@
+import json
+from utils.fxk_api_client import FxkApiClient, BaseFxkApiClient
+
+
+SEARCH_QUERY_INFO = {"limit": 100, "offset": 0, "filters": [], "orders": []}
+
+
+def test_field_projection_adds_base_and_system_fields():
+    projection = BaseFxkApiClient._build_field_projection(["dev_team__c__r", "severity__c", "platform__c__o"])
+    assert projection == [
+        "dev_team__c", "dev_team__c__r", "severity__c", "platform__c", "platform__c__o",
+        "_id", "create_time", "last_modified_time"
+    ]
+
+
+def test_request_without_fields_has_no_projection():
+    _, data = BaseFxkApiClient()._build_query_custom_object_request(
+        "token", "FSUID_1", "offline_bug__c", SEARCH_QUERY_INFO, "true", "corp"
+    )
+    assert "fieldProjection" not in data["data"]
+
+
+def test_query_pushes_projection_down(http_server):
+    http_server.body = json.dumps({
+        "errorCode": 0,
+        "data": {"total": 1, "dataList": [{"_id": "1", "severity__c": "fatal", "description__c": "很长的描述"}]}
+    }).encode()
+    client = FxkApiClient()
+    client.base_url = f"{http_server.url}/cgi"
+
+    response = client.query_custom_object(
+        "token", "FSUID_1", "offline_bug__c", SEARCH_QUERY_INFO, corp_id="corp", fields=["severity__c"]
+    )
+
+    assert http_server.requests[0]["data"]["fieldProjection"] == [
+        "severity__c", "_id", "create_time", "last_modified_time"
+    ]
+    assert response.data["data"]["dataList"] == [{"_id": "1", "severity__c": "fatal"}]
@@ -0,0 +1,53 @@
+import asyncio
+import fakeredis
+from services.async_fxk_service import AsyncFxkService
+from services.fxk_service import FxkService
+from utils.api_response import ApiResponse
+from utils.async_redis_client import AsyncRedisClient
+
+
+def test_user_id_lookup_does_not_sync_directory(memory_cache, monkeypatch):
+    service = FxkService()
+    service.token_refresher.publish("token", 7200)
+    requested = []
+
+    def sync(fxk_service):
+        raise AssertionError("请求路径上不应全量同步通讯录")
+
+    def get_user_id_by_mobile(token, mobile, corp_id=None):
+        requested.append(mobile)
+        return ApiResponse(0, "", {"empList": [{"openUserId": "FSUID_1"}]})
+
+    monkeypatch.setattr(service.directory, "get_open_user_id", lambda mobile: None)
+    monkeypatch.setattr(service.directory, "upsert", lambda user_id, mobile: None)
+    monkeypatch.setattr(service.directory, "sync", sync)
+    monkeypatch.setattr(service.api_client, "get_user_id_by_mobile", get_user_id_by_mobile)
+    monkeypatch.setattr(service.api_client, "get_corp_id", lambda: "corp")
+
+    assert service.get_user_id_by_mobile("13800000000") == "FSUID_1"
+    # 第二次从缓存返回
+    assert service.get_user_id_by_mobile("13800000000") == "FSUID_1"
+    assert requested == ["13800000000"]
+
+
+def test_async_directory_lookup_runs_off_the_event_loop(memory_cache, monkeypatch):
+    service = AsyncFxkService(api_client=object())
+
+    def get_open_user_id(mobile):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return "FSUID_1"
+        raise AssertionError("通讯录查询不应在事件循环中执行")
+
+    monkeypatch.setattr(service.directory, "get_open_user_id", get_open_user_id)
+
+    async def run():
+        AsyncRedisClient().client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+        return await service.get_user_id_by_mobile("13800000000")
+
+    try:
+        assert asyncio.run(run()) == "FSUID_1"
+    finally:
+        AsyncRedisClient()._client = None
+        AsyncRedisClient()._loop = None
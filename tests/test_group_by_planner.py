@@ -0,0 +1,111 @@
+import pytest
+from services.data_analysis_service import DataAnalysisService
+from services.group_by_planner import GroupByPlanner, PLAN_COUNTS, PLAN_ROWS
+
+SEVERITIES = ["fatal", "serious", "normal", "advice"]
+STATUSES = ["新", "已解决", "已关闭"]
+DIMENSIONS = {"severity__c": SEVERITIES, "status__c": STATUSES}
+VERSION_FILTER = {"field_name": "version__c", "field_values": ["9.5.0"], "operator": "EQ"}
+
+
+def _bugs(count):
+    return [
+        {
+            "_id": f"bug{i:05d}", "create_time": 1000 + i, "version__c": "9.5.0",
+            "severity__c": SEVERITIES[i % 4], "status__c": STATUSES[i % 3],
+            "dev_team__c": "team", "dev_team__c.name": "售中团队", "platform__c": "Android"
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake(data_service):
+    return data_service.custom_object_service
+
+
+@pytest.fixture
+def planner(fake):
+    return GroupByPlanner(fake, "13800000000", page_size=100)
+
+
+def test_tie_on_requests_is_broken_by_bytes(planner):
+    costs = planner.estimate(1200, DIMENSIONS)
+
+    # 都包括先取总数的一次计数查询
+    assert costs[PLAN_COUNTS]["requests"] == costs[PLAN_ROWS]["requests"] == 1 + 12
+    assert costs[PLAN_COUNTS]["bytes"] < costs[PLAN_ROWS]["bytes"]
+    assert planner.choose(1200, DIMENSIONS) == PLAN_COUNTS
+
+
+def test_fewer_pages_than_cells_chooses_rows(planner):
+    assert planner.choose(1100, DIMENSIONS) == PLAN_ROWS
+    assert planner.choose(1300, DIMENSIONS) == PLAN_COUNTS
+
+
+def test_cell_counts_append_eq_filter_per_dimension(planner, fake):
+    fake.objects["offline_bug__c"] = _bugs(1500)
+
+    counts = planner.count_by("offline_bug__c", DIMENSIONS, [VERSION_FILTER])
+
+    # 一次limit=1的查询取得总数，随后每个分组一次计数查询
+    assert len(fake.calls) == 1 + 12
+    assert all(call["limit"] == 1 and call["orders"] for call in fake.calls)
+    cell_filters = sorted(
+        (call["filters"] for call in fake.calls[1:]),
+        key=lambda filters: (SEVERITIES.index(filters[1]["field_values"][0]), STATUSES.index(filters[2]["field_values"][0]))
+    )
+    assert cell_filters == [
+        [
+            VERSION_FILTER,
+            {"field_name": "severity__c", "field_values": [severity], "operator": "EQ"},
+            {"field_name": "status__c", "field_values": [status], "operator": "EQ"}
+        ]
+        for severity in SEVERITIES for status in STATUSES
+    ]
+    assert sum(counts.values()) == 1500
+    assert counts[("fatal", "新")] == 125
+
+
+def test_rows_plan_downloads_group_fields_only(planner, fake):
+    fake.objects["offline_bug__c"] = _bugs(450)
+
+    counts = planner.count_by("offline_bug__c", DIMENSIONS, [VERSION_FILTER])
+
+    assert fake.calls[0]["limit"] == 1
+    page_calls = fake.calls[1:]
+    assert sorted(call["offset"] for call in page_calls) == [0, 100, 200, 300, 400]
+    assert all(call["limit"] == 100 and call["fields"] == ["severity__c", "status__c"] for call in page_calls)
+    assert all(call["filters"] == [VERSION_FILTER] and call["orders"] for call in page_calls)
+    assert sum(counts.values()) == 450
+    assert counts[("advice", "已关闭")] == len([i for i in range(450) if i % 4 == 3 and i % 3 == 2])
+
+
+def test_failed_count_raises(planner, fake):
+    fake.objects["offline_bug__c"] = _bugs(450)
+    fake.fail = True
+
+    with pytest.raises(Exception, match="记录数失败"):
+        planner.count_by("offline_bug__c", DIMENSIONS)
+
+
+def test_failed_page_raises(planner, fake):
+    fake.objects["offline_bug__c"] = _bugs(450)
+    fake.fail_offsets = {200}
+
+    with pytest.raises(Exception, match="偏移量 200"):
+        planner.count_by("offline_bug__c", DIMENSIONS)
+
+
+def test_planned_severity_stats_match_row_stats(planner, fake):
+    bugs = _bugs(300)
+    # 未分类的bug不参与统计
+    bugs[0]["dev_team__c"] = None
+    bugs[1]["platform__c"] = None
+    fake.objects["offline_bug__c"] = bugs
+    rows = [{**bug, "dev_team__c__r": bug["dev_team__c"] and bug["dev_team__c.name"]} for bug in bugs]
+
+    planned = DataAnalysisService.analyze_bugs_by_severity_and_status_planned(planner, [VERSION_FILTER])
+
+    assert planned == DataAnalysisService.analyze_bugs_by_severity_and_status({"dataList": rows})
+    assert planned["total"] == 298
@@ -0,0 +1,25 @@
+from utils.http_session import HttpSessionPool
+
+
+def test_pool_is_singleton():
+    assert HttpSessionPool() is HttpSessionPool()
+
+
+def test_same_host_shares_session():
+    pool = HttpSessionPool()
+    first = pool.get_session("https://open.fxiaoke.com/cgi/a")
+    second = pool.get_session("https://open.fxiaoke.com/cgi/b")
+    other = pool.get_session("https://api.tapd.cn/bugs")
+    assert first is second
+    assert first is not other
+
+
+def test_requests_reuse_connection(http_server):
+    pool = HttpSessionPool()
+    for _ in range(5):
+        assert pool.get(f"{http_server.url}/ping").status_code == 200
+
+    stats = pool.stats()[http_server.url]
+    assert stats["requests"] == 5
+    assert stats["connections"] == 1
+    assert stats["reused"] == 4
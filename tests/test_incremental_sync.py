@@ -0,0 +1,91 @@
+import pytest
+
+HOUR = 3600 * 1000
+ORDERS = [{"field_name": "create_time", "is_asc": True}]
+
+
+def _bugs(count):
+    return [
+        {"_id": f"bug{i:03d}", "create_time": 1000 + i, "last_modified_time": i * HOUR, "status__c": "新"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake(data_service):
+    fake = data_service.custom_object_service
+    fake.objects["offline_bug__c"] = _bugs(250)
+    return fake
+
+
+def _sync(data_service, filters=None):
+    return data_service.fetch_object_data_incremental(
+        "offline_bug__c", "v1.0", filters=filters, orders=ORDERS, limit=100
+    )
+
+
+def _full_fetches(fake):
+    return [call for call in fake.calls if call["offset"] == 0 and call["limit"] == 100 and call["orders"] == ORDERS]
+
+
+def test_changed_records_are_merged_into_snapshot(data_service, fake):
+    _sync(data_service)
+    fake.calls.clear()
+    fake.objects["offline_bug__c"][10].update(status__c="已解决", last_modified_time=1000 * HOUR)
+
+    data = _sync(data_service)
+
+    assert data["total"] == 250
+    assert data["dataList"][10]["status__c"] == "已解决"
+    assert [r["_id"] for r in data["dataList"]] == [f"bug{i:03d}" for i in range(250)]
+    assert _full_fetches(fake) == []
+    # 只获取水位（回退重叠时间后）之后变更的记录
+    watermark_filters = [call["filters"] for call in fake.calls if call["limit"] == 100]
+    assert watermark_filters[0][0]["field_name"] == "last_modified_time"
+    assert watermark_filters[0][0]["operator"] == "GTE"
+    # 取总数的查询同样带有过滤和排序条件，否则会被接口参数校验拒绝
+    count_calls = [call for call in fake.calls if call["limit"] == 1]
+    assert count_calls and all(call["filters"] and call["orders"] for call in count_calls)
+
+
+def test_deleted_record_triggers_full_sync(data_service, fake):
+    _sync(data_service)
+    fake.calls.clear()
+    del fake.objects["offline_bug__c"][5]
+
+    data = _sync(data_service)
+
+    assert data["total"] == 249
+    assert "bug005" not in {r["_id"] for r in data["dataList"]}
+    assert len(_full_fetches(fake)) == 1
+
+
+def test_changed_filters_do_not_reuse_snapshot(data_service, fake):
+    _sync(data_service)
+    fake.calls.clear()
+
+    data = _sync(data_service, filters=[{"field_name": "status__c", "field_values": ["新"], "operator": "EQ"}])
+
+    assert data["total"] == 250
+    assert len(_full_fetches(fake)) == 1
+
+
+def test_failed_count_is_not_answered_from_snapshot(data_service, fake):
+    _sync(data_service)
+    fake.calls.clear()
+    fake.fail = True
+
+    data = _sync(data_service)
+
+    assert not data_service.is_complete(data)
+    assert data["dataList"] == []
+    assert len(_full_fetches(fake)) == 1
+    # 快照保留，接口恢复后仍可增量同步
+    assert len(data_service.snapshot_store.load("offline_bug__c", "v1.0")["records"]) == 250
+
+
+def test_incomplete_full_sync_is_not_saved(data_service, fake):
+    fake.fail_offsets = {100}
+    _sync(data_service)
+
+    assert data_service.snapshot_store.load("offline_bug__c", "v1.0") is None
@@ -0,0 +1,55 @@
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from utils.micro_batcher import MicroBatcher
+
+
+def _submit_concurrently(batcher, keys):
+    barrier = threading.Barrier(len(keys))
+
+    def submit(key):
+        barrier.wait()
+        return batcher.submit(key)
+
+    with ThreadPoolExecutor(max_workers=len(keys)) as pool:
+        return list(pool.map(submit, keys))
+
+
+def test_concurrent_keys_are_batched_and_deduplicated():
+    batches = []
+
+    def batch_func(keys):
+        batches.append(sorted(keys))
+        return {key: f"id-{key}" for key in keys if key != "unknown"}
+
+    batcher = MicroBatcher(batch_func, max_batch_size=50, window=0.2)
+    results = _submit_concurrently(batcher, ["a", "b", "a", "unknown"])
+
+    assert results == ["id-a", "id-b", "id-a", None]
+    assert batches == [["a", "b", "unknown"]]
+
+
+def test_batches_are_split_at_max_batch_size():
+    batches = []
+
+    def batch_func(keys):
+        batches.append(len(keys))
+        return {key: key for key in keys}
+
+    batcher = MicroBatcher(batch_func, max_batch_size=2, window=1)
+    keys = ["a", "b", "c", "d"]
+    assert _submit_concurrently(batcher, keys) == keys
+    assert sum(batches) == 4
+    assert max(batches) <= 2
+
+
+def test_batch_failure_is_raised_to_every_caller():
+    def batch_func(keys):
+        raise RuntimeError("batch failed")
+
+    batcher = MicroBatcher(batch_func, window=0.1)
+    with pytest.raises(RuntimeError, match="batch failed"):
+        batcher.submit("a")
+    # 失败的批次不会留下待处理的键，之后的查询重新发起
+    with pytest.raises(RuntimeError):
+        batcher.submit("a")
@@ -0,0 +1,56 @@
+import threading
+import pytest
+
+
+@pytest.fixture
+def fake(multi_fetch):
+    fake = multi_fetch.custom_object_service
+    fake.objects["object_tL7xk__c"] = [{"_id": "plan", "gray_start": 1500}]
+    fake.objects["object_y31e4__c"] = [{"_id": f"gray{i}", "create_time": 1000 + i * 100} for i in range(10)]
+    fake.objects["offline_bug__c"] = [{"_id": "bug"}]
+    return fake
+
+
+def test_unknown_dependency_is_rejected(multi_fetch, fake):
+    with pytest.raises(ValueError, match="不在配置列表中"):
+        multi_fetch.fetch_multiple_objects_data([
+            {"object_api_name": "object_y31e4__c", "depends_on": ["object_tL7xk__c"]}
+        ])
+    assert fake.calls == []
+
+
+def test_cycle_is_rejected(multi_fetch, fake):
+    with pytest.raises(ValueError, match="环"):
+        multi_fetch.fetch_multiple_objects_data([
+            {"object_api_name": "offline_bug__c"},
+            {"object_api_name": "object_tL7xk__c", "depends_on": ["object_y31e4__c"]},
+            {"object_api_name": "object_y31e4__c", "depends_on": ["object_tL7xk__c"]}
+        ])
+    assert fake.calls == []
+
+
+def test_dependent_object_starts_after_dependency_and_is_resolved(multi_fetch, fake):
+    order = []
+    lock = threading.Lock()
+    original = fake.query_custom_objects
+
+    def query(data_object_api_name, *args, **kwargs):
+        with lock:
+            order.append(data_object_api_name)
+        return original(data_object_api_name, *args, **kwargs)
+
+    fake.query_custom_objects = query
+
+    def resolve(config, dependencies):
+        gray_start = dependencies["object_tL7xk__c"]["dataList"][0]["gray_start"]
+        return {**config, "filters": [{"field_name": "create_time", "field_values": [gray_start], "operator": "GTE"}]}
+
+    result = multi_fetch.fetch_multiple_objects_data([
+        {"object_api_name": "object_y31e4__c", "depends_on": ["object_tL7xk__c"], "resolve": resolve},
+        {"object_api_name": "object_tL7xk__c"},
+        {"object_api_name": "offline_bug__c"}
+    ])
+
+    assert order.index("object_tL7xk__c") < order.index("object_y31e4__c")
+    assert [r["_id"] for r in result["object_y31e4__c"]["dataList"]] == [f"gray{i}" for i in range(5, 10)]
+    assert result["offline_bug__c"]["total"] == 1
@@ -0,0 +1,73 @@
+import json
+import pytest
+from utils.http_client import HttpClient
+from utils.page_decoder import DataListStreamDecoder, iter_data_list, project_record, RAW_PREFIX_SIZE
+
+
+PAGE = {
+    "errorCode": 0,
+    "errorMessage": "success",
+    "data": {
+        "total": 3,
+        "dataList": [
+            {"_id": "1", "name": "a", "severity__c": "fatal", "create_time": 1, "extra": {"nested": [1, 2]}},
+            {"_id": "2", "name": "b]\\\"", "severity__c": "normal", "create_time": 2, "extra": None},
+            {"_id": "3", "name": "c", "severity__c": "normal", "create_time": 3, "extra": "dataList"}
+        ]
+    }
+}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_project_record_keeps_requested_and_system_fields():
+    record = {"_id": "1", "name": "a", "severity__c": "fatal", "create_time": 1}
+    assert project_record(record, ["severity__c"]) == {"severity__c": "fatal", "_id": "1", "create_time": 1}
+    assert project_record(record, None) is record
+
+
+@pytest.mark.parametrize("size", [1, 7, 64, 100000])
+def test_stream_decoding_matches_full_decoding(size):
+    text = json.dumps(PAGE, ensure_ascii=False)
+    skeleton = {}
+
+    records = list(iter_data_list(_chunks(text, size), ["severity__c"], skeleton))
+
+    assert records == [project_record(r, ["severity__c"]) for r in PAGE["data"]["dataList"]]
+    assert skeleton["errorCode"] == 0
+    assert skeleton["data"] == {"total": 3, "dataList": []}
+
+
+def test_truncated_response_raises():
+    text = json.dumps(PAGE)
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_data_list([text[:len(text) // 2]]))
+
+
+def test_decoder_keeps_bounded_head():
+    decoder = DataListStreamDecoder()
+    for chunk in _chunks("x" * (RAW_PREFIX_SIZE * 3), 1000):
+        list(decoder.feed(chunk))
+    assert decoder.head == "x" * RAW_PREFIX_SIZE
+
+
+def test_post_stream_returns_projected_records(http_server):
+    http_server.body = json.dumps(PAGE).encode()
+
+    response = HttpClient.post_stream(f"{http_server.url}/cgi/crm/custom/v2/data/query", {}, ["name"])
+
+    assert response.is_success()
+    assert [r["name"] for r in response.data["data"]["dataList"]] == ["a", "b]\\\"", "c"]
+    assert "severity__c" not in response.data["data"]["dataList"][0]
+
+
+def test_post_stream_keeps_body_prefix_on_decode_failure(http_server):
+    http_server.body = ("<html>" + "网关错误" * 2000 + "</html>").encode()
+
+    response = HttpClient.post_stream(f"{http_server.url}/cgi/crm/custom/v2/data/query", {})
+
+    assert response.code == -1
+    assert response.data["raw_response"].startswith("<html>网关错误")
+    assert len(response.data["raw_response"]) == RAW_PREFIX_SIZE
@@ -0,0 +1,69 @@
+import pytest
+from services.custom_object_service import CustomObjectService
+from services.fxk_service import FxkService
+from utils.api_response import ApiResponse
+from utils.query_cache import QueryPageCache
+
+
+QUERY = {
+    "limit": 100, "offset": 0, "orders": [{"field_name": "create_time", "is_asc": True}],
+    "filters": [
+        {"field_name": "version__c", "field_values": ["9.5.0"], "operator": "EQ"},
+        {"field_name": "platform__c", "field_values": ["iOS"], "operator": "EQ"}
+    ],
+    "find_explicit_total_num": "true", "fields": ["severity__c", "status__c"]
+}
+
+
+def test_fingerprint_ignores_filter_order_but_not_sort_order():
+    reordered = dict(QUERY, filters=list(reversed(QUERY["filters"])), fields=["status__c", "severity__c"])
+    assert QueryPageCache.fingerprint(reordered) == QueryPageCache.fingerprint(QUERY)
+
+    descending = dict(QUERY, orders=[{"field_name": "create_time", "is_asc": False}])
+    assert QueryPageCache.fingerprint(descending) != QueryPageCache.fingerprint(QUERY)
+
+
+def test_key_includes_corp_user_and_object():
+    cache = QueryPageCache()
+    key = cache.make_key("corp", "FSUID_1", "offline_bug__c", QUERY)
+    assert key.startswith("fxk_query_page:corp:offline_bug__c:FSUID_1:")
+    assert key != cache.make_key("corp", "FSUID_2", "offline_bug__c", QUERY)
+
+
+def test_round_trip_and_invalidate(memory_cache):
+    cache = QueryPageCache()
+    page = {"data": {"dataList": [{"_id": "1", "name": "缺陷"}], "total": 1}}
+    keys = [cache.make_key("corp", user, "offline_bug__c", QUERY) for user in ("u1", "u2")]
+    for key in keys:
+        cache.set(key, "offline_bug__c", page)
+
+    assert cache.get(keys[0]) == page
+    assert cache.get_many(keys + ["missing"]) == [page, page, None]
+
+    cache.invalidate("offline_bug__c", "corp")
+    assert cache.get_many(keys) == [None, None]
+
+
+def test_users_do_not_share_cached_pages(memory_cache, monkeypatch):
+    fxk_service = FxkService()
+    user_ids = {"13800000001": "FSUID_1", "13800000002": "FSUID_2"}
+    queried_by = []
+
+    def query_custom_object(corp_access_token, current_open_user_id, **kwargs):
+        queried_by.append(current_open_user_id)
+        return ApiResponse(0, "", {"data": {"dataList": [{"owner": current_open_user_id}], "total": 1}})
+
+    monkeypatch.setattr(fxk_service, "get_corp_access_token", lambda force_refresh=False: "token")
+    monkeypatch.setattr(fxk_service, "get_user_id_by_mobile", lambda mobile: user_ids[mobile])
+    monkeypatch.setattr(fxk_service.api_client, "get_corp_id", lambda: "corp")
+    monkeypatch.setattr(fxk_service.api_client, "query_custom_object", query_custom_object)
+    service = CustomObjectService(fxk_service=fxk_service, api_client=fxk_service.api_client)
+
+    first = service.query_custom_objects("offline_bug__c", "13800000001")
+    second = service.query_custom_objects("offline_bug__c", "13800000002")
+    again = service.query_custom_objects("offline_bug__c", "13800000001")
+
+    assert first["data"]["dataList"] == [{"owner": "FSUID_1"}]
+    assert second["data"]["dataList"] == [{"owner": "FSUID_2"}]
+    assert again == first
+    assert queried_by == ["FSUID_1", "FSUID_2"]
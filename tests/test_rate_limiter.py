@@ -0,0 +1,136 @@
+import asyncio
+import threading
+import time
+from utils.async_http_client import AsyncHttpClient
+from utils.rate_limiter import (
+    AdaptiveRateLimiter, get_rate_limiter, OUTCOME_OK, OUTCOME_THROTTLED, OUTCOME_ERROR
+)
+
+
+def _limiter(**kwargs):
+    options = dict(rate=1000, burst=100, min_rate=1, min_concurrency=1, max_concurrency=8,
+                   initial_concurrency=4, latency_threshold=1)
+    options.update(kwargs)
+    return AdaptiveRateLimiter("test", **options)
+
+
+def test_token_bucket_limits_rate():
+    limiter = _limiter(rate=50, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+        limiter.release(0.0)
+    # 第一个令牌来自桶，其余5个按每秒50个补充
+    assert time.monotonic() - start >= 0.09
+
+
+def test_concurrency_never_exceeds_limit():
+    limiter = _limiter(initial_concurrency=3, max_concurrency=3)
+    peak = 0
+    lock = threading.Lock()
+
+    def work():
+        nonlocal peak
+        with limiter.slot():
+            with lock:
+                peak = max(peak, limiter.stats()["in_flight"])
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=work) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 3
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_throttled_halves_rate_and_concurrency():
+    limiter = _limiter(rate=20, initial_concurrency=8)
+    limiter.acquire()
+    limiter.release(0.1, OUTCOME_THROTTLED)
+    assert limiter.stats()["rate"] == 10
+    assert limiter.stats()["concurrency"] == 4
+
+    # 同一批请求接连失败只减半一次
+    limiter.acquire()
+    limiter.release(0.1, OUTCOME_ERROR)
+    assert limiter.stats()["concurrency"] == 4
+
+
+def test_success_increases_concurrency_additively():
+    limiter = _limiter(initial_concurrency=2)
+    # 每次成功加 1/当前并发数：2 -> 2.5 -> 2.9 -> 3.24
+    for _ in range(3):
+        limiter.acquire()
+        limiter.release(0.1, OUTCOME_OK)
+    assert limiter.stats()["concurrency"] == 3
+
+
+def test_slot_marks_exceptions_as_errors():
+    limiter = _limiter(initial_concurrency=8)
+    try:
+        with limiter.slot():
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert limiter.stats() == {"rate": 1000, "concurrency": 4, "in_flight": 0}
+
+
+def test_get_rate_limiter_is_shared_per_endpoint():
+    assert get_rate_limiter("/cgi/a") is get_rate_limiter("/cgi/a")
+    assert get_rate_limiter("/cgi/a") is not get_rate_limiter("/cgi/b")
+
+
+def test_async_slots_share_concurrency_limit():
+    limiter = _limiter(initial_concurrency=2, max_concurrency=2)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with limiter.slot_async():
+            peak = max(peak, limiter.stats()["in_flight"])
+            await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(*(work() for _ in range(8)))
+
+    asyncio.run(run())
+    assert peak == 2
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_cancelled_async_acquire_returns_slot():
+    limiter = _limiter(rate=1, burst=1)
+
+    async def run():
+        await limiter.acquire_async()
+        limiter.release(0.0)
+        # 令牌已用完，等待令牌时被取消
+        task = asyncio.ensure_future(limiter.acquire_async())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(run())
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_async_http_client_reports_throttling(http_server):
+    http_server.status = 429
+    client = AsyncHttpClient()
+    limiter = get_rate_limiter("/cgi/throttled")
+    limiter._last_decrease = 0.0
+    concurrency = limiter.stats()["concurrency"]
+
+    async def run():
+        try:
+            return await client.post(f"{http_server.url}/cgi/throttled", {})
+        finally:
+            await client.close()
+
+    asyncio.run(run())
+    assert limiter.stats()["concurrency"] == max(limiter.min_concurrency, int(concurrency * 0.5))
@@ -0,0 +1,46 @@
+from config import USER_ID_CACHE_KEY
+from services.fxk_service import FxkService
+from utils.redis_client import RedisClient
+
+
+def test_mset_and_mget_round_trip(memory_cache):
+    client = RedisClient()
+    client.mset({"a": "1", "b": "2"}, expire_time=30)
+
+    assert client.mget(["a", "missing", "b"]) == ["1", None, "2"]
+    assert 0 < client.ttl("a") <= 30
+
+
+def test_scan_iter_and_delete_many(memory_cache):
+    client = RedisClient()
+    client.mset({"query:1": "x", "query:2": "y", "other": "z"})
+
+    assert sorted(client.scan_iter("query:*")) == ["query:1", "query:2"]
+    assert client.delete_many(client.keys("query:*")) == 2
+    assert client.keys("*") == ["other"]
+
+
+def test_warm_user_ids_requests_only_misses(memory_cache, monkeypatch):
+    RedisClient().set(f"{USER_ID_CACHE_KEY}:13800000002", "FSUID_2")
+    service = FxkService()
+    requested, upserted = [], []
+    monkeypatch.setattr(
+        service.directory, "get_open_user_ids",
+        lambda mobiles: {mobile: "FSUID_1" if mobile == "13800000001" else None for mobile in mobiles}
+    )
+    monkeypatch.setattr(service.directory, "upsert", lambda user_id, mobile: upserted.append((user_id, mobile)))
+
+    def request_user_id(mobile):
+        requested.append(mobile)
+        if mobile == "13800000004":
+            raise Exception("not found")
+        return f"FSUID_{mobile[-1]}"
+
+    monkeypatch.setattr(service, "_request_user_id_by_mobile", request_user_id)
+
+    user_ids = service.warm_user_ids(["13800000001", "13800000002", "13800000003", "13800000004"])
+
+    assert user_ids == {"13800000001": "FSUID_1", "13800000002": "FSUID_2", "13800000003": "FSUID_3"}
+    assert requested == ["13800000003", "13800000004"]
+    assert upserted == [("FSUID_3", "13800000003")]
+    assert RedisClient().get(f"{USER_ID_CACHE_KEY}:13800000003") == "FSUID_3"
@@ -0,0 +1,200 @@
+import time
+import asyncio
+import pytest
+import requests
+from services.custom_object_service import CustomObjectService
+from services.fxk_service import FxkService
+from utils.api_response import ApiResponse
+from utils.retry_policy import (
+    RetryPolicy, RetryBudget, RetryExhaustedError, TokenError, UserNotFoundError, TransientError,
+    classify_exception, classify_response, get_retry_budget, SUCCESS, RETRY, REFRESH_TOKEN, FAIL, TOKEN_EXPIRED_CODE
+)
+
+
+def _policy(max_attempts=3, budget=None):
+    return RetryPolicy(max_attempts=max_attempts, base_delay=0, max_delay=0, budget=budget or RetryBudget(100))
+
+
+def _responses(*responses):
+    calls = []
+
+    def func():
+        calls.append(None)
+        response = responses[len(calls) - 1]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    return func, calls
+
+
+def test_classify_response():
+    assert classify_response(ApiResponse(0, "")) == SUCCESS
+    assert classify_response(ApiResponse(TOKEN_EXPIRED_CODE, "")) == REFRESH_TOKEN
+    assert classify_response(ApiResponse(-1, "")) == RETRY
+    assert classify_response(ApiResponse(10005, "")) == FAIL
+
+
+@pytest.mark.parametrize("error, decision", [
+    (requests.exceptions.ConnectionError(), RETRY),
+    (requests.exceptions.ReadTimeout(), RETRY),
+    (TimeoutError(), RETRY),
+    (TransientError(), RETRY),
+    (UserNotFoundError(), FAIL),
+    (TokenError(), FAIL),
+    (RetryExhaustedError(), FAIL),
+    (ValueError(), FAIL),
+    (Exception(), FAIL),
+])
+def test_classify_exception(error, decision):
+    assert classify_exception(error) == decision
+
+
+def test_transient_responses_are_retried():
+    func, calls = _responses(ApiResponse(-1, "timeout"), ApiResponse(0, "", {"ok": True}))
+    budget = RetryBudget(10)
+
+    response = _policy(budget=budget).call(func)
+
+    assert response.data == {"ok": True}
+    assert len(calls) == 2
+    assert budget.remaining == 9
+
+
+def test_business_errors_are_not_retried():
+    func, calls = _responses(ApiResponse(10005, "invalid"))
+    assert _policy().call(func).code == 10005
+    assert len(calls) == 1
+
+
+def test_non_retryable_exception_is_raised_immediately():
+    func, calls = _responses(UserNotFoundError("未找到"), ApiResponse(0, ""))
+    budget = RetryBudget(10)
+    with pytest.raises(UserNotFoundError):
+        _policy(budget=budget).call(func)
+    assert len(calls) == 1
+    assert budget.remaining == 10
+
+
+def test_expired_token_refreshes_without_backoff():
+    func, calls = _responses(ApiResponse(TOKEN_EXPIRED_CODE, "expired"), ApiResponse(0, ""))
+    refreshed = []
+    assert _policy().call(func, on_refresh_token=lambda: refreshed.append(True)).is_success()
+    assert refreshed == [True]
+
+
+def test_budget_limits_retries():
+    func, calls = _responses(*[ApiResponse(-1, "down")] * 3)
+    budget = RetryBudget(1)
+    assert _policy(budget=budget).call(func).code == -1
+    assert len(calls) == 2
+    assert budget.remaining == 0
+
+
+def test_last_exception_is_raised_after_attempts():
+    func, calls = _responses(*[requests.exceptions.ConnectionError("reset")] * 3)
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _policy().call(func)
+    assert len(calls) == 3
+
+
+@pytest.fixture
+def fxk_service(memory_cache, monkeypatch):
+    service = FxkService()
+    service.retry_policy = _policy()
+    service.token_refresher.publish("token", 7200)
+    monkeypatch.setattr(service.directory, "get_open_user_id", lambda mobile: None)
+    return service
+
+
+def test_unknown_mobile_is_not_retried(fxk_service, monkeypatch):
+    calls = []
+
+    def get_user_id_by_mobile(token, mobile, corp_id=None):
+        calls.append(mobile)
+        return ApiResponse(0, "", {"empList": []})
+
+    monkeypatch.setattr(fxk_service.api_client, "get_user_id_by_mobile", get_user_id_by_mobile)
+    monkeypatch.setattr(fxk_service.api_client, "get_corp_id", lambda: "corp")
+    service = CustomObjectService(fxk_service=fxk_service, api_client=fxk_service.api_client)
+    service.retry_policy = _policy()
+
+    assert service.query_custom_objects("offline_bug__c", "13800000000", use_cache=False) == {"dataList": [], "total": 0}
+    assert calls == ["13800000000"]
+
+
+def test_user_id_network_error_is_retryable(fxk_service, monkeypatch):
+    monkeypatch.setattr(
+        fxk_service.api_client, "get_user_id_by_mobile", lambda token, mobile, corp_id=None: ApiResponse(-1, "reset")
+    )
+    with pytest.raises(TransientError):
+        fxk_service._request_user_id_by_mobile("13800000000")
+
+
+def test_rejected_token_request_raises_token_error(fxk_service, monkeypatch):
+    monkeypatch.setattr(fxk_service.api_client, "get_corp_access_token", lambda: ApiResponse(20001, "invalid appId"))
+    with pytest.raises(TokenError):
+        fxk_service.get_corp_access_token(force_refresh=True)
+
+
+def test_unreachable_token_endpoint_raises_retry_exhausted(fxk_service, monkeypatch):
+    monkeypatch.setattr(fxk_service.api_client, "get_corp_access_token", lambda: ApiResponse(-1, "timeout"))
+    with pytest.raises(RetryExhaustedError):
+        fxk_service.get_corp_access_token(force_refresh=True)
+
+
+def test_call_async_refreshes_token_then_backs_off():
+    responses = [ApiResponse(TOKEN_EXPIRED_CODE, "expired"), ApiResponse(-1, "reset"), ApiResponse(0, "ok")]
+    calls, refreshed = [], []
+
+    async def func():
+        calls.append(None)
+        return responses[len(calls) - 1]
+
+    async def refresh():
+        refreshed.append(None)
+
+    budget = RetryBudget(100)
+    response = asyncio.run(_policy(budget=budget).call_async(func, on_refresh_token=refresh))
+
+    assert response.is_success()
+    assert len(calls) == 3
+    assert len(refreshed) == 1
+    assert budget.remaining == 98
+
+
+def test_call_async_stops_when_budget_is_spent():
+    async def func():
+        return ApiResponse(-1, "reset")
+
+    response = asyncio.run(_policy(budget=RetryBudget(0)).call_async(func))
+    assert response.code == -1
+
+
+def test_windowed_budget_refills():
+    budget = RetryBudget(1, window=0.05)
+    assert budget.try_spend()
+    assert not budget.try_spend()
+
+    time.sleep(0.06)
+    assert budget.try_spend()
+
+
+def test_each_report_gets_its_own_budget(multi_fetch, monkeypatch):
+    import services.custom_object_data_service as data_module
+
+    fake = multi_fetch.custom_object_service
+    fake.objects["offline_bug__c"] = [{"_id": "bug", "create_time": 1}]
+    budgets = []
+
+    def create_service(fxk_service, api_client, retry_budget=None):
+        budgets.append(retry_budget)
+        return fake
+
+    monkeypatch.setattr(data_module, "CustomObjectService", create_service)
+    for _ in range(2):
+        multi_fetch.fetch_multiple_objects_data([{"object_api_name": "offline_bug__c"}])
+
+    assert all(isinstance(budget, RetryBudget) for budget in budgets)
+    assert budgets[0] is not budgets[1]
+    assert get_retry_budget() not in budgets
@@ -0,0 +1,100 @@
+import threading
+import time
+import pytest
+from services.custom_object_service import CustomObjectService
+from services.fxk_service import FxkService
+from utils.api_response import ApiResponse
+from utils.single_flight import SingleFlight
+
+
+def _run_concurrently(count, target):
+    results = [None] * count
+    barrier = threading.Barrier(count)
+
+    def run(index):
+        barrier.wait()
+        results[index] = target(index)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_concurrent_calls_share_one_execution():
+    group = SingleFlight()
+    calls = []
+
+    def work():
+        calls.append(None)
+        time.sleep(0.05)
+        return "value"
+
+    results = _run_concurrently(8, lambda index: group.do("key", work))
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+def test_errors_are_shared_and_key_is_released():
+    group = SingleFlight()
+    errors = []
+
+    def fail():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    def call(index):
+        try:
+            group.do("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    _run_concurrently(4, call)
+    assert len(errors) == 4
+    assert group.do("key", lambda: "again") == "again"
+
+
+def test_different_keys_run_independently():
+    group = SingleFlight()
+    results = _run_concurrently(3, lambda index: group.do(f"key{index}", lambda: index))
+    assert results == [0, 1, 2]
+
+
+@pytest.fixture
+def query_service(memory_cache, monkeypatch):
+    fxk_service = FxkService()
+    queried_by = []
+
+    def query_custom_object(corp_access_token, current_open_user_id, **kwargs):
+        queried_by.append(current_open_user_id)
+        time.sleep(0.05)
+        return ApiResponse(0, "", {"data": {"dataList": [{"owner": current_open_user_id}], "total": 1}})
+
+    monkeypatch.setattr(fxk_service, "get_corp_access_token", lambda force_refresh=False: "token")
+    monkeypatch.setattr(fxk_service, "get_user_id_by_mobile", lambda mobile: f"FSUID_{mobile}")
+    monkeypatch.setattr(fxk_service.api_client, "get_corp_id", lambda: "corp")
+    monkeypatch.setattr(fxk_service.api_client, "query_custom_object", query_custom_object)
+    service = CustomObjectService(fxk_service=fxk_service, api_client=fxk_service.api_client)
+    return service, queried_by
+
+
+def test_identical_queries_are_coalesced(query_service):
+    service, queried_by = query_service
+    results = _run_concurrently(
+        4, lambda index: service.query_custom_objects("offline_bug__c", "13800000001", use_cache=False)
+    )
+    assert queried_by == ["FSUID_13800000001"]
+    assert all(result == results[0] for result in results)
+
+
+def test_queries_of_different_users_are_not_coalesced(query_service):
+    service, queried_by = query_service
+    results = _run_concurrently(
+        2, lambda index: service.query_custom_objects("offline_bug__c", f"1380000000{index}", use_cache=False)
+    )
+    assert sorted(queried_by) == ["FSUID_13800000000", "FSUID_13800000001"]
+    assert results[0]["data"]["dataList"] == [{"owner": "FSUID_13800000000"}]
+    assert results[1]["data"]["dataList"] == [{"owner": "FSUID_13800000001"}]
@@ -0,0 +1,88 @@
+import pytest
+from services.data_analysis_service import OfflineBugAggregator
+from services.snapshot_store import SnapshotStore, DATASET_RESULTS
+
+BUGS = [
+    {"_id": "b1", "dev_team__c__r": "售中团队", "platform__c": "Web", "severity__c": "fatal",
+     "status__c": "新", "fixer__c": ["u1"], "create_time": 1},
+    {"_id": "b2", "dev_team__c__r": "售中团队", "platform__c": "Web", "severity__c": "serious",
+     "status__c": "已解决", "fixer__c": ["u1", "u2"], "create_time": 2},
+    {"_id": "b3", "dev_team__c__r": "流程团队", "platform__c": "Android", "severity__c": "normal",
+     "status__c": "已关闭", "fixer__c": ["u3"], "create_time": 3},
+    {"_id": "b4", "dev_team__c__r": "未分类", "platform__c": "Web", "severity__c": "fatal",
+     "status__c": "新", "fixer__c": [], "create_time": 4},
+    {"_id": "b5", "dev_team__c__r": "售前团队", "platform__c": None, "severity__c": "advice",
+     "status__c": "新", "fixer__c": [], "create_time": 5},
+]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshots.db"), dataset=DATASET_RESULTS)
+    store.save("offline_bug__c", "9.5.0", {"records": BUGS})
+    store.save("object_tL7xk__c", "9.5.0", {"records": [{"_id": "plan"}]})
+    store.save("offline_bug__c", "9.4.0", {"records": BUGS[:1]})
+    return store
+
+
+def test_count_by_uses_dimension_columns(store):
+    counts = store.count_by("offline_bug__c", "9.5.0", ["severity", "status"], where={"team": ["售中团队", "流程团队"]})
+    assert counts == {("fatal", "新"): 1, ("serious", "已解决"): 1, ("normal", "已关闭"): 1}
+
+    with pytest.raises(ValueError):
+        store.count_by("offline_bug__c", "9.5.0", ["fixer"])
+
+
+def test_query_filters_by_dimension(store):
+    records = list(store.query("offline_bug__c", "9.5.0", {"platform": "Web", "severity": "fatal"}))
+    assert [r["_id"] for r in records] == ["b1", "b4"]
+
+
+def test_versions_and_load_version(store):
+    assert store.versions() == ["9.4.0", "9.5.0"]
+    assert store.versions("object_tL7xk__c") == ["9.5.0"]
+
+    data = store.load_version("9.5.0", exclude=["offline_bug__c"])
+    assert data == {"object_tL7xk__c": {"dataList": [{"_id": "plan"}], "total": 1}}
+
+
+def test_writer_replaces_snapshot_only_when_closed(store):
+    writer = store.writer("offline_bug__c", "9.5.0")
+    writer.write(BUGS[:2])
+    # 写入过程中原有快照仍可读取，暂存的记录不参与查询和统计
+    assert store.load("offline_bug__c", "9.5.0")["total"] == 5
+    assert sum(store.count_by("offline_bug__c", "9.5.0", ["severity"]).values()) == 5
+
+    writer.close()
+    snapshot = store.load("offline_bug__c", "9.5.0")
+    assert snapshot["total"] == 2
+    assert [r["_id"] for r in snapshot["records"]] == ["b1", "b2"]
+    assert store.versions("offline_bug__c") == ["9.4.0", "9.5.0"]
+
+
+def test_aborted_writer_keeps_previous_snapshot(store):
+    writer = store.writer("offline_bug__c", "9.5.0")
+    writer.write(BUGS[:2])
+    writer.abort()
+
+    assert [r["_id"] for r in store.load("offline_bug__c", "9.5.0")["records"]] == [r["_id"] for r in BUGS]
+
+
+def test_abandoned_writer_is_cleared_by_next_writer(store):
+    # 上一次写入中途退出，没有close也没有abort
+    store.writer("offline_bug__c", "9.5.0").write(BUGS[2:])
+
+    writer = store.writer("offline_bug__c", "9.5.0")
+    writer.write(BUGS[:1])
+    writer.close()
+
+    assert [r["_id"] for r in store.load("offline_bug__c", "9.5.0")["records"]] == ["b1"]
+
+
+def test_snapshot_aggregation_matches_in_memory(store):
+    in_memory = OfflineBugAggregator()
+    in_memory.add(BUGS)
+    from_snapshot = OfflineBugAggregator()
+    from_snapshot.add_snapshot(store, "9.5.0")
+
+    assert from_snapshot.result() == in_memory.result()
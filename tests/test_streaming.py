@@ -0,0 +1,74 @@
+import pytest
+from services.custom_object_data_service import CustomObjectDataService
+
+HOUR = 3600 * 1000
+
+
+def _bugs(count):
+    return [
+        {"_id": f"bug{i:03d}", "create_time": 1000 + i, "last_modified_time": i * HOUR, "status__c": "新"}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def fake(data_service):
+    fake = data_service.custom_object_service
+    fake.objects["offline_bug__c"] = _bugs(250)
+    return fake
+
+
+def _bug_config(pages):
+    return {
+        "object_api_name": "offline_bug__c",
+        "fields": ["status__c"],
+        "orders": [{"field_name": "create_time", "is_asc": True}],
+        "limit": 100,
+        "consumers": [pages.append]
+    }
+
+
+def test_stream_reports_failed_pages(data_service, fake):
+    fake.fail_offsets = {100}
+    pages = []
+
+    data = data_service.stream_object_data("offline_bug__c", [pages.append], limit=100, use_cache=False)
+
+    assert data["failed_pages"] == [100]
+    assert data["fetched"] == 150
+    assert [len(page) for page in pages] == [100, 50]
+    assert not CustomObjectDataService.is_complete(data)
+
+
+def test_complete_stream(data_service, fake):
+    data = data_service.stream_object_data("offline_bug__c", [lambda page: None], limit=100, use_cache=False)
+
+    assert data == {"dataList": [], "total": 250, "fetched": 250, "failed_pages": []}
+    assert CustomObjectDataService.is_complete(data)
+
+
+def test_incremental_sync_feeds_consumers(multi_fetch, fake):
+    multi_fetch.fetch_multiple_objects_data([_bug_config([])], version="9.5.0", incremental=True)
+    fake.calls.clear()
+    fake.objects["offline_bug__c"][0].update(status__c="已解决", last_modified_time=1000 * HOUR)
+    pages = []
+
+    result = multi_fetch.fetch_multiple_objects_data([_bug_config(pages)], version="9.5.0", incremental=True)
+
+    data = result["offline_bug__c"]
+    assert data["fetched"] == data["total"] == 250
+    assert [len(page) for page in pages] == [100, 100, 50]
+    assert pages[0][0]["status__c"] == "已解决"
+    # 增量同步只获取总数和变更的记录
+    assert not any(call["offset"] >= 100 for call in fake.calls)
+    assert CustomObjectDataService.is_complete(data)
+
+
+def test_failed_object_is_marked_with_error(multi_fetch, fake):
+    def resolve(config, dependencies):
+        raise KeyError("release_plan")
+
+    result = multi_fetch.fetch_multiple_objects_data([{"object_api_name": "offline_bug__c", "resolve": resolve}])
+
+    assert "release_plan" in result["offline_bug__c"]["error"]
+    assert not CustomObjectDataService.is_complete(result["offline_bug__c"])
@@ -0,0 +1,76 @@
+import time
+import pytest
+import services.token_refresher as token_refresher
+from services.token_refresher import CorpAccessTokenRefresher
+
+
+class _StubFxkService:
+    def __init__(self, refresher, expires_in=None):
+        self.refresher = refresher
+        self.expires_in = expires_in
+        self.calls = 0
+
+    def refresh_corp_access_token(self):
+        self.calls += 1
+        if self.expires_in is not None:
+            self.refresher.publish(f"token{self.calls}", self.expires_in)
+        return self.refresher.current_token()
+
+
+@pytest.fixture
+def refresher(monkeypatch):
+    monkeypatch.setattr(token_refresher, "TOKEN_REFRESH_MARGIN", 300)
+    monkeypatch.setattr(token_refresher, "TOKEN_REFRESH_RETRY_INTERVAL", 0.1)
+    refresher = CorpAccessTokenRefresher()
+    refresher.invalidate()
+    yield refresher
+    refresher.stop()
+    refresher.invalidate()
+
+
+def test_current_token_expires(refresher):
+    refresher.publish("token", 7200)
+    assert refresher.current_token() == "token"
+    refresher.publish("token", -1)
+    assert refresher.current_token() is None
+
+
+def test_invalidate_only_matching_token(refresher):
+    refresher.publish("new", 7200)
+    refresher.invalidate("old")
+    assert refresher.current_token() == "new"
+    refresher.invalidate("new")
+    assert refresher.current_token() is None
+
+
+def test_refreshes_before_expiry(refresher):
+    refresher.publish("token", 100)
+    service = _StubFxkService(refresher, expires_in=7200)
+    refresher.start(service)
+    time.sleep(0.2)
+    assert service.calls == 1
+    assert refresher.current_token() == "token1"
+
+
+def test_does_not_refresh_long_lived_token(refresher):
+    refresher.publish("token", 7200)
+    service = _StubFxkService(refresher, expires_in=7200)
+    refresher.start(service)
+    time.sleep(0.2)
+    assert service.calls == 0
+
+
+def test_short_lived_tokens_do_not_spin(refresher):
+    # 接口返回的有效期小于刷新提前量，每次刷新后仍处于需要刷新的区间
+    service = _StubFxkService(refresher, expires_in=100)
+    refresher.start(service)
+    time.sleep(0.35)
+    assert 1 <= service.calls <= 5
+
+
+def test_refresh_without_progress_does_not_spin(refresher):
+    refresher.publish("token", 100)
+    service = _StubFxkService(refresher)
+    refresher.start(service)
+    time.sleep(0.35)
+    assert 1 <= service.calls <= 5
@@ -0,0 +1,65 @@
+import threading
+import pytest
+from utils.work_scheduler import WorkScheduler
+
+
+def test_higher_priority_runs_first_and_ties_keep_submit_order():
+    scheduler = WorkScheduler(max_workers=1)
+    started, release = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    blocker = scheduler.submit(block)
+    started.wait(5)
+
+    futures = [
+        scheduler.submit(order.append, "low", priority=1),
+        scheduler.submit(order.append, "first-page", priority=float("inf")),
+        scheduler.submit(order.append, "big-object-a", priority=500),
+        scheduler.submit(order.append, "big-object-b", priority=500),
+    ]
+    assert scheduler.pending() == 4
+    release.set()
+    blocker.result(5)
+    for future in futures:
+        future.result(5)
+
+    assert order == ["first-page", "big-object-a", "big-object-b", "low"]
+
+
+def test_exception_is_set_on_future():
+    scheduler = WorkScheduler(max_workers=1)
+
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        scheduler.submit(fail).result(5)
+    # 任务失败后工作线程继续执行后续任务
+    assert scheduler.submit(lambda: 1).result(5) == 1
+
+
+def test_concurrency_is_capped_at_max_workers():
+    scheduler = WorkScheduler(max_workers=2)
+    lock = threading.Lock()
+    running, peak = [0], [0]
+    release = threading.Event()
+
+    def task():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        release.wait(5)
+        with lock:
+            running[0] -= 1
+
+    futures = [scheduler.submit(task) for _ in range(6)]
+    release.set()
+    for future in futures:
+        future.result(5)
+
+    assert peak[0] <= 2
+    assert len(scheduler._workers) == 2
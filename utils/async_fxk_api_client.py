@@ -0,0 +1,78 @@
+import asyncio
+from typing import Dict, Any, List, Optional
+from .async_http_client import AsyncHttpClient
+from .api_response import ApiResponse
+from .fxk_api_client import BaseFxkApiClient
+
+class AsyncFxkApiClient(BaseFxkApiClient):
+    """纷享销客API异步客户端，接口与FxkApiClient一致，所有方法均为协程
+
+    同一个实例可在事件循环内被大量并发协程共享，连接数由AsyncHttpClient的连接池限制。
+    """
+
+    def __init__(self, http_client: AsyncHttpClient = None):
+        super().__init__()
+        self.http_client = http_client or AsyncHttpClient()
+        self._corp_id_lock = None
+        self._lock_loop = None
+
+    async def get_corp_access_token(self) -> ApiResponse:
+        """获取企业访问令牌"""
+        url, data = self._build_corp_access_token_request()
+        return await self.http_client.post(url, data)
+
+    async def get_corp_id(self) -> str:
+        """获取企业ID，并发调用时只请求一次"""
+        if self._corp_id:
+            return self._corp_id
+
+        # 锁绑定在首次使用它的事件循环上，事件循环切换后重新创建
+        loop = asyncio.get_running_loop()
+        if self._corp_id_lock is None or self._lock_loop is not loop:
+            self._corp_id_lock = asyncio.Lock()
+            self._lock_loop = loop
+        async with self._corp_id_lock:
+            if self._corp_id:
+                return self._corp_id
+            response = await self.get_corp_access_token()
+            return self._extract_corp_id(response)
+
+    async def get_user_id_by_mobile(self, corp_access_token: str, mobile: str, corp_id: str = None) -> ApiResponse:
+        """根据手机号获取用户ID
+
+        Args:
+            corp_access_token: 企业访问令牌
+            mobile: 手机号
+            corp_id: 企业ID，可选，如果不提供则自动获取
+
+        Returns:
+            ApiResponse: 包含用户信息的响应
+        """
+        self._validate_user_id_by_mobile_params(corp_access_token, mobile)
+
+        if not corp_id:
+            corp_id = await self.get_corp_id()
+
+        url, data = self._build_user_id_by_mobile_request(corp_access_token, mobile, corp_id)
+        return await self.http_client.post(url, data)
+
+    async def query_custom_object(self, corp_access_token: str, current_open_user_id: str, data_object_api_name: str,
+                                  search_query_info: Dict[str, Any], find_explicit_total_num: str = "true",
+                                  corp_id: str = None, fields: Optional[List[str]] = None) -> ApiResponse:
+        """查询自定义对象列表，参数说明见FxkApiClient.query_custom_object"""
+        self._validate_query_custom_object_params(
+            corp_access_token, current_open_user_id, data_object_api_name, search_query_info
+        )
+
+        if not corp_id:
+            corp_id = await self.get_corp_id()
+
+        url, data = self._build_query_custom_object_request(
+            corp_access_token, current_open_user_id, data_object_api_name,
+            search_query_info, find_explicit_total_num, corp_id, fields
+        )
+        return await self.http_client.post(url, data)
+
+    async def close(self):
+        """关闭底层HTTP会话"""
+        await self.http_client.close()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import aiohttp
+from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+from config import (
+    HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT,
+    ASYNC_HTTP_MAX_CONNECTIONS, ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST,
+    FXK_THROTTLE_ERROR_CODES
+)
+from .api_response import ApiResponse
+from .http_client import THROTTLE_STATUS_CODES
+from .rate_limiter import get_rate_limiter, OUTCOME_THROTTLED, OUTCOME_ERROR
+
+logger = logging.getLogger(__name__)
+
+class AsyncHttpClient:
+    """基于aiohttp的非阻塞HTTP客户端，与HttpClient返回相同的ApiResponse"""
+
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': '*/*',
+        'User-Agent': 'Apifox/1.0.0 (https://apifox.com)',
+        'Connection': 'keep-alive'
+    }
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环上的会话，不存在或已关闭时创建"""
+        loop = asyncio.get_running_loop()
+        if self._session is not None and self._loop is not loop:
+            self._discard_session()
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=ASYNC_HTTP_MAX_CONNECTIONS,
+                limit_per_host=ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST
+            )
+            timeout = aiohttp.ClientTimeout(
+                sock_connect=HTTP_CONNECT_TIMEOUT,
+                sock_read=HTTP_READ_TIMEOUT
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers)
+            self._loop = loop
+        return self._session
+
+    def _discard_session(self):
+        """事件循环切换时释放旧循环上的会话
+
+        会话的连接绑定在创建它的事件循环上：旧循环仍在（其他线程中）运行时在旧循环上关闭会话；
+        旧循环没有运行时无法在其上等待关闭，直接同步关闭连接器；旧循环已关闭时其上的连接已无法正常关闭，
+        只能丢弃，因此应在事件循环结束前调用close()。
+        """
+        session, loop = self._session, self._loop
+        self._session = None
+        self._loop = None
+        if session.closed:
+            return
+        if loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(session.close(), loop)
+            return
+        if loop.is_closed():
+            logger.warning("HTTP会话所在的事件循环已关闭，无法关闭其连接，请在事件循环结束前调用close()")
+        connector = session.connector
+        session.detach()
+        if connector is not None:
+            # BaseConnector.close()需要在连接器所在的事件循环上调度，这里只能同步关闭各连接
+            connector._close()
+
+    async def post(self, url: str, data: Dict[str, Any]) -> ApiResponse:
+        # 与HttpClient共用按接口路径划分的限速器，线程和协程发出的同类请求共同受控
+        limiter = get_rate_limiter(urlsplit(url).path)
+        async with limiter.slot_async() as result:
+            try:
+                async with self._get_session().post(url, json=data) as response:
+                    if response.status in THROTTLE_STATUS_CODES:
+                        result["outcome"] = OUTCOME_THROTTLED
+                    text = await response.text()
+
+                # 尝试解析响应内容
+                try:
+                    api_response = ApiResponse.from_dict(json.loads(text))
+                    if api_response.code in FXK_THROTTLE_ERROR_CODES:
+                        result["outcome"] = OUTCOME_THROTTLED
+                    return api_response
+                except json.JSONDecodeError as e:
+                    if result["outcome"] != OUTCOME_THROTTLED:
+                        result["outcome"] = OUTCOME_ERROR
+                    return ApiResponse(
+                        code=-1,
+                        message=f"响应解析失败: {str(e)}",
+                        data={"raw_response": text}
+                    )
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result["outcome"] = OUTCOME_ERROR
+                return ApiResponse(
+                    code=-1,
+                    message=f"请求失败: {str(e)}",
+                    data={"error_type": type(e).__name__, "error_message": str(e)}
+                )
+
+    async def close(self):
+        """关闭会话及其连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
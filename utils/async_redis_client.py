@@ -0,0 +1,187 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from redis import asyncio as aioredis
+from config import (
+    REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_MAX_CONNECTIONS,
+    REDIS_SOCKET_TIMEOUT, REDIS_SOCKET_CONNECT_TIMEOUT,
+    REDIS_HEALTH_CHECK_INTERVAL, REDIS_SCAN_COUNT, CACHE_BACKEND
+)
+from .cache_backends import CacheBackend, BACKEND_MEMORY, BACKEND_SQLITE
+from .redis_client import RedisClient
+
+logger = logging.getLogger(__name__)
+
+
+class _AsyncCachePipeline:
+    """本地缓存后端管道的异步包装，命令照常排队，await execute()时依次执行"""
+
+    def __init__(self, pipeline):
+        self._pipeline = pipeline
+
+    def __getattr__(self, name):
+        command = getattr(self._pipeline, name)
+
+        def queue(*args, **kwargs):
+            command(*args, **kwargs)
+            return self
+
+        return queue
+
+    async def execute(self):
+        return self._pipeline.execute()
+
+
+class AsyncRedisClient:
+    """基于redis.asyncio的非阻塞Redis客户端，接口与RedisClient一致，所有方法均为协程
+
+    连接池绑定在创建它的事件循环上，因此按事件循环分别创建。
+    
+    config.CACHE_BACKEND为memory或sqlite时没有部署Redis，改为使用RedisClient的缓存后端，
+    与同步代码读写同一份数据；本地后端的操作不涉及网络，直接在事件循环中执行。
+    为redis或tiered时直接访问Redis，tiered的本地一级由调用方（如AsyncCredentialManager的进程内缓存）提供。
+    """
+    _instance = None
+    
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AsyncRedisClient, cls).__new__(cls)
+            cls._instance._client = None
+            cls._instance._loop = None
+            cls._instance.backend = (
+                RedisClient().backend if CACHE_BACKEND in (BACKEND_MEMORY, BACKEND_SQLITE) else None
+            )
+        return cls._instance
+    
+    def use_backend(self, backend: Optional[CacheBackend]):
+        """替换为本地缓存后端，为None时恢复直接访问Redis"""
+        self.backend = backend
+    
+    @property
+    def client(self) -> aioredis.Redis:
+        """获取当前事件循环上的客户端，不存在时创建"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            self._discard_client()
+        if self._client is None:
+            pool = aioredis.BlockingConnectionPool(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_SOCKET_TIMEOUT,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+            )
+            self._client = aioredis.Redis(connection_pool=pool)
+            self._loop = loop
+        return self._client
+    
+    @client.setter
+    def client(self, client: aioredis.Redis):
+        """替换当前事件循环上的客户端"""
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            self._discard_client()
+        self._client = client
+        self._loop = loop
+    
+    def _discard_client(self):
+        """事件循环切换时释放旧循环上的客户端：旧循环仍在（其他线程中）运行时在旧循环上关闭连接池，
+        旧循环已关闭或没有运行时关闭协程无法执行，只能丢弃"""
+        client, loop = self._client, self._loop
+        self._client = None
+        self._loop = None
+        if loop.is_closed() or not loop.is_running():
+            logger.warning("Redis客户端所在的事件循环已关闭或未运行，无法关闭其连接，请在事件循环结束前调用close()")
+            return
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+    
+    async def get(self, key):
+        if self.backend is not None:
+            return self.backend.get(key)
+        return await self.client.get(key)
+    
+    async def set(self, key, value, expire_time=None):
+        if self.backend is not None:
+            self.backend.set(key, value, expire_time)
+            return
+        await self.client.set(key, value, ex=expire_time)
+    
+    async def delete(self, key):
+        if self.backend is not None:
+            self.backend.delete(key)
+            return
+        await self.client.delete(key)
+    
+    async def exists(self, key):
+        if self.backend is not None:
+            return self.backend.exists(key)
+        return await self.client.exists(key)
+    
+    async def ttl(self, key) -> int:
+        """获取键的剩余过期时间（秒），键不存在返回-2，未设置过期时间返回-1"""
+        if self.backend is not None:
+            return self.backend.ttl(key)
+        return await self.client.ttl(key)
+    
+    def pipeline(self, transaction: bool = False):
+        """创建管道，命令在await execute()时一次发送"""
+        if self.backend is not None:
+            return _AsyncCachePipeline(self.backend.pipeline(transaction=transaction))
+        return self.client.pipeline(transaction=transaction)
+    
+    async def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """批量获取多个键的值，不存在的键对应None"""
+        if not keys:
+            return []
+        if self.backend is not None:
+            return self.backend.mget(keys)
+        return await self.client.mget(keys)
+    
+    async def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        """批量写入多个键，提供过期时间时通过管道逐个SET EX"""
+        if not mapping:
+            return
+        if self.backend is not None:
+            self.backend.mset(mapping, expire_time)
+            return
+        if expire_time is None:
+            await self.client.mset(mapping)
+            return
+        pipe = self.pipeline()
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=expire_time)
+        await pipe.execute()
+    
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """批量删除多个键，返回删除的数量"""
+        keys = list(keys)
+        if not keys:
+            return 0
+        if self.backend is not None:
+            return self.backend.delete_many(keys)
+        return await self.client.delete(*keys)
+    
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> AsyncIterator[str]:
+        """以SCAN增量遍历匹配模式的键"""
+        if self.backend is not None:
+            return self._scan_backend(pattern, count)
+        return self.client.scan_iter(match=pattern, count=count)
+    
+    async def _scan_backend(self, pattern: str, count: int) -> AsyncIterator[str]:
+        for key in self.backend.scan_iter(pattern, count):
+            yield key
+    
+    async def keys(self, pattern: str) -> list:
+        """获取匹配模式的键列表"""
+        return [key async for key in self.scan_iter(pattern)]
+    
+    async def close(self):
+        """关闭客户端及其连接池"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
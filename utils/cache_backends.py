@@ -0,0 +1,547 @@
+import os
+import time
+import fnmatch
+import sqlite3
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import redis
+from config import (
+    REDIS_HOST, REDIS_PORT, REDIS_DB, REDIS_MAX_CONNECTIONS,
+    REDIS_SOCKET_TIMEOUT, REDIS_SOCKET_CONNECT_TIMEOUT,
+    REDIS_HEALTH_CHECK_INTERVAL, REDIS_SCAN_COUNT,
+    CACHE_BACKEND, CACHE_LOCAL_BACKEND, CACHE_MEMORY_MAXSIZE,
+    CACHE_SQLITE_PATH, CACHE_LOCAL_TTL, CACHE_REMOTE_RETRY_INTERVAL
+)
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# 缓存后端类型
+BACKEND_REDIS = "redis"
+BACKEND_MEMORY = "memory"
+BACKEND_SQLITE = "sqlite"
+BACKEND_TIERED = "tiered"
+
+
+class CacheBackend(ABC):
+    """缓存后端接口，语义与Redis对应命令一致，值均为字符串"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        pass
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]) -> int:
+        pass
+
+    @abstractmethod
+    def ttl(self, key: str) -> int:
+        """剩余过期时间（秒），不存在返回-2，不过期返回-1"""
+        pass
+
+    @abstractmethod
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        pass
+
+    def delete(self, key: str):
+        self.delete_many([key])
+
+    def exists(self, key: str) -> int:
+        return 1 if self.get(key) is not None else 0
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        for key, value in mapping.items():
+            self.set(key, value, expire_time)
+
+    def pipeline(self, transaction: bool = False) -> "CachePipeline":
+        return CachePipeline(self)
+
+    def shared(self) -> "CacheBackend":
+        """跨进程共享的一层，自己维护进程内缓存的调用方使用，避免两层本地缓存叠加过期时间"""
+        return self
+
+
+class CachePipeline:
+    """非Redis后端的管道：缓存命令，execute()时依次执行并按顺序返回结果"""
+
+    def __init__(self, backend: CacheBackend):
+        self._backend = backend
+        self._commands = []
+
+    def get(self, key: str) -> "CachePipeline":
+        self._commands.append(lambda: self._backend.get(key))
+        return self
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> "CachePipeline":
+        self._commands.append(lambda: self._backend.set(key, value, ex) or True)
+        return self
+
+    def ttl(self, key: str) -> "CachePipeline":
+        self._commands.append(lambda: self._backend.ttl(key))
+        return self
+
+    def delete(self, *keys: str) -> "CachePipeline":
+        self._commands.append(lambda: self._backend.delete_many(keys))
+        return self
+
+    def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [command() for command in commands]
+
+
+class MemoryCacheBackend(CacheBackend):
+    """进程内LRU缓存"""
+
+    def __init__(self, maxsize: int = CACHE_MEMORY_MAXSIZE):
+        self._cache = TTLCache(maxsize=maxsize)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        self._cache.set(key, str(value), expire_time)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        deleted = 0
+        for key in keys:
+            if key in self._cache:
+                deleted += 1
+            self._cache.delete(key)
+        return deleted
+
+    def ttl(self, key: str) -> int:
+        return self._cache.ttl(key)
+
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        return iter([key for key in self._cache.keys() if fnmatch.fnmatchcase(key, pattern)])
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """本地SQLite文件缓存，进程重启后仍然有效，适合命令行运行和单机部署"""
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            rows = dict(self._conn.execute(
+                f"SELECT key, value FROM cache WHERE key IN ({placeholders}) "
+                f"AND (expires_at IS NULL OR expires_at > ?)",
+                (*keys, time.time())
+            ).fetchall())
+        return [rows.get(key) for key in keys]
+
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        self.mset({key: value}, expire_time)
+
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        if not mapping:
+            return
+        expires_at = time.time() + expire_time if expire_time is not None else None
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                [(key, str(value), expires_at) for key, value in mapping.items()]
+            )
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        placeholders = ",".join("?" * len(keys))
+        with self._lock:
+            return self._conn.execute(f"DELETE FROM cache WHERE key IN ({placeholders})", keys).rowcount
+
+    def ttl(self, key: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return -2
+        if row[0] is None:
+            return -1
+        remaining = row[0] - time.time()
+        return max(int(remaining), 1) if remaining > 0 else -2
+
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        # Redis的匹配模式与SQLite的GLOB语法相同
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM cache WHERE key GLOB ? AND (expires_at IS NULL OR expires_at > ?)",
+                (pattern, time.time())
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def purge_expired(self) -> int:
+        """删除已过期的条目，返回删除的数量"""
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),)
+            ).rowcount
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redis缓存，多进程、多节点共享"""
+
+    def __init__(self, client: Optional[redis.Redis] = None):
+        if client is None:
+            # 连接数达到上限时等待空闲连接，而不是直接报错
+            pool = redis.BlockingConnectionPool(
+                host=REDIS_HOST,
+                port=REDIS_PORT,
+                db=REDIS_DB,
+                decode_responses=True,
+                max_connections=REDIS_MAX_CONNECTIONS,
+                timeout=REDIS_SOCKET_TIMEOUT,
+                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=REDIS_SOCKET_CONNECT_TIMEOUT,
+                health_check_interval=REDIS_HEALTH_CHECK_INTERVAL
+            )
+            client = redis.Redis(connection_pool=pool)
+        self.client = client
+
+    def get(self, key: str) -> Optional[str]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        self.client.set(key, value, ex=expire_time)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        if not keys:
+            return 0
+        return self.client.delete(*keys)
+
+    def exists(self, key: str) -> int:
+        return self.client.exists(key)
+
+    def ttl(self, key: str) -> int:
+        return self.client.ttl(key)
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        if not keys:
+            return []
+        return self.client.mget(keys)
+
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        if not mapping:
+            return
+        if expire_time is None:
+            self.client.mset(mapping)
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, value, ex=expire_time)
+        pipe.execute()
+
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        return self.client.scan_iter(match=pattern, count=count)
+
+    def pipeline(self, transaction: bool = False):
+        return self.client.pipeline(transaction=transaction)
+
+
+class TieredCacheBackend(CacheBackend):
+    """本地 + 远程的两级缓存
+
+    - 读取先查本地，未命中时通过一次管道读取远程的值和剩余有效期并回填本地，回填的过期时间不超过local_ttl
+      和远程的剩余有效期，热点键由本地直接返回
+    - 写入和删除同时作用于两级
+    - 管道中的命令在一次往返中发送给远程，执行后用结果回填本地
+    - 远程出错时记录日志并在retry_interval内只使用本地缓存，之后再尝试恢复，调用方不会收到异常
+    - shared()返回只访问远程的视图，供自己维护进程内缓存的调用方（如CredentialManager）使用
+    """
+
+    def __init__(self, local: CacheBackend, remote: CacheBackend,
+                 local_ttl: int = CACHE_LOCAL_TTL,
+                 retry_interval: float = CACHE_REMOTE_RETRY_INTERVAL):
+        self.local = local
+        self.remote = remote
+        self.local_ttl = local_ttl
+        self.retry_interval = retry_interval
+        self._remote_down_until = 0.0
+        self._lock = threading.Lock()
+        self._shared = RemoteCacheView(self)
+
+    def remote_available(self) -> bool:
+        return time.monotonic() >= self._remote_down_until
+
+    def _remote_failed(self, error: Exception):
+        with self._lock:
+            if self.remote_available():
+                logger.warning(
+                    f"远程缓存不可用，{self.retry_interval:.0f} 秒内降级为本地缓存: {type(error).__name__}: {str(error)}"
+                )
+            self._remote_down_until = time.monotonic() + self.retry_interval
+
+    def _call_remote(self, func, default=None):
+        """调用远程缓存，不可用或出错时返回default"""
+        if not self.remote_available():
+            return default
+        try:
+            return func()
+        except (redis.exceptions.RedisError, OSError) as e:
+            self._remote_failed(e)
+            return default
+
+    def _local_expire(self, expire_time: Optional[int]) -> int:
+        if expire_time is None or expire_time < 0:
+            return self.local_ttl
+        return min(expire_time, self.local_ttl)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        if not self.remote_available():
+            return None
+        value, remote_ttl = self._call_remote(
+            lambda: self.remote.pipeline().get(key).ttl(key).execute(), (None, None)
+        )
+        if value is not None:
+            self.local.set(key, value, self._local_expire(remote_ttl))
+        return value
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        values = self.local.mget(keys)
+        missing = [index for index, value in enumerate(values) if value is None]
+        if not missing or not self.remote_available():
+            return values
+        def fetch_remote():
+            pipe = self.remote.pipeline()
+            for index in missing:
+                pipe.get(keys[index]).ttl(keys[index])
+            return pipe.execute()
+
+        replies = self._call_remote(fetch_remote)
+        if replies is None:
+            return values
+        for index, value, remote_ttl in zip(missing, replies[0::2], replies[1::2]):
+            if value is not None:
+                values[index] = value
+                self.local.set(keys[index], value, self._local_expire(remote_ttl))
+        return values
+
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        stored = self._call_remote(lambda: self.remote.set(key, value, expire_time) or True, False)
+        # 远程写入失败时本地保留完整的过期时间，降级期间仍能命中
+        self.local.set(key, value, self._local_expire(expire_time) if stored else expire_time)
+
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        stored = self._call_remote(lambda: self.remote.mset(mapping, expire_time) or True, False)
+        self.local.mset(mapping, self._local_expire(expire_time) if stored else expire_time)
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        deleted = self.local.delete_many(keys)
+        return self._call_remote(lambda: self.remote.delete_many(keys), deleted)
+
+    def ttl(self, key: str) -> int:
+        if self.remote_available():
+            remote_ttl = self._call_remote(lambda: self.remote.ttl(key))
+            if remote_ttl is not None:
+                return remote_ttl
+        return self.local.ttl(key)
+
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        keys = set(self.local.scan_iter(pattern, count))
+        remote_keys = self._call_remote(lambda: list(self.remote.scan_iter(pattern, count)), [])
+        return iter(keys.union(remote_keys))
+
+    def pipeline(self, transaction: bool = False) -> "TieredCachePipeline":
+        return TieredCachePipeline(self, transaction)
+
+    def shared(self) -> "RemoteCacheView":
+        return self._shared
+
+
+class TieredCachePipeline(CachePipeline):
+    """两级缓存的管道
+
+    命令在一次往返中发送给远程，之后按结果更新本地：读取到的值以同一管道中该键的TTL结果（没有时为local_ttl）
+    回填，写入和删除同步到本地。远程不可用时依次在本地执行。
+    """
+
+    def __init__(self, backend: TieredCacheBackend, transaction: bool = False):
+        super().__init__(backend.local)
+        self._tiered = backend
+        self._transaction = transaction
+        self._calls = []
+
+    def get(self, key: str) -> "TieredCachePipeline":
+        self._calls.append(("get", key, ()))
+        return super().get(key)
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> "TieredCachePipeline":
+        self._calls.append(("set", key, (value, ex)))
+        return super().set(key, value, ex)
+
+    def ttl(self, key: str) -> "TieredCachePipeline":
+        self._calls.append(("ttl", key, ()))
+        return super().ttl(key)
+
+    def delete(self, *keys: str) -> "TieredCachePipeline":
+        self._calls.append(("delete", keys, ()))
+        return super().delete(*keys)
+
+    def execute(self) -> List[Any]:
+        calls, self._calls = self._calls, []
+        tiered = self._tiered
+
+        def send():
+            pipe = tiered.remote.pipeline(transaction=self._transaction)
+            for name, key, args in calls:
+                if name == "delete":
+                    pipe.delete(*key)
+                elif name == "set":
+                    pipe.set(key, args[0], ex=args[1])
+                else:
+                    getattr(pipe, name)(key)
+            return pipe.execute()
+
+        replies = tiered._call_remote(send)
+        if replies is None:
+            # 远程不可用，本地执行缓存的命令
+            return super().execute()
+        self._commands = []
+
+        remote_ttls = {key: reply for (name, key, _), reply in zip(calls, replies) if name == "ttl"}
+        for (name, key, args), reply in zip(calls, replies):
+            if name == "get" and reply is not None:
+                tiered.local.set(key, reply, tiered._local_expire(remote_ttls.get(key)))
+            elif name == "set":
+                tiered.local.set(key, args[0], tiered._local_expire(args[1]))
+            elif name == "delete":
+                tiered.local.delete_many(key)
+        return replies
+
+
+class RemoteCacheView(CacheBackend):
+    """只访问两级缓存远程层的视图
+
+    与两级缓存共用远程不可用时的降级状态：降级期间直接抛出ConnectionError，不再等待连接超时；
+    远程出错时记录降级并抛出原异常，由调用方决定如何处理。
+    """
+
+    def __init__(self, tiered: TieredCacheBackend):
+        self._tiered = tiered
+
+    def _call(self, func):
+        if not self._tiered.remote_available():
+            raise ConnectionError("远程缓存暂不可用")
+        try:
+            return func()
+        except (redis.exceptions.RedisError, OSError) as e:
+            self._tiered._remote_failed(e)
+            raise
+
+    def get(self, key: str) -> Optional[str]:
+        return self._call(lambda: self._tiered.remote.get(key))
+
+    def set(self, key: str, value: Any, expire_time: Optional[int] = None):
+        self._call(lambda: self._tiered.remote.set(key, value, expire_time))
+
+    def delete_many(self, keys: Iterable[str]) -> int:
+        keys = list(keys)
+        return self._call(lambda: self._tiered.remote.delete_many(keys))
+
+    def ttl(self, key: str) -> int:
+        return self._call(lambda: self._tiered.remote.ttl(key))
+
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        return self._call(lambda: self._tiered.remote.mget(keys))
+
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        self._call(lambda: self._tiered.remote.mset(mapping, expire_time))
+
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        return iter(self._call(lambda: list(self._tiered.remote.scan_iter(pattern, count))))
+
+    def pipeline(self, transaction: bool = False) -> "_RemoteViewPipeline":
+        return _RemoteViewPipeline(self, self._tiered.remote.pipeline(transaction=transaction))
+
+
+class _RemoteViewPipeline:
+    """远程层的管道，execute经过RemoteCacheView的降级检查"""
+
+    def __init__(self, view: RemoteCacheView, pipe):
+        self._view = view
+        self._pipe = pipe
+
+    def get(self, key: str) -> "_RemoteViewPipeline":
+        self._pipe.get(key)
+        return self
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> "_RemoteViewPipeline":
+        self._pipe.set(key, value, ex=ex)
+        return self
+
+    def ttl(self, key: str) -> "_RemoteViewPipeline":
+        self._pipe.ttl(key)
+        return self
+
+    def delete(self, *keys: str) -> "_RemoteViewPipeline":
+        self._pipe.delete(*keys)
+        return self
+
+    def execute(self) -> List[Any]:
+        return self._view._call(self._pipe.execute)
+
+
+def _create_local_backend(name: str) -> CacheBackend:
+    if name == BACKEND_SQLITE:
+        return SQLiteCacheBackend()
+    return MemoryCacheBackend()
+
+
+def create_cache_backend(name: str = CACHE_BACKEND) -> CacheBackend:
+    """按名称创建缓存后端
+
+    Args:
+        name: BACKEND_REDIS / BACKEND_MEMORY / BACKEND_SQLITE / BACKEND_TIERED
+
+    Returns:
+        CacheBackend: 缓存后端实例
+
+    Raises:
+        ValueError: 不支持的后端名称
+    """
+    if name == BACKEND_REDIS:
+        return RedisCacheBackend()
+    if name == BACKEND_MEMORY:
+        return MemoryCacheBackend()
+    if name == BACKEND_SQLITE:
+        return SQLiteCacheBackend()
+    if name == BACKEND_TIERED:
+        return TieredCacheBackend(_create_local_backend(CACHE_LOCAL_BACKEND), RedisCacheBackend())
+    raise ValueError(f"不支持的缓存后端: {name}")
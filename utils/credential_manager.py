@@ -0,0 +1,308 @@
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional
+from config import (
+    TOKEN_CACHE_KEY, CORP_ID_CACHE_KEY, CORP_ID_EXPIRE_TIME,
+    USER_ID_CACHE_KEY, USER_ID_EXPIRE_TIME, FEISHU_TOKEN_CACHE_KEY,
+    CREDENTIAL_LOCAL_TTL, CREDENTIAL_LOCAL_MAXSIZE
+)
+from .redis_client import RedisClient
+from .async_redis_client import AsyncRedisClient
+from .ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+def _backfill_ttl(redis_ttl: Optional[int]) -> int:
+    """从Redis回填进程内缓存时的过期时间，不超过凭证在Redis中的剩余有效期
+
+    Args:
+        redis_ttl: Redis中的剩余过期时间（秒），-1表示不过期
+
+    Returns:
+        int: 进程内缓存的过期时间（秒）
+    """
+    if redis_ttl is None or redis_ttl < 0:
+        return CREDENTIAL_LOCAL_TTL
+    return min(redis_ttl, CREDENTIAL_LOCAL_TTL)
+
+
+class CredentialManager:
+    """凭证与身份的两级缓存：进程内TTL缓存 + Redis
+
+    读取时先查进程内缓存，未命中再查Redis并回填；写入和失效同时作用于两级。
+    Redis一级通过RedisClient.shared()访问，tiered模式下不再经过缓存后端的本地层，只有一层进程内缓存。
+    进程内缓存的过期时间不超过CREDENTIAL_LOCAL_TTL，也不超过凭证在Redis中的剩余有效期，
+    其他进程写入或失效的凭证在此时间内生效，Redis中已过期的凭证不会继续从进程内缓存返回。
+    Redis不可用时退化为仅使用进程内缓存。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(CredentialManager, cls).__new__(cls)
+                    instance.redis_client = RedisClient()
+                    instance.local = TTLCache(maxsize=CREDENTIAL_LOCAL_MAXSIZE, default_ttl=CREDENTIAL_LOCAL_TTL)
+                    cls._instance = instance
+        return cls._instance
+
+    def get(self, key: str) -> Optional[str]:
+        """读取凭证，先查进程内缓存，再查Redis
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[str]: 凭证，不存在时返回None
+        """
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            # 值和剩余有效期在一次往返中读取
+            value, redis_ttl = self.redis_client.shared().pipeline().get(key).ttl(key).execute()
+        except Exception as e:
+            logger.warning(f"从Redis读取 {key} 失败: {str(e)}")
+            return None
+        if value is not None:
+            self.local.set(key, value, _backfill_ttl(redis_ttl))
+        return value
+
+    def set(self, key: str, value: str, expire_time: Optional[int] = None):
+        """写入凭证到两级缓存
+
+        Args:
+            key: 缓存键
+            value: 凭证
+            expire_time: 过期时间（秒），为None时Redis中不过期
+        """
+        local_ttl = CREDENTIAL_LOCAL_TTL if expire_time is None else min(expire_time, CREDENTIAL_LOCAL_TTL)
+        self.local.set(key, value, local_ttl)
+        try:
+            self.redis_client.shared().set(key, value, expire_time)
+        except Exception as e:
+            logger.warning(f"写入Redis {key} 失败: {str(e)}")
+            # Redis不可用时进程内保留完整的过期时间，降级期间不必反复重新获取
+            self.local.set(key, value, expire_time)
+
+    def invalidate(self, key: str):
+        """从两级缓存中删除凭证"""
+        self.local.delete(key)
+        try:
+            self.redis_client.shared().delete(key)
+        except Exception as e:
+            logger.warning(f"删除Redis {key} 失败: {str(e)}")
+
+    def get_many(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        """批量读取凭证，进程内缓存未命中的键通过一次管道往返从Redis读取值和剩余有效期并回填
+
+        Args:
+            keys: 缓存键列表
+
+        Returns:
+            Dict[str, Optional[str]]: 缓存键 -> 凭证，不存在的为None
+        """
+        result = {key: self.local.get(key) for key in keys}
+        missing = [key for key, value in result.items() if value is None]
+        if not missing:
+            return result
+        try:
+            pipe = self.redis_client.shared().pipeline()
+            for key in missing:
+                pipe.get(key).ttl(key)
+            replies = pipe.execute()
+        except Exception as e:
+            logger.warning(f"从Redis批量读取凭证失败: {str(e)}")
+            return result
+        for key, value, redis_ttl in zip(missing, replies[0::2], replies[1::2]):
+            if value is not None:
+                self.local.set(key, value, _backfill_ttl(redis_ttl))
+                result[key] = value
+        return result
+
+    def set_many(self, mapping: Dict[str, str], expire_time: Optional[int] = None):
+        """批量写入凭证，Redis中通过一次管道往返写入"""
+        if not mapping:
+            return
+        local_ttl = CREDENTIAL_LOCAL_TTL if expire_time is None else min(expire_time, CREDENTIAL_LOCAL_TTL)
+        for key, value in mapping.items():
+            self.local.set(key, value, local_ttl)
+        try:
+            self.redis_client.shared().mset(mapping, expire_time)
+        except Exception as e:
+            logger.warning(f"批量写入Redis凭证失败: {str(e)}")
+            for key, value in mapping.items():
+                self.local.set(key, value, expire_time)
+
+    def preload(self, mobiles: Iterable[str] = ()):
+        """一次往返将令牌、企业ID和指定手机号的用户ID预热到进程内缓存"""
+        keys = [TOKEN_CACHE_KEY, CORP_ID_CACHE_KEY] + [f"{USER_ID_CACHE_KEY}:{mobile}" for mobile in mobiles]
+        self.get_many(keys)
+
+    # 纷享销客企业访问令牌
+    def get_corp_access_token(self) -> Optional[str]:
+        return self.get(TOKEN_CACHE_KEY)
+
+    def set_corp_access_token(self, token: str, expires_in: int):
+        self.set(TOKEN_CACHE_KEY, token, expires_in)
+
+    def invalidate_corp_access_token(self, token: Optional[str] = None):
+        """令牌过期（20016）时调用
+
+        Args:
+            token: 已失效的令牌，提供时只有缓存中仍是该令牌才删除，避免删掉其他线程刚换取的新令牌
+        """
+        if token is not None and self.get(TOKEN_CACHE_KEY) != token:
+            return
+        self.invalidate(TOKEN_CACHE_KEY)
+
+    def token_ttl(self) -> int:
+        """获取Redis中令牌的剩余有效期（秒），不存在或读取失败时返回-2"""
+        try:
+            return self.redis_client.shared().ttl(TOKEN_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"读取令牌有效期失败: {str(e)}")
+            return -2
+
+    # 纷享销客企业ID
+    def get_corp_id(self) -> Optional[str]:
+        return self.get(CORP_ID_CACHE_KEY)
+
+    def set_corp_id(self, corp_id: str):
+        self.set(CORP_ID_CACHE_KEY, corp_id, CORP_ID_EXPIRE_TIME)
+
+    # 纷享销客用户ID
+    def get_user_id(self, mobile: str) -> Optional[str]:
+        return self.get(f"{USER_ID_CACHE_KEY}:{mobile}")
+
+    def set_user_id(self, mobile: str, user_id: str):
+        self.set(f"{USER_ID_CACHE_KEY}:{mobile}", user_id, USER_ID_EXPIRE_TIME)
+
+    def get_user_ids(self, mobiles: List[str]) -> Dict[str, Optional[str]]:
+        """批量读取手机号对应的用户ID，未缓存的为None"""
+        values = self.get_many([f"{USER_ID_CACHE_KEY}:{mobile}" for mobile in mobiles])
+        return {mobile: values[f"{USER_ID_CACHE_KEY}:{mobile}"] for mobile in mobiles}
+
+    def set_user_ids(self, user_ids: Dict[str, str]):
+        """批量写入手机号 -> 用户ID"""
+        self.set_many(
+            {f"{USER_ID_CACHE_KEY}:{mobile}": user_id for mobile, user_id in user_ids.items()},
+            USER_ID_EXPIRE_TIME
+        )
+
+    # 飞书应用访问令牌，按应用区分
+    def get_feishu_token(self, app_id: str) -> Optional[str]:
+        return self.get(f"{FEISHU_TOKEN_CACHE_KEY}:{app_id}")
+
+    def set_feishu_token(self, app_id: str, token: str, expires_in: int):
+        self.set(f"{FEISHU_TOKEN_CACHE_KEY}:{app_id}", token, expires_in)
+
+    def invalidate_feishu_token(self, app_id: str):
+        self.invalidate(f"{FEISHU_TOKEN_CACHE_KEY}:{app_id}")
+
+
+class AsyncCredentialManager:
+    """凭证两级缓存的异步版本，供事件循环内的代码使用
+
+    与CredentialManager共用同一个进程内缓存，Redis访问通过AsyncRedisClient进行，不阻塞事件循环。
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            instance = super(AsyncCredentialManager, cls).__new__(cls)
+            instance.redis_client = AsyncRedisClient()
+            instance.local = CredentialManager().local
+            cls._instance = instance
+        return cls._instance
+
+    async def get(self, key: str) -> Optional[str]:
+        """读取凭证，先查进程内缓存，再查Redis"""
+        value = self.local.get(key)
+        if value is not None:
+            return value
+        try:
+            value, redis_ttl = await self.redis_client.pipeline().get(key).ttl(key).execute()
+        except Exception as e:
+            logger.warning(f"从Redis读取 {key} 失败: {str(e)}")
+            return None
+        if value is not None:
+            self.local.set(key, value, _backfill_ttl(redis_ttl))
+        return value
+
+    async def set(self, key: str, value: str, expire_time: Optional[int] = None):
+        """写入凭证到两级缓存"""
+        local_ttl = CREDENTIAL_LOCAL_TTL if expire_time is None else min(expire_time, CREDENTIAL_LOCAL_TTL)
+        self.local.set(key, value, local_ttl)
+        try:
+            await self.redis_client.set(key, value, expire_time)
+        except Exception as e:
+            logger.warning(f"写入Redis {key} 失败: {str(e)}")
+
+    async def invalidate(self, key: str):
+        """从两级缓存中删除凭证"""
+        self.local.delete(key)
+        try:
+            await self.redis_client.delete(key)
+        except Exception as e:
+            logger.warning(f"删除Redis {key} 失败: {str(e)}")
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Optional[str]]:
+        """批量读取凭证，进程内缓存未命中的键通过一次管道往返从Redis读取值和剩余有效期并回填"""
+        result = {key: self.local.get(key) for key in keys}
+        missing = [key for key, value in result.items() if value is None]
+        if not missing:
+            return result
+        try:
+            pipe = self.redis_client.pipeline()
+            for key in missing:
+                pipe.get(key).ttl(key)
+            replies = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"从Redis批量读取凭证失败: {str(e)}")
+            return result
+        for key, value, redis_ttl in zip(missing, replies[0::2], replies[1::2]):
+            if value is not None:
+                self.local.set(key, value, _backfill_ttl(redis_ttl))
+                result[key] = value
+        return result
+
+    async def preload(self, mobiles: Iterable[str] = ()):
+        """一次往返将令牌、企业ID和指定手机号的用户ID预热到进程内缓存"""
+        keys = [TOKEN_CACHE_KEY, CORP_ID_CACHE_KEY] + [f"{USER_ID_CACHE_KEY}:{mobile}" for mobile in mobiles]
+        await self.get_many(keys)
+
+    async def get_corp_access_token(self) -> Optional[str]:
+        return await self.get(TOKEN_CACHE_KEY)
+
+    async def set_corp_access_token(self, token: str, expires_in: int):
+        await self.set(TOKEN_CACHE_KEY, token, expires_in)
+
+    async def invalidate_corp_access_token(self, token: Optional[str] = None):
+        """令牌过期（20016）时调用，提供token时只有缓存中仍是该令牌才删除"""
+        if token is not None and await self.get(TOKEN_CACHE_KEY) != token:
+            return
+        await self.invalidate(TOKEN_CACHE_KEY)
+
+    async def token_ttl(self) -> int:
+        """获取Redis中令牌的剩余有效期（秒），不存在或读取失败时返回-2"""
+        try:
+            return await self.redis_client.ttl(TOKEN_CACHE_KEY)
+        except Exception as e:
+            logger.warning(f"读取令牌有效期失败: {str(e)}")
+            return -2
+
+    async def get_corp_id(self) -> Optional[str]:
+        return await self.get(CORP_ID_CACHE_KEY)
+
+    async def set_corp_id(self, corp_id: str):
+        await self.set(CORP_ID_CACHE_KEY, corp_id, CORP_ID_EXPIRE_TIME)
+
+    async def get_user_id(self, mobile: str) -> Optional[str]:
+        return await self.get(f"{USER_ID_CACHE_KEY}:{mobile}")
+
+    async def set_user_id(self, mobile: str, user_id: str):
+        await self.set(f"{USER_ID_CACHE_KEY}:{mobile}", user_id, USER_ID_EXPIRE_TIME)
@@ -1,14 +1,19 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
 from .http_client import HttpClient
+from .api_response import ApiResponse
+from .page_decoder import ALWAYS_KEEP_FIELDS
+from .single_flight import single_flight
+from .credential_manager import CredentialManager
 from config import (
     FXK_API_BASE_URL, FXK_APP_ID, FXK_APP_SECRET,
-    FXK_PERMANENT_CODE
+    FXK_PERMANENT_CODE, FXK_ROOT_DEPARTMENT_ID
 )
 import urllib.parse
 
-class FxkApiClient:
+class BaseFxkApiClient:
+    """纷享销客API客户端基类，负责参数校验和请求体构建，不涉及具体传输方式"""
+
     def __init__(self):
-        self.http_client = HttpClient()
         self.base_url = FXK_API_BASE_URL
         self._corp_id = None
 
@@ -25,8 +30,8 @@ class FxkApiClient:
         if missing_configs:
             raise ValueError(f"缺少必要的配置项: {', '.join(missing_configs)}")
 
-    def get_corp_access_token(self) -> Dict[str, Any]:
-        """获取企业访问令牌"""
+    def _build_corp_access_token_request(self) -> Tuple[str, Dict[str, Any]]:
+        """构建获取企业访问令牌的请求"""
         # 验证配置
         self._validate_config()
         
@@ -36,14 +41,10 @@ class FxkApiClient:
             "appSecret": FXK_APP_SECRET,
             "permanentCode": FXK_PERMANENT_CODE
         }
-        return self.http_client.post(url, data)
+        return url, data
 
-    def get_corp_id(self) -> str:
-        """获取企业ID"""
-        if self._corp_id:
-            return self._corp_id
-            
-        response = self.get_corp_access_token()
+    def _extract_corp_id(self, response: ApiResponse) -> str:
+        """从获取令牌的响应中解析并缓存企业ID"""
         if response.is_success():
             self._corp_id = response.get_data('corpId')
             if not self._corp_id:
@@ -51,6 +52,125 @@ class FxkApiClient:
             return self._corp_id
         raise ValueError(f"获取企业ID失败: {response.message}")
 
+    def _validate_user_id_by_mobile_params(self, corp_access_token: str, mobile: str):
+        """校验根据手机号获取用户ID的参数"""
+        if not corp_access_token:
+            raise ValueError("corp_access_token不能为空")
+        if not mobile:
+            raise ValueError("mobile不能为空")
+
+    def _build_user_id_by_mobile_request(self, corp_access_token: str, mobile: str,
+                                         corp_id: str) -> Tuple[str, Dict[str, Any]]:
+        """构建根据手机号获取用户ID的请求"""
+        url = f"{self.base_url}/user/getByMobile"
+        data = {
+            "corpAccessToken": corp_access_token,
+            "corpId": corp_id,
+            "mobile": mobile
+        }
+        return url, data
+
+    def _build_user_list_request(self, corp_access_token: str, department_id: int, fetch_child: bool,
+                                 corp_id: str) -> Tuple[str, Dict[str, Any]]:
+        """构建获取部门员工列表的请求"""
+        url = f"{self.base_url}/user/list"
+        data = {
+            "corpAccessToken": corp_access_token,
+            "corpId": corp_id,
+            "departmentId": department_id,
+            "fetchChild": fetch_child
+        }
+        return url, data
+
+    def _validate_query_custom_object_params(self, corp_access_token: str, current_open_user_id: str,
+                                             data_object_api_name: str, search_query_info: Dict[str, Any]):
+        """校验查询自定义对象列表的参数"""
+        if not corp_access_token:
+            raise ValueError("corp_access_token不能为空")
+        if not current_open_user_id:
+            raise ValueError("current_open_user_id不能为空")
+        if not data_object_api_name:
+            raise ValueError("data_object_api_name不能为空")
+        if not search_query_info:
+            raise ValueError("search_query_info不能为空")
+            
+        # 验证search_query_info中的必要字段
+        required_fields = ["limit", "offset", "filters", "orders"]
+        for field in required_fields:
+            if field not in search_query_info:
+                raise ValueError(f"search_query_info中缺少必要字段: {field}")
+                
+        # 验证limit和offset
+        if not isinstance(search_query_info["limit"], int) or search_query_info["limit"] <= 0 or search_query_info["limit"] > 100:
+            raise ValueError("limit必须是1-100之间的整数")
+        if not isinstance(search_query_info["offset"], int) or search_query_info["offset"] < 0:
+            raise ValueError("offset必须是非负整数")
+        if search_query_info["offset"] % search_query_info["limit"] != 0:
+            raise ValueError("offset必须是limit的整数倍")
+
+    def _build_query_custom_object_request(self, corp_access_token: str, current_open_user_id: str,
+                                           data_object_api_name: str, search_query_info: Dict[str, Any],
+                                           find_explicit_total_num: str, corp_id: str,
+                                           fields: Optional[List[str]] = None) -> Tuple[str, Dict[str, Any]]:
+        """构建查询自定义对象列表的请求，提供fields时由服务端只返回这些字段"""
+        url = f"{self.base_url}/crm/custom/v2/data/query"
+        data = {
+            "corpAccessToken": corp_access_token,
+            "currentOpenUserId": current_open_user_id,
+            "corpId": corp_id,
+            "data": {
+                "dataObjectApiName": data_object_api_name,
+                "find_explicit_total_num": find_explicit_total_num,
+                "search_query_info": search_query_info
+            }
+        }
+        if fields:
+            data["data"]["fieldProjection"] = self._build_field_projection(fields)
+        return url, data
+
+    @staticmethod
+    def _build_field_projection(fields: List[str]) -> List[str]:
+        """构建服务端字段投影
+
+        查找关联字段的显示值（__r）和选项的其他值（__o）依附于原字段返回，需同时投影原字段；
+        另外始终返回记录ID和时间字段。
+        """
+        projection = []
+        for field in list(fields) + list(ALWAYS_KEEP_FIELDS):
+            candidates = [field[:-3], field] if field.endswith(("__r", "__o")) else [field]
+            for candidate in candidates:
+                if candidate not in projection:
+                    projection.append(candidate)
+        return projection
+
+
+class FxkApiClient(BaseFxkApiClient):
+    def __init__(self):
+        super().__init__()
+        self.http_client = HttpClient()
+
+    def get_corp_access_token(self) -> Dict[str, Any]:
+        """获取企业访问令牌"""
+        url, data = self._build_corp_access_token_request()
+        return self.http_client.post(url, data)
+
+    def get_corp_id(self) -> str:
+        """获取企业ID，依次从实例、进程内缓存和Redis中获取，都没有时才请求接口"""
+        if self._corp_id:
+            return self._corp_id
+        
+        credentials = CredentialManager()
+        self._corp_id = credentials.get_corp_id()
+        if self._corp_id:
+            return self._corp_id
+            
+        # 各线程新建的客户端并发获取企业ID时只请求一次
+        self._corp_id = single_flight.do(
+            "corp_id", lambda: self._extract_corp_id(self.get_corp_access_token())
+        )
+        credentials.set_corp_id(self._corp_id)
+        return self._corp_id
+
     def get_user_id_by_mobile(self, corp_access_token: str, mobile: str, corp_id: str = None) -> Dict[str, Any]:
         """根据手机号获取用户ID
         
@@ -63,27 +183,40 @@ class FxkApiClient:
             Dict[str, Any]: 包含用户信息的响应
         """
         # 验证参数
-        if not corp_access_token:
-            raise ValueError("corp_access_token不能为空")
-        if not mobile:
-            raise ValueError("mobile不能为空")
+        self._validate_user_id_by_mobile_params(corp_access_token, mobile)
         
         # 获取企业ID（如果未提供）
         if not corp_id:
             corp_id = self.get_corp_id()
         
-        url = f"{self.base_url}/user/getByMobile"
-        data = {
-            "corpAccessToken": corp_access_token,
-            "corpId": corp_id,
-            "mobile": mobile
-        }
+        url, data = self._build_user_id_by_mobile_request(corp_access_token, mobile, corp_id)
         return self.http_client.post(url, data)
 
+    def get_user_list(self, corp_access_token: str, department_id: int = FXK_ROOT_DEPARTMENT_ID,
+                      fetch_child: bool = True, corp_id: str = None) -> Dict[str, Any]:
+        """获取部门员工列表
+        
+        Args:
+            corp_access_token: 企业访问令牌
+            department_id: 部门ID，默认为根部门
+            fetch_child: 是否包含子部门的员工
+            corp_id: 企业ID，可选，如果不提供则自动获取
+            
+        Returns:
+            Dict[str, Any]: 响应，userList中每个员工包含openUserId、name、mobile等字段
+        """
+        if not corp_access_token:
+            raise ValueError("corp_access_token不能为空")
+        
+        if not corp_id:
+            corp_id = self.get_corp_id()
+        
+        url, data = self._build_user_list_request(corp_access_token, department_id, fetch_child, corp_id)
+        return self.http_client.post(url, data)
     
     def query_custom_object(self, corp_access_token: str, current_open_user_id: str, data_object_api_name: str, 
                            search_query_info: Dict[str, Any], find_explicit_total_num: str = "true", 
-                           corp_id: str = None) -> Dict[str, Any]:
+                           corp_id: str = None, fields: Optional[List[str]] = None) -> Dict[str, Any]:
         """查询自定义对象列表
         
         Args:
@@ -102,6 +235,8 @@ class FxkApiClient:
                     - isAsc: 是否升序
             find_explicit_total_num: 是否返回总数(true:返回total总数,false:不返回total总数)
             corp_id: 企业ID，可选，如果不提供则自动获取
+            fields: 需要返回的记录字段，可选，提供时作为fieldProjection下推到服务端，
+                并流式解析响应只保留这些字段
             
         Returns:
             Dict[str, Any]: 包含自定义对象列表的响应
@@ -127,42 +262,18 @@ class FxkApiClient:
             - CONTAINS: Array 包含
         """
         # 验证参数
-        if not corp_access_token:
-            raise ValueError("corp_access_token不能为空")
-        if not current_open_user_id:
-            raise ValueError("current_open_user_id不能为空")
-        if not data_object_api_name:
-            raise ValueError("data_object_api_name不能为空")
-        if not search_query_info:
-            raise ValueError("search_query_info不能为空")
-            
-        # 验证search_query_info中的必要字段
-        required_fields = ["limit", "offset", "filters", "orders"]
-        for field in required_fields:
-            if field not in search_query_info:
-                raise ValueError(f"search_query_info中缺少必要字段: {field}")
-                
-        # 验证limit和offset
-        if not isinstance(search_query_info["limit"], int) or search_query_info["limit"] <= 0 or search_query_info["limit"] > 100:
-            raise ValueError("limit必须是1-100之间的整数")
-        if not isinstance(search_query_info["offset"], int) or search_query_info["offset"] < 0:
-            raise ValueError("offset必须是非负整数")
-        if search_query_info["offset"] % search_query_info["limit"] != 0:
-            raise ValueError("offset必须是limit的整数倍")
+        self._validate_query_custom_object_params(
+            corp_access_token, current_open_user_id, data_object_api_name, search_query_info
+        )
             
         # 获取企业ID（如果未提供）
         if not corp_id:
             corp_id = self.get_corp_id()
             
-        url = f"{self.base_url}/crm/custom/v2/data/query"
-        data = {
-            "corpAccessToken": corp_access_token,
-            "currentOpenUserId": current_open_user_id,
-            "corpId": corp_id,
-            "data": {
-                "dataObjectApiName": data_object_api_name,
-                "find_explicit_total_num": find_explicit_total_num,
-                "search_query_info": search_query_info
-            }
-        }
+        url, data = self._build_query_custom_object_request(
+            corp_access_token, current_open_user_id, data_object_api_name,
+            search_query_info, find_explicit_total_num, corp_id, fields
+        )
+        if fields:
+            return self.http_client.post_stream(url, data, fields)
         return self.http_client.post(url, data) 
\ No newline at end of file
@@ -1,35 +1,95 @@
 import requests
 import json
-from typing import Dict, Any
-from config import FXK_API_BASE_URL
+from typing import Callable, Dict, Any, List, Optional
+from urllib.parse import urlsplit
+from config import FXK_API_BASE_URL, FXK_THROTTLE_ERROR_CODES
 from .api_response import ApiResponse
+from .http_session import HttpSessionPool
+from .page_decoder import DataListStreamDecoder
+from .rate_limiter import get_rate_limiter, OUTCOME_THROTTLED, OUTCOME_ERROR
+
+# 视为限流的HTTP状态码
+THROTTLE_STATUS_CODES = (429, 503)
+
+# 流式读取响应时每块的大小
+STREAM_CHUNK_SIZE = 64 * 1024
 
 class HttpClient:
+    headers = {
+        'Content-Type': 'application/json',
+        'Accept': '*/*',
+        'User-Agent': 'Apifox/1.0.0 (https://apifox.com)',
+        'Connection': 'keep-alive'
+    }
+
     @staticmethod
     def post(url: str, data: Dict[str, Any]) -> ApiResponse:
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': '*/*',
-            'User-Agent': 'Apifox/1.0.0 (https://apifox.com)',
-            'Connection': 'keep-alive'
-        }
-        try:
-            response = requests.post(url, json=data, headers=headers)
-            
-            # 尝试解析响应内容
+        return HttpClient._send(
+            url, data,
+            stream=False,
+            decode=lambda response: ApiResponse.from_dict(response.json()),
+            raw_text=lambda response: response.text
+        )
+
+    @staticmethod
+    def post_stream(url: str, data: Dict[str, Any], fields: Optional[List[str]] = None) -> ApiResponse:
+        """发送查询请求并流式解析dataList，每条记录只保留指定字段
+
+        Args:
+            url: 请求地址
+            data: 请求体
+            fields: 需要保留的记录字段，为空时保留全部字段
+
+        Returns:
+            ApiResponse: 与post相同结构的响应，其中dataList为投影后的记录
+        """
+        decoder = DataListStreamDecoder(fields)
+
+        def decode(response: requests.Response) -> ApiResponse:
+            response.encoding = response.encoding or 'utf-8'
+            records = []
+            for chunk in response.iter_content(chunk_size=STREAM_CHUNK_SIZE, decode_unicode=True):
+                records.extend(decoder.feed(chunk))
+            api_response = ApiResponse.from_dict(decoder.close())
+            page = api_response.data.get('data')
+            if isinstance(page, dict) and 'dataList' in page:
+                page['dataList'] = records
+            return api_response
+
+        # 流式读取后响应体已被消费，解析失败时只能返回解码器保留的响应开头
+        return HttpClient._send(url, data, stream=True, decode=decode, raw_text=lambda response: decoder.head)
+
+    @staticmethod
+    def _send(url: str, data: Dict[str, Any], stream: bool,
+              decode: Callable[[requests.Response], ApiResponse],
+              raw_text: Callable[[requests.Response], str]) -> ApiResponse:
+        # 按接口路径共享限速器，所有线程的同类请求共同受控
+        limiter = get_rate_limiter(urlsplit(url).path)
+        with limiter.slot() as result:
             try:
-                response_data = response.json()
-                return ApiResponse.from_dict(response_data)
-            except json.JSONDecodeError as e:
+                with HttpSessionPool().post(url, json=data, headers=HttpClient.headers, stream=stream) as response:
+                    if response.status_code in THROTTLE_STATUS_CODES:
+                        result["outcome"] = OUTCOME_THROTTLED
+
+                    # 尝试解析响应内容
+                    try:
+                        api_response = decode(response)
+                        if api_response.code in FXK_THROTTLE_ERROR_CODES:
+                            result["outcome"] = OUTCOME_THROTTLED
+                        return api_response
+                    except json.JSONDecodeError as e:
+                        if result["outcome"] != OUTCOME_THROTTLED:
+                            result["outcome"] = OUTCOME_ERROR
+                        return ApiResponse(
+                            code=-1,
+                            message=f"响应解析失败: {str(e)}",
+                            data={"raw_response": raw_text(response)}
+                        )
+
+            except requests.exceptions.RequestException as e:
+                result["outcome"] = OUTCOME_ERROR
                 return ApiResponse(
                     code=-1,
-                    message=f"响应解析失败: {str(e)}",
-                    data={"raw_response": response.text}
+                    message=f"请求失败: {str(e)}",
+                    data={"error_type": type(e).__name__, "error_message": str(e)}
                 )
-                
-        except requests.exceptions.RequestException as e:
-            return ApiResponse(
-                code=-1,
-                message=f"请求失败: {str(e)}",
-                data={"error_type": type(e).__name__, "error_message": str(e)}
-            ) 
\ No newline at end of file
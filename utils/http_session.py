@@ -0,0 +1,153 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urlsplit
+from typing import Dict, Any
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from config import HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+
+class _HostStats:
+    """单个主机的连接统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def incr_requests(self):
+        with self._lock:
+            self.requests += 1
+
+    def incr_connections(self):
+        with self._lock:
+            self.connections += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": max(self.requests - self.connections, 0)
+            }
+
+
+class _PooledAdapter(HTTPAdapter):
+    """在新建TCP连接时计数的HTTPAdapter"""
+
+    def __init__(self, stats: _HostStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        stats = self._stats
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                stats.incr_connections()
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                stats.incr_connections()
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPConnectionPool,
+            "https": CountingHTTPSConnectionPool
+        }
+
+
+class HttpSessionPool:
+    """进程内共享的HTTP会话池
+
+    按主机维护长连接的requests.Session，供纷享销客、TAPD和飞书等上游客户端复用，
+    避免每次请求都重新建立TCP+TLS连接。
+    """
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super(HttpSessionPool, cls).__new__(cls)
+                    instance._lock = threading.Lock()
+                    instance._sessions = {}
+                    instance._stats = {}
+                    instance.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+                    cls._instance = instance
+        return cls._instance
+
+    def get_session(self, url: str) -> requests.Session:
+        """获取URL所属主机的会话，不存在时创建
+
+        Args:
+            url: 请求地址
+
+        Returns:
+            requests.Session: 该主机共享的会话
+        """
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session is not None:
+            return session
+
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                stats = _HostStats()
+                adapter = _PooledAdapter(
+                    stats,
+                    pool_connections=HTTP_POOL_CONNECTIONS,
+                    pool_maxsize=HTTP_POOL_MAXSIZE
+                )
+                session = requests.Session()
+                session.mount(f"{host}/", adapter)
+                self._stats[host] = stats
+                self._sessions[host] = session
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """发送请求，未指定超时时使用配置的连接/读取超时
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            **kwargs: 透传给requests的参数
+
+        Returns:
+            requests.Response: 响应对象
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        session = self.get_session(url)
+        parts = urlsplit(url)
+        self._stats[f"{parts.scheme}://{parts.netloc}"].incr_requests()
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各主机的连接复用统计
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 主机 -> {requests, connections, reused}
+        """
+        with self._lock:
+            items = list(self._stats.items())
+        return {host: stats.snapshot() for host, stats in items}
+
+    def close(self):
+        """关闭所有会话及其连接池"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+            self._stats.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,82 @@
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """将短时间窗口内的并发单键查询合并为批量查询
+
+    第一个提交的线程成为本批的leader，等待window秒（或凑满max_batch_size个键）后
+    以一次batch_func调用查询本批全部键，再把结果分发给各个等待的线程；
+    同一批内重复的键只查询一次。
+    """
+
+    def __init__(self, batch_func: Callable[[List[Hashable]], Dict[Hashable, Any]],
+                 max_batch_size: int = 50, window: float = 0.01):
+        """初始化
+
+        Args:
+            batch_func: 批量查询函数，接收键列表，返回键 -> 值，未找到的键可不包含在内
+            max_batch_size: 单次批量查询的最大键数
+            window: 收集窗口（秒）
+        """
+        self.batch_func = batch_func
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._cond = threading.Condition()
+        self._pending: Dict[Hashable, Future] = {}
+        self._leader_active = False
+
+    def submit(self, key: Hashable) -> Any:
+        """查询单个键，阻塞直到所在批次完成
+
+        Args:
+            key: 查询键
+
+        Returns:
+            Any: 查询结果，batch_func未返回该键时为None
+
+        Raises:
+            Exception: batch_func抛出的异常
+        """
+        with self._cond:
+            future = self._pending.get(key)
+            if future is None:
+                future = Future()
+                self._pending[key] = future
+                if len(self._pending) >= self.max_batch_size:
+                    self._cond.notify_all()
+            leader = not self._leader_active
+            if leader:
+                self._leader_active = True
+
+        if leader:
+            self._run_batches()
+        return future.result()
+
+    def _run_batches(self):
+        """leader收集窗口内的键并按max_batch_size分批查询"""
+        with self._cond:
+            self._cond.wait_for(lambda: len(self._pending) >= self.max_batch_size, timeout=self.window)
+            pending, self._pending = self._pending, {}
+            self._leader_active = False
+
+        items = list(pending.items())
+        for start in range(0, len(items), self.max_batch_size):
+            self._run_batch(items[start:start + self.max_batch_size])
+
+    def _run_batch(self, items: Iterable):
+        items = list(items)
+        keys = [key for key, _ in items]
+        try:
+            results = self.batch_func(keys) or {}
+        except Exception as e:
+            logger.warning(f"批量查询 {len(keys)} 个键失败: {str(e)}")
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for key, future in items:
+            future.set_result(results.get(key))
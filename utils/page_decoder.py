@@ -0,0 +1,149 @@
+import json
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# 投影时始终保留的记录字段，用于去重、排序和增量同步
+ALWAYS_KEEP_FIELDS = ("_id", "create_time", "last_modified_time")
+
+_SEEKING = 0
+_IN_LIST = 1
+_AFTER_LIST = 2
+
+_DATA_LIST_KEY = '"dataList"'
+
+# 保留的响应开头长度（字符），解析失败时用于排查
+RAW_PREFIX_SIZE = 2048
+_WHITESPACE = " \t\r\n"
+
+
+def project_record(record: Any, fields: Optional[List[str]]) -> Any:
+    """只保留记录中指定的字段
+
+    Args:
+        record: 原始记录
+        fields: 需要保留的字段，为空时不做投影
+
+    Returns:
+        Any: 投影后的记录
+    """
+    if not fields or not isinstance(record, dict):
+        return record
+    keep = list(fields) + [field for field in ALWAYS_KEEP_FIELDS if field not in fields]
+    return {field: record[field] for field in keep if field in record}
+
+
+class DataListStreamDecoder:
+    """/crm/custom/v2/data/query 响应的流式解码器
+
+    逐块接收响应文本，dataList中的记录每解析完一条就投影并产出，不会同时持有整页原始记录；
+    dataList以外的内容（errorCode、total等）保留下来，在close()时解析为响应骨架。
+    响应开头的RAW_PREFIX_SIZE个字符保存在head中，响应不是预期的JSON时可以看到服务端实际返回了什么。
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None):
+        self.fields = fields
+        self.head = ""
+        self._decoder = json.JSONDecoder()
+        self._state = _SEEKING
+        self._buffer = ""
+        self._skeleton = []
+
+    def feed(self, chunk: str) -> Iterator[Any]:
+        """输入一块响应文本，产出其中已完整的记录
+
+        Args:
+            chunk: 响应文本片段
+
+        Yields:
+            Any: 投影后的记录
+        """
+        if len(self.head) < RAW_PREFIX_SIZE:
+            self.head += chunk[:RAW_PREFIX_SIZE - len(self.head)]
+        self._buffer += chunk
+
+        if self._state == _SEEKING:
+            self._seek_data_list()
+
+        if self._state == _IN_LIST:
+            yield from self._decode_records()
+
+        if self._state == _AFTER_LIST:
+            self._skeleton.append(self._buffer)
+            self._buffer = ""
+
+    def _seek_data_list(self):
+        """查找 "dataList": [ 的位置，之前的内容计入响应骨架"""
+        index = self._buffer.find(_DATA_LIST_KEY)
+        if index == -1:
+            # 保留末尾可能被截断的键名
+            keep = len(_DATA_LIST_KEY) - 1
+            self._skeleton.append(self._buffer[:-keep])
+            self._buffer = self._buffer[-keep:]
+            return
+
+        position = index + len(_DATA_LIST_KEY)
+        for expected in ":[":
+            while position < len(self._buffer) and self._buffer[position] in _WHITESPACE:
+                position += 1
+            if position >= len(self._buffer):
+                return
+            if self._buffer[position] != expected:
+                # 不是dataList键（例如出现在字符串值中），继续向后查找
+                self._skeleton.append(self._buffer[:position])
+                self._buffer = self._buffer[position:]
+                self._seek_data_list()
+                return
+            position += 1
+
+        self._skeleton.append(self._buffer[:position])
+        self._buffer = self._buffer[position:]
+        self._state = _IN_LIST
+
+    def _decode_records(self) -> Iterator[Any]:
+        """从缓冲区中依次解析完整的记录"""
+        while True:
+            self._buffer = self._buffer.lstrip(_WHITESPACE + ",")
+            if not self._buffer:
+                return
+            if self._buffer[0] == "]":
+                self._state = _AFTER_LIST
+                return
+            try:
+                record, end = self._decoder.raw_decode(self._buffer)
+            except json.JSONDecodeError:
+                # 记录尚未接收完整，等待下一块
+                return
+            self._buffer = self._buffer[end:]
+            yield project_record(record, self.fields)
+
+    def close(self) -> Dict[str, Any]:
+        """结束解码并返回去掉dataList内容后的响应骨架
+
+        Returns:
+            Dict[str, Any]: 响应骨架，dataList为空列表
+
+        Raises:
+            json.JSONDecodeError: 响应不完整或格式不正确
+        """
+        if self._state == _IN_LIST:
+            raise json.JSONDecodeError("dataList未结束", self._buffer, 0)
+        return json.loads("".join(self._skeleton) + self._buffer)
+
+
+def iter_data_list(chunks: Iterable[str], fields: Optional[List[str]] = None,
+                   skeleton: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+    """流式解析查询响应，逐条产出投影后的dataList记录
+
+    Args:
+        chunks: 响应文本片段
+        fields: 需要保留的字段，为空时不做投影
+        skeleton: 可选，解析完成后写入响应骨架（errorCode、total等）
+
+    Yields:
+        Any: 投影后的记录
+    """
+    decoder = DataListStreamDecoder(fields)
+    for chunk in chunks:
+        yield from decoder.feed(chunk)
+    result = decoder.close()
+    if skeleton is not None:
+        skeleton.update(result)
@@ -0,0 +1,176 @@
+import json
+import zlib
+import base64
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional
+from config import QUERY_CACHE_ENABLED, QUERY_CACHE_KEY, QUERY_CACHE_DEFAULT_TTL, QUERY_CACHE_TTLS
+from .redis_client import RedisClient
+from .async_redis_client import AsyncRedisClient
+
+logger = logging.getLogger(__name__)
+
+class BaseQueryPageCache:
+    """自定义对象查询分页缓存基类，负责缓存键和序列化，不涉及具体的Redis客户端
+
+    以企业ID、对象API名称、查询用户ID和规范化后的查询条件（过滤、排序、分页、字段）为键，
+    服务端按当前用户的数据权限返回记录，不同用户的相同查询互不共享缓存；
+    将成功的分页响应压缩后存入Redis，缓存时间按对象分别配置。
+    """
+
+    @staticmethod
+    def ttl_for(object_api_name: str) -> int:
+        """获取对象的缓存时间（秒），0表示不缓存"""
+        if not QUERY_CACHE_ENABLED:
+            return 0
+        return QUERY_CACHE_TTLS.get(object_api_name, QUERY_CACHE_DEFAULT_TTL)
+
+    @staticmethod
+    def fingerprint(query: Dict[str, Any]) -> str:
+        """计算查询条件的指纹
+
+        过滤条件之间是与关系，按规范化后的内容排序，顺序不同的相同条件得到相同指纹；
+        排序条件和字段值的顺序有意义，保持原样。
+        """
+        normalized = dict(query)
+        filters = normalized.get("filters") or []
+        normalized["filters"] = sorted(
+            json.dumps(f, sort_keys=True, ensure_ascii=False) for f in filters
+        )
+        normalized["orders"] = normalized.get("orders") or []
+        if normalized.get("fields"):
+            normalized["fields"] = sorted(normalized["fields"])
+        text = json.dumps(normalized, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def make_key(self, corp_id: str, user_id: str, object_api_name: str, query: Dict[str, Any]) -> str:
+        """构建缓存键
+
+        Args:
+            corp_id: 企业ID
+            user_id: 发起查询的用户ID（currentOpenUserId）
+            object_api_name: 对象API名称
+            query: 查询条件
+
+        Returns:
+            str: 缓存键
+        """
+        return f"{QUERY_CACHE_KEY}:{corp_id}:{object_api_name}:{user_id}:{self.fingerprint(query)}"
+
+    @staticmethod
+    def _encode(data: Dict[str, Any]) -> str:
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        return base64.b64encode(zlib.compress(raw)).decode("ascii")
+
+    @staticmethod
+    def _decode(value: str) -> Dict[str, Any]:
+        return json.loads(zlib.decompress(base64.b64decode(value)).decode("utf-8"))
+
+    @classmethod
+    def _decode_many(cls, values: List[Optional[str]]) -> List[Optional[Dict[str, Any]]]:
+        results = []
+        for value in values:
+            try:
+                results.append(None if value is None else cls._decode(value))
+            except Exception as e:
+                logger.warning(f"解析查询缓存失败: {str(e)}")
+                results.append(None)
+        return results
+
+    @staticmethod
+    def _invalidate_pattern(object_api_name: str, corp_id: str) -> str:
+        return f"{QUERY_CACHE_KEY}:{corp_id}:{object_api_name}:*"
+
+
+class QueryPageCache(BaseQueryPageCache):
+    """自定义对象查询分页缓存"""
+
+    def __init__(self, redis_client: Optional[RedisClient] = None):
+        self.redis_client = redis_client or RedisClient()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的分页响应，未命中或读取失败时返回None"""
+        try:
+            value = self.redis_client.get(key)
+            if value is None:
+                return None
+            return self._decode(value)
+        except Exception as e:
+            logger.warning(f"读取查询缓存失败: {str(e)}")
+            return None
+
+    def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """一次往返读取多个分页响应，结果与keys一一对应，未命中或读取失败的位置为None"""
+        try:
+            values = self.redis_client.mget(keys)
+        except Exception as e:
+            logger.warning(f"批量读取查询缓存失败: {str(e)}")
+            return [None] * len(keys)
+        return self._decode_many(values)
+
+    def set(self, key: str, object_api_name: str, data: Dict[str, Any]):
+        """写入分页响应，写入失败时只记录日志"""
+        ttl = self.ttl_for(object_api_name)
+        if ttl <= 0:
+            return
+        try:
+            self.redis_client.set(key, self._encode(data), ttl)
+        except Exception as e:
+            logger.warning(f"写入查询缓存失败: {str(e)}")
+
+    def invalidate(self, object_api_name: str, corp_id: str = "*"):
+        """删除对象的全部分页缓存，以SCAN遍历并分批删除"""
+        batch = []
+        for key in self.redis_client.scan_iter(self._invalidate_pattern(object_api_name, corp_id)):
+            batch.append(key)
+            if len(batch) >= 500:
+                self.redis_client.delete_many(batch)
+                batch = []
+        self.redis_client.delete_many(batch)
+
+
+class AsyncQueryPageCache(BaseQueryPageCache):
+    """自定义对象查询分页缓存的异步版本，供事件循环内的代码使用，与QueryPageCache共用缓存键"""
+
+    def __init__(self, redis_client: Optional[AsyncRedisClient] = None):
+        self.redis_client = redis_client or AsyncRedisClient()
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取缓存的分页响应，未命中或读取失败时返回None"""
+        try:
+            value = await self.redis_client.get(key)
+            if value is None:
+                return None
+            return self._decode(value)
+        except Exception as e:
+            logger.warning(f"读取查询缓存失败: {str(e)}")
+            return None
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """一次往返读取多个分页响应，结果与keys一一对应"""
+        try:
+            values = await self.redis_client.mget(keys)
+        except Exception as e:
+            logger.warning(f"批量读取查询缓存失败: {str(e)}")
+            return [None] * len(keys)
+        return self._decode_many(values)
+
+    async def set(self, key: str, object_api_name: str, data: Dict[str, Any]):
+        """写入分页响应，写入失败时只记录日志"""
+        ttl = self.ttl_for(object_api_name)
+        if ttl <= 0:
+            return
+        try:
+            await self.redis_client.set(key, self._encode(data), ttl)
+        except Exception as e:
+            logger.warning(f"写入查询缓存失败: {str(e)}")
+
+    async def invalidate(self, object_api_name: str, corp_id: str = "*"):
+        """删除对象的全部分页缓存，以SCAN遍历并分批删除"""
+        batch = []
+        async for key in self.redis_client.scan_iter(self._invalidate_pattern(object_api_name, corp_id)):
+            batch.append(key)
+            if len(batch) >= 500:
+                await self.redis_client.delete_many(batch)
+                batch = []
+        await self.redis_client.delete_many(batch)
@@ -0,0 +1,211 @@
+import time
+import asyncio
+import threading
+import logging
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict
+from config import (
+    FXK_RATE_LIMIT_QPS, FXK_RATE_LIMIT_BURST, FXK_RATE_LIMIT_MIN_QPS,
+    FXK_MIN_CONCURRENCY, FXK_MAX_CONCURRENCY, FXK_INITIAL_CONCURRENCY,
+    FXK_LATENCY_THRESHOLD
+)
+
+logger = logging.getLogger(__name__)
+
+# 请求结果
+OUTCOME_OK = "ok"
+OUTCOME_THROTTLED = "throttled"
+OUTCOME_ERROR = "error"
+
+# 协程等待并发槽位时的轮询间隔（秒）
+ASYNC_SLOT_POLL_INTERVAL = 0.01
+
+
+class AdaptiveRateLimiter:
+    """令牌桶限速 + AIMD并发控制
+
+    - 令牌桶限制每秒请求数，桶容量允许短时突发
+    - 并发上限按AIMD调整：延迟正常时每轮加1，被限流、出错或延迟过高时减半
+    - 被限流时同时将令牌速率减半，之后随着请求成功逐步恢复
+    """
+
+    def __init__(self, name: str,
+                 rate: float = FXK_RATE_LIMIT_QPS,
+                 burst: int = FXK_RATE_LIMIT_BURST,
+                 min_rate: float = FXK_RATE_LIMIT_MIN_QPS,
+                 min_concurrency: int = FXK_MIN_CONCURRENCY,
+                 max_concurrency: int = FXK_MAX_CONCURRENCY,
+                 initial_concurrency: int = FXK_INITIAL_CONCURRENCY,
+                 latency_threshold: float = FXK_LATENCY_THRESHOLD,
+                 decrease_factor: float = 0.5):
+        self.name = name
+        self.max_rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.rate = rate
+        self.burst = burst
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.concurrency = float(max(min_concurrency, min(initial_concurrency, max_concurrency)))
+        self.latency_threshold = latency_threshold
+        self.decrease_factor = decrease_factor
+
+        self._tokens = float(burst)
+        self._last_refill = time.monotonic()
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def _try_take_token(self) -> float:
+        """尝试从令牌桶中取出一个令牌，调用方需持有self._cond
+
+        Returns:
+            float: 取到令牌时返回0，否则返回还需等待的秒数
+        """
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0
+        return (1 - self._tokens) / self.rate
+
+    def _take_token(self):
+        """从令牌桶中取出一个令牌，不足时等待"""
+        while True:
+            with self._cond:
+                wait_time = self._try_take_token()
+            if not wait_time:
+                return
+            time.sleep(wait_time)
+
+    def acquire(self):
+        """获取一个并发槽位和一个令牌"""
+        with self._cond:
+            while self._in_flight >= int(self.concurrency):
+                self._cond.wait()
+            self._in_flight += 1
+        self._take_token()
+
+    async def acquire_async(self):
+        """协程版acquire，等待槽位和令牌时让出事件循环，与线程共用同一份并发上限和令牌桶"""
+        while True:
+            with self._cond:
+                if self._in_flight < int(self.concurrency):
+                    self._in_flight += 1
+                    break
+            await asyncio.sleep(ASYNC_SLOT_POLL_INTERVAL)
+        try:
+            while True:
+                with self._cond:
+                    wait_time = self._try_take_token()
+                if not wait_time:
+                    return
+                await asyncio.sleep(wait_time)
+        except BaseException:
+            # 等待令牌时被取消，归还槽位但不调整速率
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify_all()
+            raise
+
+    def release(self, latency: float, outcome: str = OUTCOME_OK):
+        """释放槽位并根据请求结果调整速率和并发上限
+
+        Args:
+            latency: 请求耗时（秒）
+            outcome: 请求结果，OUTCOME_OK / OUTCOME_THROTTLED / OUTCOME_ERROR
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            # 同一批在途请求同时失败时只减半一次
+            can_decrease = now - self._last_decrease >= self.latency_threshold
+            if outcome == OUTCOME_THROTTLED:
+                if can_decrease:
+                    self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+                    self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+                    self._last_decrease = now
+                    logger.warning(f"接口 {self.name} 被限流，速率降至 {self.rate:.1f}/s，并发上限降至 {int(self.concurrency)}")
+            elif outcome == OUTCOME_ERROR or latency > self.latency_threshold:
+                if can_decrease:
+                    self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease_factor)
+                    self._last_decrease = now
+            else:
+                # 加性增长：每完成约一轮（当前并发数个）请求，并发上限加1
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """在限速器控制下执行一次请求
+
+        用法::
+
+            with limiter.slot() as result:
+                response = send()
+                result["outcome"] = OUTCOME_THROTTLED  # 默认为OUTCOME_OK
+        """
+        self.acquire()
+        result = {"outcome": OUTCOME_OK}
+        start_time = time.monotonic()
+        try:
+            yield result
+        except Exception:
+            result["outcome"] = OUTCOME_ERROR
+            raise
+        finally:
+            self.release(time.monotonic() - start_time, result["outcome"])
+
+    @asynccontextmanager
+    async def slot_async(self):
+        """slot的协程版本，用于aiohttp等异步请求
+
+        用法::
+
+            async with limiter.slot_async() as result:
+                response = await send()
+                result["outcome"] = OUTCOME_THROTTLED  # 默认为OUTCOME_OK
+        """
+        await self.acquire_async()
+        result = {"outcome": OUTCOME_OK}
+        start_time = time.monotonic()
+        try:
+            yield result
+        except BaseException:
+            result["outcome"] = OUTCOME_ERROR
+            raise
+        finally:
+            self.release(time.monotonic() - start_time, result["outcome"])
+
+    def stats(self) -> Dict[str, float]:
+        """获取当前的速率、并发上限和在途请求数"""
+        with self._cond:
+            return {
+                "rate": round(self.rate, 2),
+                "concurrency": int(self.concurrency),
+                "in_flight": self._in_flight
+            }
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(endpoint: str) -> AdaptiveRateLimiter:
+    """获取指定上游接口的进程级限速器，不存在时创建
+
+    Args:
+        endpoint: 接口标识，如 /cgi/crm/custom/v2/data/query
+
+    Returns:
+        AdaptiveRateLimiter: 该接口共享的限速器
+    """
+    limiter = _limiters.get(endpoint)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(endpoint)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(endpoint)
+                _limiters[endpoint] = limiter
+    return limiter
@@ -1,32 +1,84 @@
-import redis
-from config import REDIS_HOST, REDIS_PORT, REDIS_DB
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from config import CACHE_BACKEND, REDIS_SCAN_COUNT
+from .cache_backends import CacheBackend, create_cache_backend
 
 class RedisClient:
+    """进程共享的缓存客户端
+
+    接口沿用Redis命令，实际存储由config.CACHE_BACKEND选择的缓存后端提供：
+    redis（仅Redis）、memory（进程内LRU）、sqlite（本地文件）或tiered（本地 + Redis，Redis不可用时降级为本地）。
+    """
     _instance = None
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(RedisClient, cls).__new__(cls)
-            cls._instance.client = redis.Redis(
-                host=REDIS_HOST,
-                port=REDIS_PORT,
-                db=REDIS_DB,
-                decode_responses=True
-            )
+            cls._instance.backend = create_cache_backend(CACHE_BACKEND)
         return cls._instance
     
+    def use_backend(self, backend: CacheBackend):
+        """替换缓存后端"""
+        self.backend = backend
+    
+    def shared(self) -> CacheBackend:
+        """跨进程共享的一层：tiered模式下只访问Redis，其他模式为后端本身
+        
+        自己维护进程内缓存的调用方（如CredentialManager）使用，避免与tiered的本地层叠加两层过期时间。
+        """
+        return self.backend.shared()
+    
     def get(self, key):
-        return self.client.get(key)
+        return self.backend.get(key)
     
     def set(self, key, value, expire_time=None):
-        self.client.set(key, value, ex=expire_time)
+        self.backend.set(key, value, expire_time)
     
     def delete(self, key):
-        self.client.delete(key)
+        self.backend.delete(key)
     
     def exists(self, key):
-        return self.client.exists(key)
+        return self.backend.exists(key)
+    
+    def ttl(self, key) -> int:
+        """获取键的剩余过期时间（秒），键不存在返回-2，未设置过期时间返回-1"""
+        return self.backend.ttl(key)
+    
+    def pipeline(self, transaction: bool = False):
+        """创建管道，多条命令在一次往返中发送（非Redis后端依次执行）
+        
+        Args:
+            transaction: 是否以MULTI/EXEC事务执行，默认否，仅Redis后端有效
+            
+        Returns:
+            管道对象，调用execute()发送
+        """
+        return self.backend.pipeline(transaction=transaction)
+    
+    def mget(self, keys: List[str]) -> List[Optional[str]]:
+        """批量获取多个键的值，不存在的键对应None"""
+        if not keys:
+            return []
+        return self.backend.mget(keys)
+    
+    def mset(self, mapping: Dict[str, Any], expire_time: Optional[int] = None):
+        """批量写入多个键
+        
+        Args:
+            mapping: 键 -> 值
+            expire_time: 过期时间（秒），Redis后端通过管道逐个SET EX，仍只有一次往返
+        """
+        if not mapping:
+            return
+        self.backend.mset(mapping, expire_time)
+    
+    def delete_many(self, keys: Iterable[str]) -> int:
+        """批量删除多个键，返回删除的数量"""
+        return self.backend.delete_many(keys)
+    
+    def scan_iter(self, pattern: str, count: int = REDIS_SCAN_COUNT) -> Iterator[str]:
+        """以SCAN增量遍历匹配模式的键，不会像KEYS那样阻塞Redis"""
+        return self.backend.scan_iter(pattern, count)
     
     def keys(self, pattern: str) -> list:
         """获取匹配模式的键列表"""
-        return self.client.keys(pattern) 
\ No newline at end of file
+        return list(self.scan_iter(pattern))
@@ -0,0 +1,266 @@
+import time
+import random
+import asyncio
+import threading
+import logging
+import requests
+from typing import Any, Awaitable, Callable, Optional
+from config import (
+    RETRY_MAX_ATTEMPTS, RETRY_BASE_DELAY, RETRY_MAX_DELAY,
+    RETRY_BUDGET, RETRY_BUDGET_WINDOW, FXK_THROTTLE_ERROR_CODES
+)
+from .api_response import ApiResponse
+
+logger = logging.getLogger(__name__)
+
+# 纷享销客令牌过期错误码
+TOKEN_EXPIRED_CODE = 20016
+
+# 重试决策
+SUCCESS = "success"
+RETRY = "retry"
+REFRESH_TOKEN = "refresh_token"
+FAIL = "fail"
+
+
+class RetryExhaustedError(Exception):
+    """重试次数或重试预算已用尽，外层不应再重试"""
+    pass
+
+
+class NonRetryableError(Exception):
+    """业务错误（用户不存在、鉴权失败等），重试不会改变结果"""
+    pass
+
+
+class TokenError(NonRetryableError):
+    """接口拒绝发放企业访问令牌，通常是应用凭证配置错误"""
+    pass
+
+
+class UserNotFoundError(NonRetryableError):
+    """手机号没有对应的纷享销客用户"""
+    pass
+
+
+class TransientError(Exception):
+    """上游暂时不可用（网络错误、限流、令牌过期），稍后重试可能成功"""
+    pass
+
+
+# 可以重试的传输层异常：连接失败和超时
+TRANSPORT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    ConnectionError,
+    TimeoutError
+)
+
+
+class RetryBudget:
+    """重试预算，限制一次报告生成过程中所有调用的重试总次数
+
+    每份报告创建自己的预算并传给该报告使用的服务，并发生成的报告互不影响。
+    提供window时已用额度每隔window秒清零，用于不属于某份报告、长期存在的进程共享预算。
+    """
+
+    def __init__(self, max_retries: int = RETRY_BUDGET, window: Optional[float] = None):
+        self.max_retries = max_retries
+        self.window = window
+        self._used = 0
+        self._window_start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        if self.window is not None and time.monotonic() - self._window_start >= self.window:
+            self._used = 0
+            self._window_start = time.monotonic()
+
+    def try_spend(self) -> bool:
+        """尝试消耗一次重试额度
+
+        Returns:
+            bool: 预算充足返回True，已用尽返回False
+        """
+        with self._lock:
+            self._refill()
+            if self._used >= self.max_retries:
+                return False
+            self._used += 1
+            return True
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            self._refill()
+            return max(self.max_retries - self._used, 0)
+
+    def reset(self, max_retries: Optional[int] = None):
+        """重置预算"""
+        with self._lock:
+            if max_retries is not None:
+                self.max_retries = max_retries
+            self._used = 0
+            self._window_start = time.monotonic()
+
+
+_retry_budget = RetryBudget(window=RETRY_BUDGET_WINDOW)
+
+
+def get_retry_budget() -> RetryBudget:
+    """获取进程共享的重试预算，未指定预算的RetryPolicy使用，按RETRY_BUDGET_WINDOW恢复"""
+    return _retry_budget
+
+
+def classify_response(response: ApiResponse) -> str:
+    """按错误码对纷享销客响应分类
+
+    - 0: 成功
+    - 20016: 令牌过期，刷新令牌后立即重试，不等待
+    - -1（网络错误或响应解析失败）及限流错误码: 退避后重试
+    - 其他业务错误: 不重试
+    """
+    if response.is_success():
+        return SUCCESS
+    if response.code == TOKEN_EXPIRED_CODE:
+        return REFRESH_TOKEN
+    if response.code == -1 or response.code in FXK_THROTTLE_ERROR_CODES:
+        return RETRY
+    return FAIL
+
+
+def classify_exception(error: Exception) -> str:
+    """对调用过程中抛出的异常分类
+
+    只有传输错误、超时和TransientError退避后重试；参数错误、业务错误（NonRetryableError）、
+    内层已耗尽重试的异常以及其他未知异常都不再重试，以免消耗重试预算。
+    """
+    if isinstance(error, (TransientError,) + TRANSPORT_ERRORS):
+        return RETRY
+    return FAIL
+
+
+class RetryPolicy:
+    """统一的重试策略：指数退避 + 全抖动，按错误码分类，并受重试预算约束"""
+
+    def __init__(self,
+                 max_attempts: int = RETRY_MAX_ATTEMPTS,
+                 base_delay: float = RETRY_BASE_DELAY,
+                 max_delay: float = RETRY_MAX_DELAY,
+                 budget: Optional[RetryBudget] = None,
+                 response_classifier: Callable[[ApiResponse], str] = classify_response,
+                 exception_classifier: Callable[[Exception], str] = classify_exception):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget = budget or get_retry_budget()
+        self.response_classifier = response_classifier
+        self.exception_classifier = exception_classifier
+
+    def backoff(self, attempt: int) -> float:
+        """计算第attempt次失败后的等待时间（全抖动）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _next_step(self, attempt: int, decision: str, reason: str, name: str) -> Optional[float]:
+        """失败后决定下一步
+
+        Returns:
+            Optional[float]: None表示不再重试；0表示刷新令牌后立即重试；否则为退避等待的秒数
+        """
+        if decision == FAIL or attempt == self.max_attempts - 1:
+            return None
+        if not self.budget.try_spend():
+            logger.warning(f"{name} 重试预算已用尽，不再重试: {reason}")
+            return None
+        if decision == REFRESH_TOKEN:
+            logger.warning(f"{name} 令牌已过期，刷新令牌后进行第 {attempt + 2} 次尝试")
+            return 0
+        delay = self.backoff(attempt)
+        logger.warning(f"{name} 第 {attempt + 1} 次尝试失败: {reason}，{delay:.2f} 秒后重试")
+        return delay
+
+    def call(self, func: Callable[[], ApiResponse], name: str = "",
+             on_refresh_token: Optional[Callable[[], None]] = None) -> Any:
+        """按策略执行调用
+
+        Args:
+            func: 被调用的函数，返回ApiResponse
+            name: 调用名称，用于日志
+            on_refresh_token: 遇到令牌过期时的回调，用于刷新令牌
+
+        Returns:
+            Any: 成功的响应；重试结束仍失败时返回最后一次的响应
+
+        Raises:
+            Exception: 最后一次调用抛出的异常
+        """
+        for attempt in range(self.max_attempts):
+            error = None
+            response = None
+            try:
+                response = func()
+                decision = self.response_classifier(response)
+            except Exception as e:
+                error = e
+                decision = self.exception_classifier(e)
+
+            if decision == SUCCESS:
+                return response
+
+            reason = str(error) if error else f"{response.code} {response.message}"
+            if decision == REFRESH_TOKEN and not on_refresh_token:
+                decision = RETRY
+            delay = self._next_step(attempt, decision, reason, name)
+            if delay is None:
+                break
+            if decision == REFRESH_TOKEN:
+                on_refresh_token()
+            else:
+                time.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
+
+    async def call_async(self, func: Callable[[], Awaitable[ApiResponse]], name: str = "",
+                         on_refresh_token: Optional[Callable[[], Awaitable[None]]] = None) -> Any:
+        """call的异步版本，等待退避时不阻塞事件循环，与同步调用共用重试预算
+
+        Args:
+            func: 被调用的协程函数，返回ApiResponse
+            name: 调用名称，用于日志
+            on_refresh_token: 遇到令牌过期时的协程回调，用于刷新令牌
+
+        Returns:
+            Any: 成功的响应；重试结束仍失败时返回最后一次的响应
+
+        Raises:
+            Exception: 最后一次调用抛出的异常
+        """
+        for attempt in range(self.max_attempts):
+            error = None
+            response = None
+            try:
+                response = await func()
+                decision = self.response_classifier(response)
+            except Exception as e:
+                error = e
+                decision = self.exception_classifier(e)
+
+            if decision == SUCCESS:
+                return response
+
+            reason = str(error) if error else f"{response.code} {response.message}"
+            if decision == REFRESH_TOKEN and not on_refresh_token:
+                decision = RETRY
+            delay = self._next_step(attempt, decision, reason, name)
+            if delay is None:
+                break
+            if decision == REFRESH_TOKEN:
+                await on_refresh_token()
+            else:
+                await asyncio.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
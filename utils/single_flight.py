@@ -0,0 +1,68 @@
+import threading
+from typing import Any, Callable, Dict
+
+
+class _Call:
+    """一次正在进行中的调用"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """合并相同键的并发调用
+
+    同一时刻相同键的调用只有第一个（leader）真正执行，其余调用等待并共享它的结果或异常；
+    调用结束后键被移除，之后的调用会重新执行。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+
+    def do(self, key: str, func: Callable[[], Any]) -> Any:
+        """执行调用，相同键的并发调用共享同一次执行
+
+        Args:
+            key: 调用键，参数相同的调用应使用相同的键
+            func: 实际执行的函数
+
+        Returns:
+            Any: func的返回值
+
+        Raises:
+            Exception: func抛出的异常
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+# 进程内共享的调用合并组，键需带上调用类型前缀以免冲突
+single_flight = SingleFlight()
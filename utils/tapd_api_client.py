@@ -1,6 +1,6 @@
-import requests
 from typing import Dict, Any, Optional
 from datetime import datetime
+from .http_session import HttpSessionPool
 
 class TapdApiClient:
     """TAPD API客户端"""
@@ -74,7 +74,7 @@ class TapdApiClient:
                 params[key] = value
                 
         try:
-            response = requests.get(
+            response = HttpSessionPool().get(
                 url,
                 params=params,
                 auth=(self.api_user, self.api_password)
@@ -151,7 +151,7 @@ class TapdApiClient:
         print(f"TAPD API请求参数: {params}")
         
         try:
-            response = requests.get(
+            response = HttpSessionPool().get(
                 url,
                 params=params,
                 auth=(self.api_user, self.api_password)
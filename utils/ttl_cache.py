@@ -0,0 +1,85 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional
+
+
+class TTLCache:
+    """线程安全的进程内缓存，条目按TTL过期，超出容量时淘汰最久未使用的条目"""
+
+    def __init__(self, maxsize: int = 1024, default_ttl: Optional[float] = None):
+        """初始化缓存
+
+        Args:
+            maxsize: 最大条目数
+            default_ttl: 默认过期时间（秒），为None时不过期
+        """
+        self.maxsize = maxsize
+        self.default_ttl = default_ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """获取未过期的值，不存在或已过期时返回default"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at is not None and time.monotonic() >= expires_at:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """写入值
+
+        Args:
+            key: 键
+            value: 值
+            ttl: 过期时间（秒），不提供时使用默认过期时间
+        """
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def ttl(self, key: str) -> int:
+        """获取剩余过期时间（秒），不存在返回-2，不过期返回-1，与Redis的TTL一致"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return -2
+            expires_at = item[1]
+            if expires_at is None:
+                return -1
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                del self._data[key]
+                return -2
+            return max(int(remaining), 1)
+
+    def keys(self) -> List[str]:
+        """获取所有未过期的键"""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (_, expires_at) in self._data.items() if expires_at is None or expires_at > now]
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
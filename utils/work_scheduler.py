@@ -0,0 +1,86 @@
+import heapq
+import itertools
+import threading
+import logging
+from concurrent.futures import Future
+from typing import Any, Callable
+from config import FETCH_GLOBAL_CONCURRENCY
+
+logger = logging.getLogger(__name__)
+
+
+class WorkScheduler:
+    """进程内共享的优先级工作调度器
+
+    所有任务进入同一个优先级队列，由固定数量的工作线程执行，整个进程共用一份并发预算；
+    空闲的工作线程总是取出当前优先级最高的任务，某个对象的页数很多时，其他对象获取完后
+    空出的线程会继续帮它获取剩余的页，不会出现一个线程独自拖尾、其余线程空闲的情况。
+    优先级相同的任务按提交顺序执行。
+
+    任务中不应同步等待其他调度任务的结果，否则工作线程全部被占用时会相互等待。
+    """
+
+    def __init__(self, max_workers: int = FETCH_GLOBAL_CONCURRENCY):
+        self.max_workers = max_workers
+        self._queue = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._workers = []
+
+    def submit(self, func: Callable[..., Any], *args, priority: float = 0, **kwargs) -> Future:
+        """提交任务
+
+        Args:
+            func: 任务函数
+            *args: 位置参数
+            priority: 优先级，越大越先执行
+            **kwargs: 关键字参数
+
+        Returns:
+            Future: 任务结果，可通过add_done_callback注册完成回调
+        """
+        future = Future()
+        with self._cond:
+            heapq.heappush(self._queue, (-priority, next(self._counter), future, func, args, kwargs))
+            self._ensure_workers()
+            self._cond.notify()
+        return future
+
+    def pending(self) -> int:
+        """队列中尚未开始的任务数"""
+        with self._cond:
+            return len(self._queue)
+
+    def _ensure_workers(self):
+        """每次提交最多启动一个工作线程，直到达到max_workers"""
+        if len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._run, name=f"work-scheduler-{len(self._workers)}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                _, _, future, func, args, kwargs = heapq.heappop(self._queue)
+
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                logger.debug(f"调度任务执行失败: {str(e)}")
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+_work_scheduler = WorkScheduler()
+
+
+def get_work_scheduler() -> WorkScheduler:
+    """获取进程共享的工作调度器"""
+    return _work_scheduler